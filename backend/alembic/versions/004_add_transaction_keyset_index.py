@@ -0,0 +1,28 @@
+"""Add composite index for keyset pagination of transactions
+
+Revision ID: 004_add_transaction_keyset_index
+Revises: 003_add_2fa_and_data_isolation
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_add_transaction_keyset_index'
+down_revision = '003_add_2fa_and_data_isolation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves ORDER BY date DESC, id DESC with (date, id) cursor filters
+    op.create_index(
+        'ix_transactions_user_account_date_id',
+        'transactions',
+        ['user_id', 'account_id', 'date', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_user_account_date_id', 'transactions')
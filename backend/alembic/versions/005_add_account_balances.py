@@ -0,0 +1,115 @@
+"""Add ledger-derived account balances maintained by triggers
+
+Revision ID: 005_add_account_balances
+Revises: 004_add_transaction_keyset_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_add_account_balances'
+down_revision = '004_add_transaction_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Running totals per account
+    op.create_table(
+        'account_balances',
+        sa.Column('account_id', sa.Integer(), primary_key=True),
+        sa.Column('balance', sa.Numeric(14, 2), server_default='0', nullable=False),
+        sa.Column('transaction_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('NOW()'), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='CASCADE'),
+    )
+
+    # 2. Delta function, applied once per statement via transition tables
+    op.execute("""
+        CREATE OR REPLACE FUNCTION apply_account_balance_delta() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO account_balances (account_id, balance, transaction_count, updated_at)
+                SELECT account_id, SUM(amount), COUNT(*), now() AT TIME ZONE 'utc'
+                FROM new_rows GROUP BY account_id
+                ON CONFLICT (account_id) DO UPDATE SET
+                    balance = account_balances.balance + EXCLUDED.balance,
+                    transaction_count = account_balances.transaction_count + EXCLUDED.transaction_count,
+                    updated_at = EXCLUDED.updated_at;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE account_balances b SET
+                    balance = b.balance - d.amount,
+                    transaction_count = b.transaction_count - d.cnt,
+                    updated_at = now() AT TIME ZONE 'utc'
+                FROM (SELECT account_id, SUM(amount) AS amount, COUNT(*) AS cnt
+                      FROM old_rows GROUP BY account_id) d
+                WHERE b.account_id = d.account_id;
+            ELSE
+                INSERT INTO account_balances (account_id, balance, transaction_count, updated_at)
+                SELECT account_id, SUM(amount), SUM(cnt), now() AT TIME ZONE 'utc'
+                FROM (
+                    SELECT account_id, amount, 1 AS cnt FROM new_rows
+                    UNION ALL
+                    SELECT account_id, -amount, -1 AS cnt FROM old_rows
+                ) d
+                GROUP BY account_id
+                ON CONFLICT (account_id) DO UPDATE SET
+                    balance = account_balances.balance + EXCLUDED.balance,
+                    transaction_count = account_balances.transaction_count + EXCLUDED.transaction_count,
+                    updated_at = EXCLUDED.updated_at;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE TRIGGER transactions_balance_insert
+        AFTER INSERT ON transactions REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """)
+    op.execute("""
+        CREATE TRIGGER transactions_balance_update
+        AFTER UPDATE ON transactions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """)
+    op.execute("""
+        CREATE TRIGGER transactions_balance_delete
+        AFTER DELETE ON transactions REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """)
+
+    # 3. Backfill totals in one pass
+    op.execute("""
+        INSERT INTO account_balances (account_id, balance, transaction_count, updated_at)
+        SELECT a.id, COALESCE(SUM(t.amount), 0), COUNT(t.id), NOW()
+        FROM accounts a LEFT JOIN transactions t ON t.account_id = a.id
+        GROUP BY a.id
+    """)
+
+    # 4. accounts.balance becomes the opening balance. Rebase it so every
+    # account reports the same current balance as before the upgrade.
+    op.execute("""
+        UPDATE accounts a
+        SET balance = COALESCE(a.balance, 0) - b.balance
+        FROM account_balances b
+        WHERE b.account_id = a.id
+    """)
+
+
+def downgrade() -> None:
+    # Restore accounts.balance as the stored current balance
+    op.execute("""
+        UPDATE accounts a
+        SET balance = COALESCE(a.balance, 0) + b.balance
+        FROM account_balances b
+        WHERE b.account_id = a.id
+    """)
+
+    op.execute("DROP TRIGGER IF EXISTS transactions_balance_delete ON transactions")
+    op.execute("DROP TRIGGER IF EXISTS transactions_balance_update ON transactions")
+    op.execute("DROP TRIGGER IF EXISTS transactions_balance_insert ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS apply_account_balance_delta()")
+    op.drop_table('account_balances')
@@ -0,0 +1,50 @@
+"""Add full-text and trigram search indexes on transactions
+
+Revision ID: 006_add_transaction_search
+Revises: 005_add_account_balances
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '006_add_transaction_search'
+down_revision = '005_add_account_balances'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Stored generated column, kept in sync by Postgres (rewrites the table once)
+    op.add_column('transactions',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', coalesce(description, ''))", persisted=True),
+            nullable=True
+        )
+    )
+
+    op.create_index(
+        'ix_transactions_search_vector',
+        'transactions',
+        ['search_vector'],
+        postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_transactions_description_trgm',
+        'transactions',
+        ['description'],
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_description_trgm', 'transactions')
+    op.drop_index('ix_transactions_search_vector', 'transactions')
+    op.drop_column('transactions', 'search_vector')
@@ -0,0 +1,32 @@
+"""Add import fingerprint to transactions for set-based bank import dedup
+
+Revision ID: 007_add_import_fingerprint
+Revises: 006_add_transaction_search
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_import_fingerprint'
+down_revision = '006_add_transaction_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL: the import prefetch still matches them by
+    # (date, amount, description), the fingerprint only guards new imports
+    op.add_column('transactions', sa.Column('import_fingerprint', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ux_transactions_import_fingerprint',
+        'transactions',
+        ['import_fingerprint'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_transactions_import_fingerprint', 'transactions')
+    op.drop_column('transactions', 'import_fingerprint')
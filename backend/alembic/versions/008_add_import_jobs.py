@@ -0,0 +1,48 @@
+"""Add import_jobs table for background bank imports
+
+Revision ID: 008_add_import_jobs
+Revises: 007_add_import_fingerprint
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008_add_import_jobs'
+down_revision = '007_add_import_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('file_path', sa.String(length=500), nullable=True),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('auto_match', sa.Boolean(), nullable=True),
+        sa.Column('bytes_read', sa.BigInteger(), nullable=True),
+        sa.Column('rows_parsed', sa.Integer(), nullable=True),
+        sa.Column('transactions_created', sa.Integer(), nullable=True),
+        sa.Column('duplicates_skipped', sa.Integer(), nullable=True),
+        sa.Column('result', postgresql.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_import_jobs_status', 'import_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_status', 'import_jobs')
+    op.drop_table('import_jobs')
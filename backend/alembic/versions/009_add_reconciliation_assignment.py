@@ -0,0 +1,26 @@
+"""Add assignment mode and report to bank reconciliations
+
+Revision ID: 009_add_reconciliation_assignment
+Revises: 008_add_import_jobs
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009_add_reconciliation_assignment'
+down_revision = '008_add_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bank_reconciliations', sa.Column('assignment_mode', sa.String(length=20), nullable=True, server_default='greedy'))
+    op.add_column('bank_reconciliations', sa.Column('assignment_report', postgresql.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bank_reconciliations', 'assignment_report')
+    op.drop_column('bank_reconciliations', 'assignment_mode')
@@ -0,0 +1,28 @@
+"""Add index for paging reconciliation matches
+
+Revision ID: 010_add_reconciliation_match_index
+Revises: 009_add_reconciliation_assignment
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_reconciliation_match_index'
+down_revision = '009_add_reconciliation_assignment'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves WHERE reconciliation_id = ? ORDER BY id with OFFSET/LIMIT
+    op.create_index(
+        'ix_reconciliation_matches_reconciliation_id_id',
+        'reconciliation_matches',
+        ['reconciliation_id', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reconciliation_matches_reconciliation_id_id', 'reconciliation_matches')
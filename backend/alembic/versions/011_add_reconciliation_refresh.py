@@ -0,0 +1,24 @@
+"""Add last run timestamp for incremental reconciliation refresh
+
+Revision ID: 011_add_reconciliation_refresh
+Revises: 010_add_reconciliation_match_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_add_reconciliation_refresh'
+down_revision = '010_add_reconciliation_match_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL for existing reconciliations: refresh falls back to created_at
+    op.add_column('bank_reconciliations', sa.Column('last_matched_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bank_reconciliations', 'last_matched_at')
@@ -0,0 +1,24 @@
+"""Add running balance checkpoint report to reconciliations
+
+Revision ID: 012_add_reconciliation_balance_report
+Revises: 011_add_reconciliation_refresh
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012_add_reconciliation_balance_report'
+down_revision = '011_add_reconciliation_refresh'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bank_reconciliations', sa.Column('balance_report', postgresql.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bank_reconciliations', 'balance_report')
@@ -0,0 +1,101 @@
+"""Add trigger-maintained change log and per-mirror replication cursors
+
+Revision ID: 013_add_change_log
+Revises: 012_add_reconciliation_balance_report
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_change_log'
+down_revision = '012_add_reconciliation_balance_report'
+branch_labels = None
+depends_on = None
+
+TABLES = (('transactions', 'transaction'), ('accounts', 'account'))
+
+
+def upgrade() -> None:
+    # 1. Append-only log
+    op.create_table(
+        'change_log',
+        sa.Column('seq', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('txid', sa.BigInteger(), nullable=False),
+        sa.Column('entity_type', sa.String(20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(10), nullable=False),
+        sa.Column('origin', sa.String(255), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.text("(now() AT TIME ZONE 'utc')"), nullable=False),
+    )
+    op.create_index('ix_change_log_txid_seq', 'change_log', ['txid', 'seq'])
+
+    # 2. Statement-level triggers, written in the same transaction as the change
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_change_log() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO change_log (txid, entity_type, entity_id, operation, origin)
+                SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], id, 'delete',
+                       NULLIF(current_setting('app.change_origin', true), '')
+                FROM old_rows;
+            ELSE
+                INSERT INTO change_log (txid, entity_type, entity_id, operation, origin)
+                SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], id, lower(TG_OP),
+                       NULLIF(current_setting('app.change_origin', true), '')
+                FROM new_rows;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, entity_type in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_insert
+            AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_update
+            AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_log_delete
+            AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """)
+
+    # 3. Cursors per mirror
+    op.add_column('mirror_instances', sa.Column('push_cursor', sa.String(64), nullable=True))
+    op.add_column('mirror_instances', sa.Column('pull_cursor', sa.String(64), nullable=True))
+
+    # 4. Backfill rows changed since the oldest enabled mirror's last sync,
+    # so nothing the updated_at scan would still have pushed gets lost
+    for table, entity_type in TABLES:
+        op.execute(f"""
+            INSERT INTO change_log (txid, entity_type, entity_id, operation)
+            SELECT pg_current_xact_id()::text::bigint, '{entity_type}', id, 'update'
+            FROM {table}
+            WHERE updated_at > COALESCE(
+                (SELECT MIN(COALESCE(last_sync, '-infinity'::timestamp))
+                 FROM mirror_instances WHERE sync_enabled),
+                'infinity'::timestamp
+            )
+            ORDER BY id
+        """)
+
+
+def downgrade() -> None:
+    op.drop_column('mirror_instances', 'pull_cursor')
+    op.drop_column('mirror_instances', 'push_cursor')
+
+    for table, _ in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_log_delete ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_log_update ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_log_insert ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_change_log()")
+    op.drop_index('ix_change_log_txid_seq', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,30 @@
+"""Record change log pruning, so cursors behind pruned entries are detected
+
+Revision ID: 014_add_change_log_prunes
+Revises: 013_add_change_log
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_add_change_log_prunes'
+down_revision = '013_add_change_log'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_log_prunes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('txid', sa.BigInteger(), nullable=False),
+        sa.Column('seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_count', sa.Integer(), nullable=False),
+        sa.Column('pruned_at', sa.DateTime(), server_default=sa.text("(now() AT TIME ZONE 'utc')"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_log_prunes')
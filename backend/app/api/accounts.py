@@ -4,10 +4,12 @@ from typing import List
 from pydantic import BaseModel
 from decimal import Decimal
 from app.core.database import get_db
-from app.core.security import get_current_user
-from app.core.authorization import get_user_filter, verify_account_access
+from app.core.security import get_current_principal
+from app.core.principal_cache import Principal
+from app.core.authorization import get_user_filter, verify_account_access, get_current_admin_user
 from app.models.account import Account
-from app.models.user import User
+from app.models.account_balance import AccountBalance
+from app.services.balance_service import BalanceService
 
 router = APIRouter()
 
@@ -17,7 +19,7 @@ class AccountCreate(BaseModel):
     name: str
     type: str  # checking, savings, credit_card, cash
     iban: str | None = None
-    balance: Decimal = Decimal("0.00")
+    balance: Decimal = Decimal("0.00")  # Opening balance
     currency: str = "CHF"
 
 
@@ -25,7 +27,7 @@ class AccountUpdate(BaseModel):
     name: str | None = None
     type: str | None = None
     iban: str | None = None
-    balance: Decimal | None = None
+    balance: Decimal | None = None  # Sets the current balance (adjusts the opening balance)
     currency: str | None = None
 
 
@@ -34,36 +36,57 @@ class AccountResponse(BaseModel):
     name: str
     type: str
     iban: str | None
-    balance: Decimal
+    balance: Decimal  # Opening balance + sum of all transactions
     currency: str
 
     class Config:
         from_attributes = True
 
 
+def to_account_response(account: Account, ledger_total: Decimal) -> AccountResponse:
+    """Build response with the ledger-derived current balance"""
+    response = AccountResponse.model_validate(account)
+    response.balance = (account.balance or Decimal("0")) + ledger_total
+    return response
+
+
 @router.get("/", response_model=List[AccountResponse])
 def list_accounts(
     user_filter = Depends(get_user_filter),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List accounts (filtered by user unless admin)"""
-    accounts = db.query(Account).filter_by(**user_filter).all()
-    return accounts
+    rows = db.query(Account, AccountBalance.balance).filter_by(**user_filter).outerjoin(
+        AccountBalance, AccountBalance.account_id == Account.id
+    ).all()
+    return [to_account_response(account, ledger_total or Decimal("0")) for account, ledger_total in rows]
+
+
+@router.post("/balances/rebuild")
+def rebuild_balances(
+    admin_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute all ledger balances from transactions (admin only)"""
+    rebuilt = BalanceService(db).rebuild()
+    return {"message": "Balances rebuilt", "accounts": rebuilt}
 
 
 @router.get("/{account_id}", response_model=AccountResponse)
 def get_account(
-    account: Account = Depends(verify_account_access)
+    account: Account = Depends(verify_account_access),
+    db: Session = Depends(get_db)
 ):
     """Get specific account (with access verification)"""
-    return account
+    ledger_total = BalanceService(db).get_ledger_totals([account.id])[account.id]
+    return to_account_response(account, ledger_total)
 
 
 @router.post("/", response_model=AccountResponse, status_code=201)
 def create_account(
     account: AccountCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create new account"""
@@ -71,7 +94,7 @@ def create_account(
     db.add(db_account)
     db.commit()
     db.refresh(db_account)
-    return db_account
+    return to_account_response(db_account, Decimal("0"))
 
 
 @router.put("/{account_id}", response_model=AccountResponse)
@@ -82,12 +105,18 @@ def update_account(
 ):
     """Update account (with access verification)"""
     update_data = account.model_dump(exclude_unset=True)
+    balance_service = BalanceService(db)
+    if update_data.get("balance") is not None:
+        balance_service.set_balance(db_account, update_data.pop("balance"))
+    update_data.pop("balance", None)
+
     for key, value in update_data.items():
         setattr(db_account, key, value)
 
     db.commit()
     db.refresh(db_account)
-    return db_account
+    ledger_total = balance_service.get_ledger_totals([db_account.id])[db_account.id]
+    return to_account_response(db_account, ledger_total)
 
 
 @router.delete("/{account_id}", status_code=204)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any, List
+from datetime import datetime
 
-from app.core.database import get_db
-from app.services.bank_import_service import BankImportService, setup_bank_account
+from app.core.database import get_async_db, SessionLocal
+from app.models.import_job import ImportJob
+from app.services.bank_import_service import BankImportService, setup_bank_account, expand_uploads
+from app.services.import_jobs import import_job_queue
 
 router = APIRouter()
 
@@ -27,10 +33,31 @@ class ImportResult(BaseModel):
     error: Optional[str] = None
 
 
+class ImportJobStatus(BaseModel):
+    id: str
+    status: str  # queued, running, completed, failed
+    filename: Optional[str] = None
+    account_id: Optional[int] = None
+    total_bytes: Optional[int] = None
+    bytes_read: Optional[int] = None
+    rows_parsed: Optional[int] = None
+    transactions_created: Optional[int] = None
+    duplicates_skipped: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 @router.post("/bank/setup")
 async def setup_account_for_bank_import(
     setup: BankAccountSetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Konfiguriere Account für automatischen Bank Import
@@ -47,12 +74,14 @@ async def setup_account_for_bank_import(
         }
     """
     try:
-        account = setup_bank_account(
-            db=db,
-            account_id=setup.account_id,
-            bank_name=setup.bank_name,
-            bank_identifier=setup.bank_identifier,
-            enable_auto_import=setup.enable_auto_import
+        account = await db.run_sync(
+            lambda session: setup_bank_account(
+                db=session,
+                account_id=setup.account_id,
+                bank_name=setup.bank_name,
+                bank_identifier=setup.bank_identifier,
+                enable_auto_import=setup.enable_auto_import
+            )
         )
         
         return {
@@ -69,12 +98,12 @@ async def setup_account_for_bank_import(
         raise HTTPException(404, str(e))
 
 
-@router.post("/bank/import", response_model=ImportResult)
+@router.post("/bank/import", response_model=ImportResult, responses={202: {"model": ImportJobStatus}})
 async def import_bank_csv(
     file: UploadFile = File(...),
     account_id: Optional[int] = None,
     auto_match: bool = True,
-    db: Session = Depends(get_db)
+    run_async: bool = Query(False, alias="async")
 ):
     """
     Importiere Bank CSV mit automatischem Account Matching
@@ -85,6 +114,7 @@ async def import_bank_csv(
     - Raiffeisen
     - ZKB (Zürcher Kantonalbank)
     - Credit Suisse
+    - ISO 20022 camt.053/054 XML (Account-Matching über die IBAN)
     
     Auto-Matching:
     Wenn auto_match=True und account_id nicht gegeben, versucht das System
@@ -98,21 +128,33 @@ async def import_bank_csv(
         file: CSV File Upload
         account_id: Optional - spezifischer Account
         auto_match: Wenn True, automatisches Account-Matching
+        async: Wenn True, Import als Hintergrund-Job (202 mit Job ID,
+            Status unter GET /jobs/{id})
     
     Returns:
-        ImportResult mit Details zum Import
+        ImportResult mit Details zum Import, bzw. ImportJobStatus bei async=true
     """
-    # Read CSV content
-    content = await file.read()
-    csv_content = content.decode('utf-8')
-    
-    # Import service
-    service = BankImportService(db)
-    result = service.import_csv(
-        csv_content=csv_content,
-        account_id=account_id,
-        auto_match=auto_match
-    )
+    if run_async:
+        job = await run_in_threadpool(
+            import_job_queue.enqueue, file.file, file.filename, account_id, auto_match
+        )
+        return JSONResponse(status_code=202, content=jsonable_encoder(ImportJobStatus.model_validate(job)))
+    
+    # Stream the spooled upload through the import (decoded and inserted in chunks)
+    def run_import():
+        db = SessionLocal()
+        try:
+            return BankImportService(db).import_file(
+                file.file,
+                account_id=account_id,
+                auto_match=auto_match
+            )
+        finally:
+            db.close()
+
+    # Parsing and dedup are CPU-bound: run them in a worker thread with
+    # their own session, so the event loop keeps serving other requests
+    result = await run_in_threadpool(run_import)
     
     if not result['success']:
         raise HTTPException(400, detail=result)
@@ -120,6 +162,57 @@ async def import_bank_csv(
     return ImportResult(**result)
 
 
+@router.post("/bank/import/batch")
+async def import_bank_csv_batch(
+    files: List[UploadFile] = File(...),
+    account_id: Optional[int] = None,
+    auto_match: bool = True
+):
+    """
+    Importiere mehrere Bank CSVs auf einmal (oder ZIP Archive mit CSVs)
+    
+    Bank und Account werden pro Datei erkannt (wie bei /bank/import), die
+    Dateien parallel geparst und pro Account nacheinander importiert.
+    
+    Args:
+        files: CSV und/oder ZIP Uploads
+        account_id: Optional - ein Account für alle Dateien
+        auto_match: Wenn True, Account pro Datei automatisch finden
+    
+    Returns:
+        Gesamtreport: Totals, Summen pro Account und Resultat pro Datei
+    """
+    uploads = [(file.filename or f"file{index}", await file.read()) for index, file in enumerate(files)]
+    
+    def run_batch():
+        db = SessionLocal()
+        try:
+            return BankImportService(db).import_batch(
+                expand_uploads(uploads), account_id=account_id, auto_match=auto_match
+            )
+        finally:
+            db.close()
+    
+    # Parsing waits on the process pool: keep it off the event loop
+    report = await run_in_threadpool(run_batch)
+    if not report['files_total']:
+        raise HTTPException(400, "No CSV files in upload")
+    
+    return report
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobStatus)
+async def get_import_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Status eines Hintergrund-Imports (Fortschritt, Zähler, Fehler)
+    """
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(404, "Import job not found")
+    
+    return job
+
+
 @router.get("/bank/supported")
 async def get_supported_banks():
     """
@@ -166,19 +259,27 @@ async def get_supported_banks():
                 "encoding": "UTF-8",
                 "date_format": "YYYY-MM-DD",
                 "decimal_separator": "."
+            },
+            {
+                "id": "camt",
+                "name": "ISO 20022 camt.053 / camt.054 (alle Banken)",
+                "format": "XML",
+                "encoding": "UTF-8",
+                "date_format": "YYYY-MM-DD",
+                "decimal_separator": "."
             }
         ]
     }
 
 
 @router.get("/bank/account/{account_id}/info")
-async def get_bank_account_info(account_id: int, db: Session = Depends(get_db)):
+async def get_bank_account_info(account_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Hole Bank Import Info für Account
     """
     from app.models.account import Account
     
-    account = db.query(Account).filter(Account.id == account_id).first()
+    account = await db.get(Account, account_id)
     if not account:
         raise HTTPException(404, "Account not found")
     
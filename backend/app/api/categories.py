@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from io import StringIO
+from datetime import date
+import csv
 from pydantic import BaseModel
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.authorization import get_user_filter
 from app.models.category import Category
-from app.models.user import User
 
 router = APIRouter()
 
+# Rows fetched per server-side cursor round trip and written per CSV chunk
+EXPORT_BATCH_SIZE = 1000
+
 
 class CategoryCreate(BaseModel):
     name: str
@@ -29,7 +37,7 @@ class CategoryResponse(BaseModel):
 
 @router.get("/", response_model=List[CategoryResponse])
 def list_categories(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List categories (system categories + user's own categories, or all if admin)"""
@@ -46,7 +54,7 @@ def list_categories(
 @router.post("/", response_model=CategoryResponse, status_code=201)
 def create_category(
     category: CategoryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create new category (system category if admin, user category otherwise)"""
@@ -61,47 +69,70 @@ def create_category(
     return db_category
 
 
+def _iter_easytax_csv(filters: dict, start_date, end_date):
+    """
+    Yield the EasyTax CSV in chunks of EXPORT_BATCH_SIZE rows
+
+    Uses its own session: the request's session is closed before a
+    streaming response body is sent. Rows are read through a server-side
+    cursor (yield_per), so memory stays flat regardless of the range.
+    """
+    from app.core.database import SessionLocal
+    from app.models.transaction import Transaction
+
+    output = StringIO()
+    writer = csv.writer(output, delimiter=';')
+    writer.writerow(['Datum', 'Betrag', 'Kategorie', 'Beschreibung', 'Belegnummer'])
+    yield output.getvalue()
+
+    db = SessionLocal()
+    try:
+        stmt = select(
+            Transaction.id, Transaction.date, Transaction.amount,
+            Transaction.category, Transaction.description
+        ).filter_by(**filters).where(
+            Transaction.date >= start_date,
+            Transaction.date <= end_date,
+            Transaction.status == "confirmed"
+        ).order_by(Transaction.date, Transaction.id)
+
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            output.seek(0)
+            output.truncate()
+            writer.writerows(
+                [
+                    tx.date.strftime('%d.%m.%Y'),
+                    f"{tx.amount:.2f}",
+                    tx.category or '',
+                    tx.description or '',
+                    f"TX-{tx.id}"
+                ]
+                for tx in rows
+            )
+            yield output.getvalue()
+    finally:
+        db.close()
+
+
 @router.get("/easytax-export")
 def export_easytax(
     year: int,
+    year_to: Optional[int] = None,
     user_filter = Depends(get_user_filter),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Export transactions in EasyTax format (filtered by user unless admin)"""
-    from fastapi.responses import StreamingResponse
-    from io import StringIO
-    import csv
-    from datetime import date
-    from app.models.transaction import Transaction
+    year_to = year_to or year
+    if year_to < year:
+        raise HTTPException(status_code=400, detail="year_to must not be before year")
 
-    # Query transactions for the year
     start_date = date(year, 1, 1)
-    end_date = date(year, 12, 31)
-
-    transactions = db.query(Transaction).filter_by(**user_filter).filter(
-        Transaction.date >= start_date,
-        Transaction.date <= end_date,
-        Transaction.status == "confirmed"
-    ).order_by(Transaction.date).all()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output, delimiter=';')
-    writer.writerow(['Datum', 'Betrag', 'Kategorie', 'Beschreibung', 'Belegnummer'])
-    
-    for tx in transactions:
-        writer.writerow([
-            tx.date.strftime('%d.%m.%Y'),
-            f"{tx.amount:.2f}",
-            tx.category or '',
-            tx.description or '',
-            f"TX-{tx.id}"
-        ])
-    
-    output.seek(0)
+    end_date = date(year_to, 12, 31)
+    filename = f"easytax_{year}.csv" if year_to == year else f"easytax_{year}-{year_to}.csv"
+
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _iter_easytax_csv(user_filter, start_date, end_date),
         media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=easytax_{year}.csv"}
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from decimal import Decimal
 from datetime import date
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 
 router = APIRouter()
@@ -36,7 +36,7 @@ class InvoiceResponse(BaseModel):
 
 
 @router.post("/invoice/send")
-async def send_invoice(invoice: FederatedInvoice, db: Session = Depends(get_db)):
+async def send_invoice(invoice: FederatedInvoice, db: AsyncSession = Depends(get_async_db)):
     """Send invoice to another instance"""
     from app.services.federation_service import send_federated_invoice
     
@@ -48,12 +48,14 @@ async def send_invoice(invoice: FederatedInvoice, db: Session = Depends(get_db))
 
 
 @router.post("/invoice/receive")
-async def receive_invoice(invoice: FederatedInvoice, signature: str, db: Session = Depends(get_db)):
+async def receive_invoice(invoice: FederatedInvoice, signature: str, db: AsyncSession = Depends(get_async_db)):
     """Receive invoice from another instance"""
     from app.services.federation_service import verify_and_store_invoice
     from app.models.transaction import Transaction
+    from app.services.receipt_storage import ReceiptStorage
+    from fastapi.concurrency import run_in_threadpool
+    from io import BytesIO
     import base64
-    from pathlib import Path
     
     if not settings.FEDERATION_ENABLED:
         raise HTTPException(status_code=403, detail="Federation not enabled")
@@ -77,20 +79,19 @@ async def receive_invoice(invoice: FederatedInvoice, signature: str, db: Session
     
     # Save attachments if any
     if invoice.attachments:
-        receipts_dir = Path(settings.RECEIPTS_PATH) / "federated"
-        receipts_dir.mkdir(parents=True, exist_ok=True)
-        
         for attachment in invoice.attachments:
             file_data = base64.b64decode(attachment.data)
-            file_path = receipts_dir / attachment.filename
-            with open(file_path, "wb") as f:
-                f.write(file_data)
+            storage = ReceiptStorage()
+            tmp_path, target = await run_in_threadpool(storage.spool, BytesIO(file_data))
+            # Lock the stored file until the reference is committed
+            await db.execute(ReceiptStorage.lock_statement(target))
+            file_path = await run_in_threadpool(storage.place, tmp_path, target)
             db_transaction.receipt_path = str(file_path)
             break  # Only use first attachment for now
     
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    await db.refresh(db_transaction)
     
     return InvoiceResponse(
         invoice_id=db_transaction.id,
@@ -100,16 +101,16 @@ async def receive_invoice(invoice: FederatedInvoice, signature: str, db: Session
 
 
 @router.post("/invoice/{invoice_id}/accept")
-async def accept_invoice(invoice_id: int, db: Session = Depends(get_db)):
+async def accept_invoice(invoice_id: int, db: AsyncSession = Depends(get_async_db)):
     """Accept received invoice"""
     from app.models.transaction import Transaction
     
-    transaction = db.query(Transaction).filter(Transaction.id == invoice_id).first()
+    transaction = await db.get(Transaction, invoice_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     transaction.status = "confirmed"
-    db.commit()
+    await db.commit()
     
     # TODO: Send confirmation back to sender instance
     
@@ -117,17 +118,17 @@ async def accept_invoice(invoice_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/invoice/{invoice_id}/reject")
-async def reject_invoice(invoice_id: int, reason: str, db: Session = Depends(get_db)):
+async def reject_invoice(invoice_id: int, reason: str, db: AsyncSession = Depends(get_async_db)):
     """Reject received invoice"""
     from app.models.transaction import Transaction
     
-    transaction = db.query(Transaction).filter(Transaction.id == invoice_id).first()
+    transaction = await db.get(Transaction, invoice_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     # Delete transaction
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
     
     # TODO: Send rejection back to sender instance
     
@@ -137,12 +138,11 @@ async def reject_invoice(invoice_id: int, reason: str, db: Session = Depends(get
 @router.get("/instances/{domain}")
 async def get_instance_info(domain: str):
     """Fetch public key and info from another instance"""
-    import httpx
-    
+    from app.core.http_client import get_http_client
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://{domain}/.well-known/money-instance")
-            response.raise_for_status()
-            return response.json()
+        response = await get_http_client().get(f"https://{domain}/.well-known/money-instance")
+        response.raise_for_status()
+        return response.json()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not reach instance: {str(e)}")
@@ -2,17 +2,16 @@
 Bank Reconciliation API Endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from pydantic import BaseModel
-import io
-import pandas as pd
-import chardet
+from fastapi.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core.database import get_async_db, SessionLocal
 from app.services.reconciliation_service import ReconciliationService
 from app.models.reconciliation import BankReconciliation
 from app.services.bank_import_service import BankImportService
@@ -57,137 +56,167 @@ async def create_reconciliation(
     period_start: str = Form(...),
     period_end: str = Form(...),
     bank_balance: Optional[float] = Form(None),
-    db: Session = Depends(get_db)
+    assignment: str = Form("greedy"),
+    balance_windows: bool = Form(True)
 ):
     """
     Create a new bank reconciliation by uploading a CSV bank statement
 
-    - Upload CSV file with bank transactions
+    - Upload CSV file with bank transactions (PostFinance, UBS, Raiffeisen,
+      ZKB, camt XML, or any CSV with recognizable Date/Amount columns)
     - Specify account and time period
     - Optionally provide bank balance for verification
     - System will automatically match transactions
+    - assignment=optimal maximizes the total match confidence instead of
+      matching greedily in statement order; the response then reports
+      which rows differ from the greedy result
+    - If the statement has a running balance (e.g. PostFinance Saldo),
+      only the date windows where it diverges from the app's running
+      balance are matched (balance_windows=false matches everything);
+      balance_report lists the divergent windows
     """
-    # Read CSV file
+    if assignment not in ("greedy", "optimal"):
+        raise HTTPException(status_code=400, detail="assignment must be 'greedy' or 'optimal'")
+
+    # Parse the statement off the event loop (parsing needs no session)
     content = await file.read()
+    parsed = await run_in_threadpool(BankImportService(None).parse_statement, content)
+    if not parsed['success']:
+        raise HTTPException(status_code=400, detail=parsed['error'])
+
+    bank_transactions = [
+        {
+            'date': row['date'],
+            'amount': row['amount'],
+            'description': row['description'],
+            'reference': row.get('reference') or '',
+            'balance': row.get('balance')
+        }
+        for row in parsed['transactions']
+    ]
 
-    # Detect encoding
-    detected = chardet.detect(content)
-    encoding = detected['encoding'] if detected['encoding'] else 'utf-8'
+    if not bank_transactions:
+        raise HTTPException(
+            status_code=400,
+            detail="No valid transactions found in CSV"
+        )
 
-    # Parse CSV
+    def create():
+        db = SessionLocal()
+        try:
+            reconciliation = ReconciliationService(db).create_reconciliation(
+                account_id=account_id,
+                period_start=datetime.fromisoformat(period_start),
+                period_end=datetime.fromisoformat(period_end),
+                bank_transactions=bank_transactions,
+                bank_balance=Decimal(str(bank_balance)) if bank_balance else None,
+                assignment=assignment,
+                balance_windows=balance_windows
+            )
+            return {
+                "id": reconciliation.id,
+                "message": "Reconciliation created successfully",
+                "bank_format": parsed['bank'],
+                "matched_count": reconciliation.matched_count,
+                "unmatched_bank_count": reconciliation.unmatched_bank_count,
+                "unmatched_app_count": reconciliation.unmatched_app_count,
+                "assignment_mode": reconciliation.assignment_mode,
+                "assignment_report": reconciliation.assignment_report,
+                "balance_report": reconciliation.balance_report
+            }
+        finally:
+            db.close()
+
+    # Matching is CPU-bound: worker thread with its own session, so the
+    # event loop keeps serving other requests
     try:
-        df = pd.read_csv(io.BytesIO(content), encoding=encoding, sep=None, engine='python')
+        return await run_in_threadpool(create)
+
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error parsing CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating reconciliation: {str(e)}")
 
-    # Use BankImportService to parse bank transactions
-    import_service = BankImportService(db)
 
-    # Detect bank format and parse
-    bank_transactions = []
-    try:
-        # Try to parse using existing bank parsers
-        parsed_data = import_service._parse_csv_by_bank(df, None)  # Will auto-detect
+@router.post("/reconciliation/{reconciliation_id}/refresh")
+async def refresh_reconciliation(
+    reconciliation_id: int,
+    file: Optional[UploadFile] = File(None),
+    period_start: Optional[str] = Form(None),
+    period_end: Optional[str] = Form(None),
+    bank_balance: Optional[float] = Form(None)
+):
+    """
+    Extend/refresh a reconciliation with new statement rows and app changes
 
-        for row in parsed_data:
-            bank_transactions.append({
+    - Optionally upload the statement again (or just the new part); rows
+      already in the reconciliation are skipped
+    - period_start / period_end can only widen the period
+    - Resolved matches are kept; only open bank rows and transactions
+      created or updated since the last run are rescored
+    """
+    bank_transactions = []
+    parsed = None
+    if file is not None:
+        content = await file.read()
+        parsed = await run_in_threadpool(BankImportService(None).parse_statement, content)
+        if not parsed['success']:
+            raise HTTPException(status_code=400, detail=parsed['error'])
+        bank_transactions = [
+            {
                 'date': row['date'],
                 'amount': row['amount'],
                 'description': row['description'],
-                'reference': row.get('reference', '')
-            })
-
-    except Exception as e:
-        # Fallback: Try generic parsing
-        # Assume columns: Date, Description, Amount
-        if len(df.columns) < 3:
-            raise HTTPException(
-                status_code=400,
-                detail="CSV must have at least 3 columns (Date, Description, Amount)"
+                'reference': row.get('reference') or ''
+            }
+            for row in parsed['transactions']
+        ]
+
+    def refresh():
+        db = SessionLocal()
+        try:
+            service = ReconciliationService(db)
+            reconciliation = service.refresh_reconciliation(
+                reconciliation_id,
+                bank_transactions=bank_transactions,
+                period_start=datetime.fromisoformat(period_start) if period_start else None,
+                period_end=datetime.fromisoformat(period_end) if period_end else None,
+                bank_balance=Decimal(str(bank_balance)) if bank_balance is not None else None
             )
-
-        # Try to identify columns
-        date_col = None
-        amount_col = None
-        desc_col = None
-
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(x in col_lower for x in ['date', 'datum', 'valuta']):
-                date_col = col
-            elif any(x in col_lower for x in ['amount', 'betrag', 'credit', 'debit', 'saldo']):
-                amount_col = col
-            elif any(x in col_lower for x in ['description', 'beschreibung', 'text', 'avisierung']):
-                desc_col = col
-
-        if not (date_col and amount_col):
-            raise HTTPException(
-                status_code=400,
-                detail="Could not identify Date and Amount columns in CSV"
-            )
-
-        for _, row in df.iterrows():
-            try:
-                # Parse date
-                date_val = pd.to_datetime(row[date_col], dayfirst=True)
-
-                # Parse amount (handle both credit/debit or single amount column)
-                amount_val = float(row[amount_col]) if pd.notna(row[amount_col]) else 0.0
-
-                # Get description
-                desc_val = str(row[desc_col]) if desc_col and pd.notna(row[desc_col]) else ""
-
-                bank_transactions.append({
-                    'date': date_val,
-                    'amount': amount_val,
-                    'description': desc_val,
-                    'reference': ''
-                })
-            except Exception:
-                continue  # Skip rows that can't be parsed
-
-    if not bank_transactions:
-        raise HTTPException(
-            status_code=400,
-            detail="No valid transactions found in CSV"
-        )
-
-    # Create reconciliation
-    service = ReconciliationService(db)
-
+            return {
+                "id": reconciliation.id,
+                "message": "Reconciliation refreshed successfully",
+                "bank_format": parsed['bank'] if parsed else None,
+                "matched_count": reconciliation.matched_count,
+                "unmatched_bank_count": reconciliation.unmatched_bank_count,
+                "unmatched_app_count": reconciliation.unmatched_app_count,
+                "total_bank_transactions": reconciliation.total_bank_transactions,
+                "refresh": service.refresh_report,
+                "assignment_mode": reconciliation.assignment_mode,
+                "assignment_report": reconciliation.assignment_report
+            }
+        finally:
+            db.close()
+
+    # Rescoring is CPU-bound: worker thread with its own session
     try:
-        reconciliation = service.create_reconciliation(
-            account_id=account_id,
-            period_start=datetime.fromisoformat(period_start),
-            period_end=datetime.fromisoformat(period_end),
-            bank_transactions=bank_transactions,
-            bank_balance=Decimal(str(bank_balance)) if bank_balance else None
-        )
-
-        return {
-            "id": reconciliation.id,
-            "message": "Reconciliation created successfully",
-            "matched_count": reconciliation.matched_count,
-            "unmatched_bank_count": reconciliation.unmatched_bank_count,
-            "unmatched_app_count": reconciliation.unmatched_app_count
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error creating reconciliation: {str(e)}")
+        return await run_in_threadpool(refresh)
+    except ValueError as e:
+        status_code = 404 if "not found" in str(e) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
 
 
 @router.get("/reconciliation", response_model=List[ReconciliationSummary])
 async def list_reconciliations(
     account_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of all reconciliations, optionally filtered by account"""
-    query = db.query(BankReconciliation)
+    query = select(BankReconciliation)
 
     if account_id:
-        query = query.filter(BankReconciliation.account_id == account_id)
+        query = query.where(BankReconciliation.account_id == account_id)
 
-    reconciliations = query.order_by(BankReconciliation.created_at.desc()).all()
+    result = await db.execute(query.order_by(BankReconciliation.created_at.desc()))
+    reconciliations = result.scalars().all()
 
     return [
         ReconciliationSummary(
@@ -208,13 +237,32 @@ async def list_reconciliations(
 @router.get("/reconciliation/{reconciliation_id}")
 async def get_reconciliation(
     reconciliation_id: int,
-    db: Session = Depends(get_db)
+    status: Optional[str] = Query(None, pattern="^(matched|unmatched_bank|unmatched_app|balanced|pending)$"),
+    min_confidence: Optional[int] = Query(None, ge=0, le=100),
+    max_confidence: Optional[int] = Query(None, ge=0, le=100),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get detailed reconciliation with all matches"""
-    service = ReconciliationService(db)
+    """
+    Get detailed reconciliation with one page of its matches
 
+    - status: only matched, unmatched_bank, unmatched_app, balanced or pending matches
+    - min_confidence / max_confidence: confidence range (0-100)
+    - skip / limit: paging, matches ordered by id; matches_total counts
+      all matches passing the filters
+    """
     try:
-        data = service.get_reconciliation_with_matches(reconciliation_id)
+        data = await db.run_sync(
+            lambda session: ReconciliationService(session).get_reconciliation_with_matches(
+                reconciliation_id,
+                status=status,
+                min_confidence=min_confidence,
+                max_confidence=max_confidence,
+                skip=skip,
+                limit=limit
+            )
+        )
         return data
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -225,7 +273,7 @@ async def resolve_match(
     reconciliation_id: int,
     match_id: int,
     resolve_data: MatchResolve,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Resolve a reconciliation match with user action
@@ -236,14 +284,14 @@ async def resolve_match(
     - create_transaction: Create new transaction from bank data
     - link_existing: Link to a different existing transaction
     """
-    service = ReconciliationService(db)
-
     try:
-        match = service.resolve_match(
-            match_id=match_id,
-            action=resolve_data.action,
-            transaction_data=resolve_data.transaction_data,
-            notes=resolve_data.notes
+        match = await db.run_sync(
+            lambda session: ReconciliationService(session).resolve_match(
+                match_id=match_id,
+                action=resolve_data.action,
+                transaction_data=resolve_data.transaction_data,
+                notes=resolve_data.notes
+            )
         )
 
         return {
@@ -262,13 +310,13 @@ async def resolve_match(
 @router.post("/reconciliation/{reconciliation_id}/complete")
 async def complete_reconciliation(
     reconciliation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark reconciliation as completed"""
-    service = ReconciliationService(db)
-
     try:
-        reconciliation = service.complete_reconciliation(reconciliation_id)
+        reconciliation = await db.run_sync(
+            lambda session: ReconciliationService(session).complete_reconciliation(reconciliation_id)
+        )
 
         return {
             "message": "Reconciliation completed",
@@ -284,17 +332,15 @@ async def complete_reconciliation(
 @router.delete("/reconciliation/{reconciliation_id}")
 async def delete_reconciliation(
     reconciliation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a reconciliation session"""
-    reconciliation = db.query(BankReconciliation).filter(
-        BankReconciliation.id == reconciliation_id
-    ).first()
+    reconciliation = await db.get(BankReconciliation, reconciliation_id)
 
     if not reconciliation:
         raise HTTPException(status_code=404, detail="Reconciliation not found")
 
-    db.delete(reconciliation)
-    db.commit()
+    await db.delete(reconciliation)
+    await db.commit()
 
     return {"message": "Reconciliation deleted successfully"}
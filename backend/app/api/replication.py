@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.config import settings
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.security import get_current_principal
+from app.core.principal_cache import Principal
 from app.models.replication import MirrorInstance, SyncLog, ConflictResolution
-from app.services.replication_service import ReplicationService
+from app.services.replication_service import ReplicationService, ChangeLogGapError
 from app.federation.crypto import verify_signature, sign_data, get_public_key_pem
 
 router = APIRouter()
@@ -70,7 +72,7 @@ class ConflictResolutionUpdate(BaseModel):
 def create_mirror_instance(
     mirror: MirrorInstanceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Create a new mirror instance configuration
@@ -100,7 +102,7 @@ def create_mirror_instance(
 @router.get("/mirrors", response_model=List[MirrorInstanceResponse])
 def list_mirror_instances(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """List all mirror instances"""
     mirrors = db.query(MirrorInstance).all()
@@ -111,7 +113,7 @@ def list_mirror_instances(
 def get_mirror_instance(
     mirror_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get mirror instance by ID"""
     mirror = db.query(MirrorInstance).filter(MirrorInstance.id == mirror_id).first()
@@ -125,7 +127,7 @@ def update_mirror_instance(
     mirror_id: int,
     update: MirrorInstanceUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Update mirror instance configuration"""
     mirror = db.query(MirrorInstance).filter(MirrorInstance.id == mirror_id).first()
@@ -145,7 +147,7 @@ def update_mirror_instance(
 def delete_mirror_instance(
     mirror_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete mirror instance"""
     mirror = db.query(MirrorInstance).filter(MirrorInstance.id == mirror_id).first()
@@ -160,11 +162,11 @@ def delete_mirror_instance(
 @router.post("/mirrors/{mirror_id}/sync")
 async def trigger_sync(
     mirror_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Manually trigger sync with specific mirror instance"""
-    mirror = db.query(MirrorInstance).filter(MirrorInstance.id == mirror_id).first()
+    mirror = await db.get(MirrorInstance, mirror_id)
     if not mirror:
         raise HTTPException(status_code=404, detail="Mirror instance not found")
 
@@ -176,8 +178,8 @@ async def trigger_sync(
 
 @router.post("/sync-all")
 async def trigger_sync_all(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Manually trigger sync with all mirror instances"""
     service = ReplicationService(db)
@@ -192,7 +194,7 @@ def get_mirror_logs(
     mirror_id: int,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get sync logs for specific mirror instance"""
     logs = db.query(SyncLog).filter(
@@ -206,7 +208,7 @@ def get_mirror_logs(
 def get_conflict_logs(
     limit: int = 50,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get all conflict logs requiring manual resolution"""
     logs = db.query(SyncLog).filter(
@@ -221,7 +223,7 @@ def get_conflict_logs(
 def get_conflict_resolution(
     entity_type: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get conflict resolution strategy for entity type"""
     resolution = db.query(ConflictResolution).filter(
@@ -243,7 +245,7 @@ def update_conflict_resolution(
     entity_type: str,
     update: ConflictResolutionUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Update conflict resolution strategy"""
     resolution = db.query(ConflictResolution).filter(
@@ -270,7 +272,7 @@ async def receive_sync_data(
     data: Dict[str, Any],
     x_signature: str = Header(..., alias="X-Signature"),
     x_instance: str = Header(..., alias="X-Instance"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Receive sync data from another mirror instance
@@ -278,9 +280,10 @@ async def receive_sync_data(
     This endpoint is called by other instances to push data to us
     """
     # Get mirror instance
-    mirror = db.query(MirrorInstance).filter(
-        MirrorInstance.instance_id == x_instance
-    ).first()
+    result = await db.execute(
+        select(MirrorInstance).where(MirrorInstance.instance_id == x_instance)
+    )
+    mirror = result.scalars().first()
 
     if not mirror:
         raise HTTPException(
@@ -308,34 +311,63 @@ async def receive_sync_data(
 
 @router.get("/changes")
 async def get_changes(
-    since: datetime,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    x_instance: Optional[str] = Header(None, alias="X-Instance"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get changes since timestamp for mirror to pull
+    Get changes for mirror to pull
+
+    With a cursor (empty = from the start), returns the next batch of the
+    change log plus the new cursor and has_more; changes that came from
+    the requesting instance are left out. ``since`` is the updated_at scan
+    still used by instances without a change log.
 
     This endpoint is called by other instances to pull data from us
     """
     # Note: In production, you should verify the requester is a known mirror instance
-
-    # Get transactions
-    transactions = db.query(Transaction).filter(
-        Transaction.updated_at > since
-    ).all()
-
-    # Get accounts
-    accounts = db.query(Account).filter(
-        Account.updated_at > since
-    ).all()
-
-    # Serialize
     service = ReplicationService(db)
-    payload = {
-        "transactions": [service._serialize_transaction(tx) for tx in transactions],
-        "accounts": [service._serialize_account(acc) for acc in accounts],
-        "timestamp": datetime.utcnow().isoformat(),
-        "source_instance": settings.INSTANCE_DOMAIN,
-    }
+
+    if cursor is not None:
+        try:
+            changes = await service.collect_changes(cursor, exclude_origin=x_instance)
+        except ChangeLogGapError as e:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=str(e)
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        payload = {
+            **changes,
+            "timestamp": datetime.utcnow().isoformat(),
+            "source_instance": settings.INSTANCE_DOMAIN,
+        }
+    elif since is not None:
+        # Get transactions
+        result = await db.execute(select(Transaction).where(Transaction.updated_at > since))
+        transactions = result.scalars().all()
+
+        # Get accounts
+        result = await db.execute(select(Account).where(Account.updated_at > since))
+        accounts = result.scalars().all()
+
+        # Serialize
+        payload = {
+            "transactions": [service._serialize_transaction(tx) for tx in transactions],
+            "accounts": [service._serialize_account(acc) for acc in accounts],
+            "timestamp": datetime.utcnow().isoformat(),
+            "source_instance": settings.INSTANCE_DOMAIN,
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor or since is required"
+        )
 
     # Sign response
     from fastapi.responses import JSONResponse
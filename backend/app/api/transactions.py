@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Response
+from sqlalchemy import tuple_, func, or_, literal
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from decimal import Decimal
 from datetime import date
 import os
-from pathlib import Path
 from app.core.database import get_db
-from app.core.config import settings
-from app.core.security import get_current_user
+from app.core.security import get_current_principal
+from app.core.principal_cache import Principal
 from app.core.authorization import get_user_filter, verify_transaction_access, verify_account_access
+from app.core.pagination import encode_cursor, decode_cursor, estimate_count
 from app.models.transaction import Transaction
-from app.models.user import User
+from app.services.bulk_transaction_service import BulkTransactionService
+from app.services.receipt_storage import ReceiptStorage
 
 router = APIRouter()
 
@@ -51,17 +53,61 @@ class TransactionResponse(BaseModel):
         from_attributes = True
 
 
+MAX_BULK_ITEMS = 10000
+
+
+class BulkTransactionUpdate(TransactionUpdate):
+    id: int
+
+
+class BulkTransactionRequest(BaseModel):
+    create: List[TransactionCreate] = []
+    update: List[BulkTransactionUpdate] = []
+    delete: List[int] = []
+
+
+class BulkItemResult(BaseModel):
+    op: str  # create, update, delete
+    index: int  # Position within the request's create/update/delete list
+    id: Optional[int]
+    status: str  # created, updated, deleted, failed
+    error: Optional[str]
+
+
+class TransactionSearchResult(TransactionResponse):
+    rank: Optional[float] = None  # Relevance, only set for text queries
+
+
+class BulkTransactionResponse(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 @router.get("/", response_model=List[TransactionResponse])
 def list_transactions(
+    response: Response,
     account_id: Optional[int] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = False,
     user_filter = Depends(get_user_filter),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """List transactions with optional filters (user-filtered unless admin)"""
+    """
+    List transactions with optional filters (user-filtered unless admin)
+
+    Ordered by (date, id) descending. Pass the X-Next-Cursor header of a
+    response as `cursor` to fetch the next page; every page costs the same
+    regardless of depth. `skip` is still honoured when no cursor is given.
+    With include_total=true, X-Total-Estimate carries the planner's row
+    estimate for the filtered set.
+    """
     query = db.query(Transaction).filter_by(**user_filter)
 
     if account_id:
@@ -69,10 +115,99 @@ def list_transactions(
     if status:
         query = query.filter(Transaction.status == status)
 
-    transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
+    if include_total:
+        total = estimate_count(db, query)
+        if total is not None:
+            response.headers["X-Total-Estimate"] = str(total)
+
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id))
+
+    query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether another page exists
+    transactions = query.limit(limit + 1).all()
+
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+
     return transactions
 
 
+@router.get("/search", response_model=List[TransactionSearchResult])
+def search_transactions(
+    q: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 50,
+    user_filter = Depends(get_user_filter),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Search transactions by description text, amount, date and category
+
+    Text queries match whole words via the full-text index (websearch
+    syntax: "quoted phrases", -exclusions, or) and fuzzy/partial words via
+    the trigram index, so typos like "migro" still find "MIGROS".
+    Results are ranked by relevance, then newest first.
+    """
+    query = db.query(Transaction).filter_by(**user_filter)
+
+    if account_id:
+        query = query.filter(Transaction.account_id == account_id)
+    if category:
+        query = query.filter(Transaction.category == category)
+    if min_amount is not None:
+        query = query.filter(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Transaction.amount <= max_amount)
+    if date_from:
+        query = query.filter(Transaction.date >= date_from)
+    if date_to:
+        query = query.filter(Transaction.date <= date_to)
+
+    if not q or not q.strip():
+        rows = query.order_by(
+            Transaction.date.desc(), Transaction.id.desc()
+        ).offset(skip).limit(limit).all()
+        return rows
+
+    q = q.strip()
+    ts_query = func.websearch_to_tsquery("simple", q)
+    rank = (
+        func.ts_rank(Transaction.search_vector, ts_query)
+        + func.word_similarity(q, func.coalesce(Transaction.description, ""))
+    ).label("rank")
+
+    rows = query.add_columns(rank).filter(
+        or_(
+            Transaction.search_vector.op("@@")(ts_query),
+            # word_similarity(q, description) above pg_trgm's threshold, uses the trigram index
+            literal(q).op("<%")(Transaction.description),
+        )
+    ).order_by(
+        rank.desc(), Transaction.date.desc(), Transaction.id.desc()
+    ).offset(skip).limit(limit).all()
+
+    results = []
+    for transaction, score in rows:
+        result = TransactionSearchResult.model_validate(transaction)
+        result.rank = round(float(score), 4)
+        results.append(result)
+    return results
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction: Transaction = Depends(verify_transaction_access)
@@ -84,7 +219,7 @@ def get_transaction(
 @router.post("/", response_model=TransactionResponse, status_code=201)
 def create_transaction(
     transaction: TransactionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create new transaction"""
@@ -98,6 +233,34 @@ def create_transaction(
     return db_transaction
 
 
+@router.post("/bulk", response_model=BulkTransactionResponse)
+def bulk_transactions(
+    request: BulkTransactionRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Create, update and delete many transactions in one request
+
+    All changes are written in a single database transaction with batched
+    statements. Items the user may not access are reported as failed and
+    skipped; everything else is applied.
+    """
+    total = len(request.create) + len(request.update) + len(request.delete)
+    if total > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items ({total}), maximum is {MAX_BULK_ITEMS} per request"
+        )
+
+    service = BulkTransactionService(db, current_user)
+    return service.apply(
+        create=[item.model_dump() for item in request.create],
+        update_items=[item.model_dump(exclude_unset=True) for item in request.update],
+        delete_ids=request.delete
+    )
+
+
 @router.put("/{transaction_id}", response_model=TransactionResponse)
 def update_transaction(
     transaction: TransactionUpdate,
@@ -120,54 +283,50 @@ def delete_transaction(
     db: Session = Depends(get_db)
 ):
     """Delete transaction (with access verification)"""
-    # Delete receipt file if exists
-    if db_transaction.receipt_path and os.path.exists(db_transaction.receipt_path):
-        os.remove(db_transaction.receipt_path)
+    receipt_path = db_transaction.receipt_path
 
     db.delete(db_transaction)
     db.commit()
+
+    # Delete receipt file unless another transaction shares it
+    ReceiptStorage().release(db, receipt_path)
     return None
 
 
 @router.post("/{transaction_id}/receipt")
-async def upload_receipt(
+def upload_receipt(
     file: UploadFile = File(...),
     transaction: Transaction = Depends(verify_transaction_access),
     db: Session = Depends(get_db)
 ):
     """Upload receipt for transaction (with access verification)"""
-    # Create receipts directory structure
-    year = transaction.date.year
-    month = transaction.date.month
-    receipts_dir = Path(settings.RECEIPTS_PATH) / str(year) / f"{month:02d}"
-    receipts_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save file
-    file_extension = Path(file.filename).suffix
-    file_path = receipts_dir / f"transaction_{transaction.id}{file_extension}"
+    storage = ReceiptStorage()
 
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Sync endpoint (runs in the threadpool): hash and write in chunks;
+    # identical content is stored once. The file's lock is held until commit.
+    file_path = storage.store_fileobj(file.file, db=db)
 
     # Update transaction
+    previous_path = transaction.receipt_path
     transaction.receipt_path = str(file_path)
     db.commit()
 
+    if previous_path and previous_path != str(file_path):
+        storage.release(db, previous_path)
+
     return {"message": "Receipt uploaded successfully", "path": str(file_path)}
 
 
 @router.get("/{transaction_id}/receipt")
 async def get_receipt(
+    request: Request,
     transaction: Transaction = Depends(verify_transaction_access)
 ):
-    """Get receipt for transaction (with access verification)"""
-    from fastapi.responses import FileResponse
-
+    """Get receipt for transaction (with access verification, ETag and Range support)"""
     if not transaction.receipt_path:
         raise HTTPException(status_code=404, detail="Receipt not found")
 
     if not os.path.exists(transaction.receipt_path):
         raise HTTPException(status_code=404, detail="Receipt file not found")
 
-    return FileResponse(transaction.receipt_path)
+    return ReceiptStorage().response(transaction.receipt_path, request)
@@ -3,20 +3,20 @@
 from typing import Dict, Any
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.security import get_current_user
+from app.core.security import get_current_principal
 from app.core.database import get_db
-from app.models.user import User
+from app.core.principal_cache import Principal
 from app.models.account import Account
 from app.models.transaction import Transaction
 from app.models.category import Category
 
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_admin_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Requires admin privileges (is_superuser=True)
 
     Args:
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Returns:
         Current user if they are an admin
@@ -32,13 +32,13 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
     return current_user
 
 
-def get_user_filter(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+def get_user_filter(current_user: Principal = Depends(get_current_principal)) -> Dict[str, Any]:
     """
     Returns filter dictionary for data isolation.
     Admins see all data, regular users see only their own data.
 
     Args:
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Returns:
         Dictionary to be used in SQLAlchemy filter_by()
@@ -49,14 +49,14 @@ def get_user_filter(current_user: User = Depends(get_current_user)) -> Dict[str,
     return {"user_id": current_user.id}
 
 
-def verify_resource_access(resource_user_id: int, current_user: User = Depends(get_current_user)) -> None:
+def verify_resource_access(resource_user_id: int, current_user: Principal = Depends(get_current_principal)) -> None:
     """
     Verify that the current user has access to a resource.
     Admins can access all resources, regular users can only access their own.
 
     Args:
         resource_user_id: The user_id of the resource being accessed
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Raises:
         HTTPException: If user doesn't have access to the resource
@@ -71,7 +71,7 @@ def verify_resource_access(resource_user_id: int, current_user: User = Depends(g
 def verify_account_access(
     account_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Account:
     """
     Verify that the current user has access to a specific account and return it.
@@ -79,7 +79,7 @@ def verify_account_access(
     Args:
         account_id: ID of the account to check
         db: Database session
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Returns:
         The account if access is granted
@@ -101,7 +101,7 @@ def verify_account_access(
 def verify_transaction_access(
     transaction_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Transaction:
     """
     Verify that the current user has access to a specific transaction and return it.
@@ -109,7 +109,7 @@ def verify_transaction_access(
     Args:
         transaction_id: ID of the transaction to check
         db: Database session
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Returns:
         The transaction if access is granted
@@ -131,7 +131,7 @@ def verify_transaction_access(
 def verify_category_access(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Category:
     """
     Verify that the current user has access to a specific category and return it.
@@ -140,7 +140,7 @@ def verify_category_access(
     Args:
         category_id: ID of the category to check
         db: Database session
-        current_user: Current authenticated user
+        current_user: Current authenticated principal
 
     Returns:
         The category if access is granted
@@ -5,12 +5,20 @@ from typing import List
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql://money:changeme@db:5432/money"
+    DB_POOL_SIZE: int = 5  # Persistent connections per engine (sync and async each)
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst load
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Reconnect connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True  # Detect stale connections (e.g. after failover) before use
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Postgres statement_timeout, 0 = disabled
     
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ENCRYPTION_KEY: str = ""  # Fernet key for TOTP secret encryption (generate with: Fernet.generate_key())
+    AUTH_CACHE_TTL_SECONDS: int = 60  # How long an authenticated principal is cached per worker
+    AUTH_CACHE_MAX_SIZE: int = 10000  # Cached (user, token) entries per worker, 0 = disabled
 
     # OAuth2/OIDC (Authentik, Keycloak, etc.)
     OAUTH_ENABLED: bool = False
@@ -31,10 +39,31 @@ class Settings(BaseSettings):
     FEDERATION_ENABLED: bool = False
     INSTANCE_PRIVATE_KEY_PATH: str = "/app/secrets/instance_key.pem"
 
+    # Outgoing HTTP to other instances (one pooled client for federation and replication)
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 30.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20  # Pooled connections across all peers
+    HTTP_CLIENT_KEEPALIVE_SECONDS: float = 60.0  # Idle connections are closed after this
+    HTTP_CLIENT_HTTP2: bool = True  # Negotiate HTTP/2 where the peer supports it
+
     # Mirror Instances / Replication
     REPLICATION_ENABLED: bool = False
     REPLICATION_SYNC_INTERVAL_MINUTES: int = 5  # Sync every 5 minutes
     REPLICATION_CONFLICT_STRATEGY: str = "last_write_wins"  # last_write_wins, primary_wins, manual
+    REPLICATION_MAX_CONCURRENT_SYNCS: int = 4  # Mirrors synced at once, each with its own DB connection
+    REPLICATION_BATCH_SIZE: int = 1000  # Change log entries per push request / pull response
+    REPLICATION_CHANGE_LOG_RETENTION_DAYS: int = 30  # Prune older change log entries (0 = keep forever)
+
+    # Bank Import
+    IMPORT_BATCH_SIZE: int = 1000  # Rows per INSERT batch when importing bank statements
+    IMPORT_MAX_RECORD_BYTES: int = 65536  # A quoted CSV field still open after this many bytes is a stray quote: split row-wise
+    IMPORT_WORKERS: int = 2  # Background import jobs running at once (per process)
+    IMPORT_JOB_MAX_ATTEMPTS: int = 3  # A job interrupted this often (e.g. crashing the worker) is failed, not resumed
+    IMPORT_JOBS_PATH: str = "/app/import_jobs"  # Uploads of queued/running import jobs
+    BATCH_IMPORT_PROCESSES: int = 0  # Parser processes for batch imports (0 = one per CPU, 1 = no pool)
+    IMPORT_FUZZY_DUPLICATE_THRESHOLD: float = 0.0  # Same date/amount + description similarity >= this is a duplicate (0 = exact only)
+
+    # Description similarity (reconciliation matching, import duplicate check)
+    SIMILARITY_METHOD: str = "difflib"  # difflib (scoring as before), trigram, token_set (faster, opt-in)
 
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
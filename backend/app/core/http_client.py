@@ -0,0 +1,50 @@
+"""Shared HTTP client for calls to other instances (replication, federation)"""
+
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the h2 package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Long-lived pooled client, created on first use
+
+    Connections are kept alive between requests and syncs instead of a
+    new TCP/TLS handshake per call. HTTP/2 is negotiated via ALPN, peers
+    without it are spoken to over HTTP/1.1.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = settings.HTTP_CLIENT_HTTP2 and _http2_available()
+        if settings.HTTP_CLIENT_HTTP2 and not http2:
+            print("[HTTP Client] h2 not installed, using HTTP/1.1")
+
+        _client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_SECONDS,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close pooled connections (app shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -6,6 +6,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.principal_cache import Principal, principal_cache
 from app.models.user import User
 
 # Bearer token scheme
@@ -60,6 +61,41 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+def _get_token_user_id(token: str) -> int:
+    """Validate the JWT and return its subject as user id"""
+    payload = decode_access_token(token)
+
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return int(user_id)
+
+
+def _load_user(db: Session, user_id: int, token: str) -> User:
+    """Load an active user and refresh its cached principal"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    principal_cache.set(token, Principal.from_user(user))
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    return user
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -67,6 +103,9 @@ def get_current_user(
     """
     Get current authenticated user from JWT token
 
+    Use this when the endpoint needs the full User row (profile, 2FA).
+    Authorization-only endpoints should use get_current_principal.
+
     Args:
         credentials: HTTP Authorization credentials with Bearer token
         db: Database session
@@ -78,31 +117,44 @@ def get_current_user(
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
-    payload = decode_access_token(token)
+    user_id = _get_token_user_id(token)
+    return _load_user(db, user_id, token)
 
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Get the current principal (id, is_active, is_superuser) from JWT token
 
-    if not user.is_active:
+    Served from the principal cache; only a cache miss queries the users
+    table. Entries are invalidated when the user is updated or deleted.
+
+    Args:
+        credentials: HTTP Authorization credentials with Bearer token
+        db: Database session
+
+    Returns:
+        Current authenticated principal
+
+    Raises:
+        HTTPException: If token is invalid, user not found or inactive
+    """
+    token = credentials.credentials
+    user_id = _get_token_user_id(token)
+
+    principal = principal_cache.get(user_id, token)
+    if principal is None:
+        return Principal.from_user(_load_user(db, user_id, token))
+
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
 
-    return user
+    return principal
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
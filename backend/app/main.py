@@ -1,8 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import accounts, transactions, categories, federation, shared_accounts, settings_api, bank_import, auth, replication, reconciliation, two_factor
-from app.core.database import engine, SessionLocal
+from app.core.database import engine, async_engine, AsyncSessionLocal, get_pool_status
+from app.core.principal_cache import Principal
+from app.core.security import get_current_principal
 from app.models import base
 import os
 
@@ -35,6 +37,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Estimate"],
 )
 
 # Include API Routers
@@ -67,6 +70,41 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+async def database_health_check():
+    """Database connectivity and connection pool usage"""
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import text
+
+    healthy = True
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        healthy = False
+
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            "pools": {
+                "sync": get_pool_status(engine),
+                "async": get_pool_status(async_engine.sync_engine),
+            },
+        }
+    )
+
+
+@app.get("/health/auth-cache")
+async def auth_cache_stats(current_user: Principal = Depends(get_current_principal)):
+    """Principal cache size and hit/miss counters (this worker only, superusers only)"""
+    from app.core.principal_cache import principal_cache
+
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Superuser access required")
+    return principal_cache.stats()
+
+
 # Well-known endpoint for federation discovery
 @app.get("/.well-known/money-instance")
 async def instance_info():
@@ -81,6 +119,33 @@ async def instance_info():
     }
 
 
+# Background bank import jobs: resume jobs interrupted by a restart
+@app.on_event("startup")
+async def resume_import_jobs():
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.import_jobs import import_job_queue
+
+    resumed = await run_in_threadpool(import_job_queue.resume_pending)
+    if resumed:
+        print(f"[Import Jobs] Resumed {resumed} pending import job(s)")
+
+
+@app.on_event("shutdown")
+async def stop_import_jobs():
+    from app.services.import_jobs import import_job_queue
+    from app.services.bank_import_service import shutdown_parse_pool
+
+    import_job_queue.shutdown()
+    shutdown_parse_pool()
+
+
+@app.on_event("shutdown")
+async def close_outgoing_http_client():
+    from app.core.http_client import close_http_client
+
+    await close_http_client()
+
+
 # Background Scheduler for Replication
 if settings.REPLICATION_ENABLED:
     from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -91,15 +156,13 @@ if settings.REPLICATION_ENABLED:
 
     async def sync_mirrors_job():
         """Background job to sync with all mirror instances"""
-        db = SessionLocal()
-        try:
-            service = ReplicationService(db)
-            result = await service.sync_all_mirrors()
-            print(f"[Replication Sync] Synced: {result.get('synced_count', 0)}, Failed: {result.get('failed_count', 0)}")
-        except Exception as e:
-            print(f"[Replication Sync Error] {str(e)}")
-        finally:
-            db.close()
+        async with AsyncSessionLocal() as db:
+            try:
+                service = ReplicationService(db)
+                result = await service.sync_all_mirrors()
+                print(f"[Replication Sync] Synced: {result.get('synced_count', 0)}, Failed: {result.get('failed_count', 0)}")
+            except Exception as e:
+                print(f"[Replication Sync Error] {str(e)}")
 
     def run_sync_job():
         """Wrapper to run async job in sync context"""
@@ -1,4 +1,5 @@
 from app.models.account import Account
+from app.models.account_balance import AccountBalance
 from app.models.transaction import Transaction
 from app.models.category import Category
 from app.models.shared_account import SharedAccount, SharedAccountMember, SplitTransaction, SplitShare, Settlement
@@ -7,11 +8,14 @@ from app.models.replication import MirrorInstance, SyncLog, ConflictResolution
 from app.models.reconciliation import BankReconciliation, ReconciliationMatch
 from app.models.backup_code import BackupCode
 from app.models.audit_log import AuditLog
+from app.models.import_job import ImportJob
+from app.models.change_log import ChangeLog, ChangeLogPrune
 from app.core.database import Base
 
 __all__ = [
     "Base",
     "Account",
+    "AccountBalance",
     "Transaction",
     "Category",
     "SharedAccount",
@@ -28,4 +32,7 @@ __all__ = [
     "ReconciliationMatch",
     "BackupCode",
     "AuditLog",
+    "ImportJob",
+    "ChangeLog",
+    "ChangeLogPrune",
 ]
@@ -12,7 +12,7 @@ class Account(Base):
     name = Column(String(100), nullable=False)
     type = Column(String(20), nullable=False)  # checking, savings, credit_card, cash
     iban = Column(String(34), nullable=True)
-    balance = Column(Numeric(10, 2), default=0.00)
+    balance = Column(Numeric(10, 2), default=0.00)  # Opening balance; current = opening + ledger (AccountBalance)
     currency = Column(String(3), default="CHF")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -27,3 +27,4 @@ class Account(Base):
     user = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
     reconciliations = relationship("BankReconciliation", back_populates="account", cascade="all, delete-orphan")
+    ledger = relationship("AccountBalance", back_populates="account", uselist=False, passive_deletes=True)
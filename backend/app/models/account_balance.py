@@ -0,0 +1,84 @@
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, DDL, event
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+from app.models.transaction import Transaction
+
+
+class AccountBalance(Base):
+    """Running total of an account's transactions, maintained by delta triggers"""
+    __tablename__ = "account_balances"
+
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    balance = Column(Numeric(14, 2), nullable=False, default=0)  # Sum of all transaction amounts
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    account = relationship("Account", back_populates="ledger")
+
+
+# Statement-level triggers with transition tables: one grouped upsert per
+# INSERT/UPDATE/DELETE statement, so bulk writes cost one delta per account
+# instead of one per row.
+BALANCE_TRIGGER_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION apply_account_balance_delta() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO account_balances (account_id, balance, transaction_count, updated_at)
+        SELECT account_id, SUM(amount), COUNT(*), now() AT TIME ZONE 'utc'
+        FROM new_rows GROUP BY account_id
+        ON CONFLICT (account_id) DO UPDATE SET
+            balance = account_balances.balance + EXCLUDED.balance,
+            transaction_count = account_balances.transaction_count + EXCLUDED.transaction_count,
+            updated_at = EXCLUDED.updated_at;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE account_balances b SET
+            balance = b.balance - d.amount,
+            transaction_count = b.transaction_count - d.cnt,
+            updated_at = now() AT TIME ZONE 'utc'
+        FROM (SELECT account_id, SUM(amount) AS amount, COUNT(*) AS cnt
+              FROM old_rows GROUP BY account_id) d
+        WHERE b.account_id = d.account_id;
+    ELSE
+        INSERT INTO account_balances (account_id, balance, transaction_count, updated_at)
+        SELECT account_id, SUM(amount), SUM(cnt), now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT account_id, amount, 1 AS cnt FROM new_rows
+            UNION ALL
+            SELECT account_id, -amount, -1 AS cnt FROM old_rows
+        ) d
+        GROUP BY account_id
+        ON CONFLICT (account_id) DO UPDATE SET
+            balance = account_balances.balance + EXCLUDED.balance,
+            transaction_count = account_balances.transaction_count + EXCLUDED.transaction_count,
+            updated_at = EXCLUDED.updated_at;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+BALANCE_TRIGGERS = [
+    DDL("""
+    CREATE TRIGGER transactions_balance_insert
+    AFTER INSERT ON transactions REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """),
+    DDL("""
+    CREATE TRIGGER transactions_balance_update
+    AFTER UPDATE ON transactions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """),
+    DDL("""
+    CREATE TRIGGER transactions_balance_delete
+    AFTER DELETE ON transactions REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_account_balance_delta()
+    """),
+]
+
+# Install the triggers when create_all() creates the transactions table;
+# existing databases get them from migration 005.
+event.listen(Transaction.__table__, "after_create", BALANCE_TRIGGER_FUNCTION.execute_if(dialect="postgresql"))
+for trigger in BALANCE_TRIGGERS:
+    event.listen(Transaction.__table__, "after_create", trigger.execute_if(dialect="postgresql"))
@@ -0,0 +1,85 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index, DDL, event, text
+from app.core.database import Base
+from app.models.account import Account
+from app.models.transaction import Transaction
+
+
+class ChangeLog(Base):
+    """Append-only change log for replication, written by triggers"""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Replication cursor: (txid, seq) after the last entry read
+        Index("ix_change_log_txid_seq", "txid", "seq"),
+    )
+
+    seq = Column(BigInteger, primary_key=True, autoincrement=True)  # Monotonic sequence number
+    txid = Column(BigInteger, nullable=False)  # Writing database transaction (pg_current_xact_id)
+    entity_type = Column(String(20), nullable=False)  # transaction, account
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # insert, update, delete
+    origin = Column(String(255), nullable=True)  # Mirror instance_id the change was replicated from, NULL = local
+    changed_at = Column(DateTime, nullable=False, server_default=text("(now() AT TIME ZONE 'utc')"))
+
+
+class ChangeLogPrune(Base):
+    """One pruning run: log entries up to (txid, seq) may be gone, cursors behind that have a gap"""
+    __tablename__ = "change_log_prunes"
+
+    id = Column(Integer, primary_key=True)
+    txid = Column(BigInteger, nullable=False)  # Last pruned entry (the watermark)
+    seq = Column(BigInteger, nullable=False)
+    deleted_count = Column(Integer, nullable=False)
+    pruned_at = Column(DateTime, nullable=False, server_default=text("(now() AT TIME ZONE 'utc')"))
+
+
+# Statement-level triggers with transition tables, like the balance
+# triggers: one INSERT ... SELECT per statement, in the same database
+# transaction as the change. app.change_origin is set (transaction-local)
+# while applying changes pulled from or pushed by a mirror.
+CHANGE_LOG_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION record_change_log() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO change_log (txid, entity_type, entity_id, operation, origin)
+        SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], id, 'delete',
+               NULLIF(current_setting('app.change_origin', true), '')
+        FROM old_rows;
+    ELSE
+        INSERT INTO change_log (txid, entity_type, entity_id, operation, origin)
+        SELECT pg_current_xact_id()::text::bigint, TG_ARGV[0], id, lower(TG_OP),
+               NULLIF(current_setting('app.change_origin', true), '')
+        FROM new_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+
+def change_log_triggers(table: str, entity_type: str):
+    """INSERT/UPDATE/DELETE triggers recording a table's changes"""
+    return [
+        DDL(f"""
+        CREATE OR REPLACE TRIGGER {table}_change_log_insert
+        AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """),
+        DDL(f"""
+        CREATE OR REPLACE TRIGGER {table}_change_log_update
+        AFTER UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """),
+        DDL(f"""
+        CREATE OR REPLACE TRIGGER {table}_change_log_delete
+        AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_change_log('{entity_type}')
+        """),
+    ]
+
+
+# Install the triggers when create_all() creates the tables;
+# existing databases get them from migration 013.
+for _table, _entity_type in ((Transaction.__table__, "transaction"), (Account.__table__, "account")):
+    event.listen(_table, "after_create", CHANGE_LOG_FUNCTION.execute_if(dialect="postgresql"))
+    for _trigger in change_log_triggers(_table.name, _entity_type):
+        event.listen(_table, "after_create", _trigger.execute_if(dialect="postgresql"))
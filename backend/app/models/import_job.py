@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy.dialects.postgresql import JSON
+from datetime import datetime
+from app.core.database import Base
+
+
+class ImportJob(Base):
+    """Background bank import (status and progress survive restarts)"""
+    __tablename__ = "import_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID, returned to the client
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+
+    # Input: the upload is spooled to disk until the job finishes
+    filename = Column(String(255))
+    file_path = Column(String(500))
+    total_bytes = Column(BigInteger, default=0)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
+    auto_match = Column(Boolean, default=True)
+
+    # Progress (updated after each inserted chunk)
+    bytes_read = Column(BigInteger, default=0)
+    rows_parsed = Column(Integer, default=0)
+    transactions_created = Column(Integer, default=0)
+    duplicates_skipped = Column(Integer, default=0)
+
+    # Outcome
+    result = Column(JSON, nullable=True)  # ImportResult of the finished import
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -4,7 +4,8 @@ Bank Reconciliation Models
 Models for comparing bank statements with application transactions.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text, Boolean, Index
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -35,6 +36,12 @@ class BankReconciliation(Base):
     unmatched_bank_count = Column(Integer, default=0)
     unmatched_app_count = Column(Integer, default=0)
 
+    # Matching
+    assignment_mode = Column(String(20), default="greedy")  # greedy, optimal
+    assignment_report = Column(JSON, nullable=True)  # Optimal vs greedy differences
+    last_matched_at = Column(DateTime, nullable=True)  # Start of the last create/refresh run
+    balance_report = Column(JSON, nullable=True)  # Running balance checkpoints: balanced/divergent windows
+
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
@@ -48,6 +55,10 @@ class BankReconciliation(Base):
 class ReconciliationMatch(Base):
     """Individual match between bank transaction and app transaction"""
     __tablename__ = "reconciliation_matches"
+    __table_args__ = (
+        # Paging the matches of one reconciliation by id
+        Index("ix_reconciliation_matches_reconciliation_id_id", "reconciliation_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reconciliation_id = Column(Integer, ForeignKey("bank_reconciliations.id"), nullable=False)
@@ -60,7 +71,7 @@ class ReconciliationMatch(Base):
     bank_reference = Column(String(200), nullable=True)
 
     # Match Information
-    match_status = Column(String(20), nullable=False)  # matched, unmatched_bank, unmatched_app, pending
+    match_status = Column(String(20), nullable=False)  # matched, unmatched_bank, unmatched_app, balanced, pending
     match_confidence = Column(Integer, default=0)  # 0-100
     match_type = Column(String(20), nullable=True)  # exact, fuzzy, manual
 
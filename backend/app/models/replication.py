@@ -15,6 +15,8 @@ class MirrorInstance(Base):
     sync_enabled = Column(Boolean, default=True)
     sync_direction = Column(String(20), default="bidirectional")  # push, pull, bidirectional
     last_sync = Column(DateTime, nullable=True)
+    push_cursor = Column(String(64), nullable=True)  # Position in our change log already pushed ("txid:seq")
+    pull_cursor = Column(String(64), nullable=True)  # Position in the mirror's change log already pulled
     priority = Column(Integer, default=1)  # 1=primary, 2=secondary, 3=tertiary
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
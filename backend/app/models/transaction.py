@@ -1,11 +1,24 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, ForeignKey, BigInteger, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, ForeignKey, BigInteger, Boolean, Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.core.database import Base
 
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pagination: ORDER BY date DESC, id DESC per user/account
+        Index("ix_transactions_user_account_date_id", "user_id", "account_id", "date", "id"),
+        # Full-text and fuzzy (pg_trgm) search over descriptions
+        Index("ix_transactions_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_transactions_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}
+        ),
+        # Bank import dedup: INSERT ... ON CONFLICT (import_fingerprint) DO NOTHING
+        Index("ux_transactions_import_fingerprint", "import_fingerprint", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -19,9 +32,22 @@ class Transaction(Base):
     requires_confirmation = Column(Boolean, default=False)  # Rot markiert wenn True
     receipt_path = Column(String(255), nullable=True)
     telegram_message_id = Column(BigInteger, nullable=True)
+    import_fingerprint = Column(String(64), nullable=True)  # SHA-256, set by bank CSV import
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(description, ''))", persisted=True)
+    ))
 
     # Relationships
     user = relationship("User", back_populates="transactions")
     account = relationship("Account", back_populates="transactions")
+
+
+# gin_trgm_ops needs the pg_trgm extension before create_all() builds the index
+event.listen(
+    Transaction.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,146 @@
+"""
+Running Balance Checkpoints
+
+Bank statements with a running balance (PostFinance Saldo, UBS Balance)
+give the bank's end-of-day balance on the days they cover. Comparing those
+checkpoints with the app's running balance (ledger up to that day) shows
+where the two diverge: between two consecutive checkpoints the difference
+bank - app stays the same exactly when the bank and app flows in that
+window are equal. Only the windows where it changes (and days not covered
+by checkpoints) need transaction matching.
+
+The difference itself may be non-zero everywhere (opening balance not
+set in the app); only its changes matter.
+"""
+
+from bisect import bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+REPORT_MAX_WINDOWS = 200  # Divergent windows listed in the report
+
+
+def chronological(bank_transactions: Sequence[Dict]) -> List[Dict]:
+    """
+    Statement rows in booking order
+
+    Exports list the newest or the oldest row first; a statement whose
+    first row is later than its last is read backwards. Rows of the same
+    day keep their (possibly reversed) file order.
+    """
+    rows = list(bank_transactions)
+    if rows and rows[0]['date'] > rows[-1]['date']:
+        rows.reverse()
+    rows.sort(key=lambda row: row['date'])
+    return rows
+
+
+def bank_checkpoints(bank_transactions: Sequence[Dict]) -> Dict[date, Decimal]:
+    """
+    End-of-day bank balance for every day with a running balance
+
+    The balance after the last row of a day carrying one, plus the rows
+    booked after it that day. The day before the first row gets the
+    opening balance (first balance minus the rows up to it).
+
+    Returns:
+        {day: balance}, empty if the statement has no balances
+    """
+    rows = chronological(bank_transactions)
+    checkpoints: Dict[date, Decimal] = {}
+    opening: Optional[Tuple[date, Decimal]] = None
+    flow_before = Decimal('0')  # Sum of the rows before the first balance
+
+    day_balance: Optional[Decimal] = None
+    for i, row in enumerate(rows):
+        amount = Decimal(str(row['amount']))
+        if i and row['date'] != rows[i - 1]['date']:
+            day_balance = None
+        if row.get('balance') is not None:
+            day_balance = Decimal(str(row['balance']))
+            if opening is None:
+                opening = (rows[0]['date'] - timedelta(days=1), day_balance - amount - flow_before)
+        elif day_balance is not None:
+            day_balance += amount
+        elif opening is None:
+            flow_before += amount
+            continue
+        if day_balance is not None:
+            checkpoints[row['date']] = day_balance
+
+    if opening is not None:
+        checkpoints[opening[0]] = opening[1]
+    return dict(sorted(checkpoints.items()))
+
+
+def compare_checkpoints(
+    checkpoints: Dict[date, Decimal],
+    app_base: Decimal,
+    app_daily: Dict[date, Decimal]
+) -> Dict:
+    """
+    Compare bank checkpoints with the app's running balance
+
+    Args:
+        checkpoints: bank_checkpoints() result (at least two days)
+        app_base: App ledger total up to and including the first checkpoint day
+        app_daily: App flow per day after the first checkpoint day
+
+    Returns:
+        Dict with 'balanced' ((start, end) windows with equal flows, both
+        days inclusive, adjacent ones merged), 'divergent' (the others,
+        with bank/app flow), 'first'/'last' checkpoint days and the
+        bank - app difference at both
+    """
+    days = list(checkpoints)
+    app_flows = dict.fromkeys(days[1:], Decimal('0'))
+    position = 1
+    for day in sorted(app_daily):
+        while position < len(days) and days[position] < day:
+            position += 1
+        if position == len(days):
+            break
+        app_flows[days[position]] += app_daily[day]
+
+    balanced = []
+    divergent = []
+    for previous, day in zip(days, days[1:]):
+        bank_flow = checkpoints[day] - checkpoints[previous]
+        app_flow = app_flows[day]
+        window = (previous + timedelta(days=1), day)
+        if bank_flow == app_flow:
+            if balanced and balanced[-1][1] == previous:
+                window = (balanced.pop()[0], day)  # Adjacent: one window
+            balanced.append(window)
+        else:
+            divergent.append({
+                'start': window[0].isoformat(),
+                'end': window[1].isoformat(),
+                'bank_flow': float(bank_flow),
+                'app_flow': float(app_flow),
+                'difference': float(bank_flow - app_flow),
+            })
+
+    app_last = app_base + sum(app_flows.values(), Decimal('0'))
+    return {
+        'first': days[0],
+        'last': days[-1],
+        'balanced': balanced,
+        'divergent': divergent,
+        'opening_difference': float(checkpoints[days[0]] - app_base),
+        'closing_difference': float(checkpoints[days[-1]] - app_last),
+    }
+
+
+def window_index(day: date, windows: Sequence[Tuple[date, date]]) -> Optional[int]:
+    """Index of the (start, end) window containing day (sorted, disjoint), or None"""
+    index = bisect_right(windows, (day, date.max)) - 1
+    if index >= 0 and windows[index][0] <= day <= windows[index][1]:
+        return index
+    return None
+
+
+def in_windows(day: date, windows: Sequence[Tuple[date, date]]) -> bool:
+    """True if day lies in one of the (start, end) windows (sorted, disjoint)"""
+    return window_index(day, windows) is not None
@@ -0,0 +1,92 @@
+"""
+Balance Service
+
+Account balances derived from transactions. The ledger total per account
+lives in account_balances and is kept current by database triggers;
+Account.balance holds the opening balance the ledger is added to.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select, func, literal, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.account import Account
+from app.models.account_balance import AccountBalance
+from app.models.transaction import Transaction
+
+
+class BalanceService:
+    """Service for reading and rebuilding ledger-derived account balances"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_ledger_totals(self, account_ids: Iterable[int]) -> Dict[int, Decimal]:
+        """Sum of transaction amounts per account (one indexed lookup)"""
+        account_ids = list(account_ids)
+        if not account_ids:
+            return {}
+
+        rows = self.db.query(AccountBalance.account_id, AccountBalance.balance).filter(
+            AccountBalance.account_id.in_(account_ids)
+        ).all()
+        totals = {account_id: Decimal("0") for account_id in account_ids}
+        totals.update({account_id: balance for account_id, balance in rows})
+        return totals
+
+    def get_balance(self, account: Account) -> Decimal:
+        """Current balance: opening balance plus all transactions"""
+        ledger_total = self.get_ledger_totals([account.id])[account.id]
+        return (account.balance or Decimal("0")) + ledger_total
+
+    def set_balance(self, account: Account, balance: Decimal):
+        """Set the current balance by adjusting the opening balance (not committed)"""
+        ledger_total = self.get_ledger_totals([account.id])[account.id]
+        account.balance = balance - ledger_total
+
+    def rebuild(self, account_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute ledger totals from transactions in one set-based pass
+
+        Blocks concurrent transaction writes until commit, so no delta
+        applied by the triggers can be lost in between.
+
+        Args:
+            account_ids: Limit the rebuild to these accounts (default: all)
+
+        Returns:
+            Number of accounts rebuilt
+        """
+        self.db.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+
+        totals = select(
+            Account.id,
+            func.coalesce(func.sum(Transaction.amount), 0),
+            func.count(Transaction.id),
+            literal(datetime.utcnow(), AccountBalance.updated_at.type),
+        ).outerjoin(
+            Transaction, Transaction.account_id == Account.id
+        ).group_by(Account.id)
+
+        if account_ids is not None:
+            totals = totals.where(Account.id.in_(list(account_ids)))
+
+        stmt = pg_insert(AccountBalance).from_select(
+            ["account_id", "balance", "transaction_count", "updated_at"],
+            totals
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AccountBalance.account_id],
+            set_={
+                "balance": stmt.excluded.balance,
+                "transaction_count": stmt.excluded.transaction_count,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+
+        result = self.db.execute(stmt)
+        self.db.commit()
+        return result.rowcount
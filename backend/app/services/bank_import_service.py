@@ -3,15 +3,29 @@ Bank Import Service - CSV Import mit Auto-Account-Matching
 Unterstützt PostFinance, UBS, Raiffeisen, ZKB und weitere Schweizer Banken
 """
 
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import BinaryIO, Callable, Iterable, List, Optional, Dict, Set, Tuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-import csv
+from itertools import chain, islice
+import hashlib
 import io
+import multiprocessing
+import zipfile
+import xml.etree.ElementTree as ET
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.account import Account
 from app.models.transaction import Transaction
+from app.services.bank_csv_parser import (
+    POSTFINANCE, UBS, RAIFFEISEN, ZKB, parse_columnar, parse_generic, decode_statement,
+    iter_decoded, iter_lines, iter_record_chunks
+)
+from app.services.camt_parser import CamtReader, is_camt
+from app.services.similarity import get_similarity
 
 
 class BankImportService:
@@ -19,6 +33,7 @@ class BankImportService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.similarity = get_similarity()
     
     def detect_bank_format(self, csv_content: str) -> Optional[str]:
         """Erkenne Bank-Format anhand CSV Header"""
@@ -94,104 +109,301 @@ class BankImportService:
     
     def parse_postfinance(self, csv_content: str) -> List[Dict]:
         """Parse PostFinance CSV Format"""
-        transactions = []
-        reader = csv.DictReader(io.StringIO(csv_content), delimiter=';')
-        
-        for row in reader:
-            try:
-                # PostFinance Format:
-                # Buchungsdatum;Valuta;Avisierungstext;Gutschrift;Lastschrift;Saldo
-                date = datetime.strptime(row['Buchungsdatum'], '%d.%m.%Y').date()
-                
-                # Determine amount (Gutschrift or Lastschrift)
-                amount = Decimal(row.get('Gutschrift', '0').replace("'", ""))
-                if not amount:
-                    amount = -Decimal(row.get('Lastschrift', '0').replace("'", ""))
-                
-                transactions.append({
-                    'date': date,
-                    'amount': amount,
-                    'description': row['Avisierungstext'],
-                    'balance': Decimal(row['Saldo'].replace("'", "")) if row.get('Saldo') else None
-                })
-            except Exception as e:
-                print(f"Error parsing row: {e}")
-                continue
-        
-        return transactions
+        return parse_columnar(csv_content, POSTFINANCE, self._parse_postfinance_row)
     
     def parse_ubs(self, csv_content: str) -> List[Dict]:
         """Parse UBS CSV Format"""
-        transactions = []
-        reader = csv.DictReader(io.StringIO(csv_content), delimiter=',')
-        
-        for row in reader:
-            try:
-                # UBS Format varies, common fields:
-                date = datetime.strptime(row['Date'], '%Y-%m-%d').date()
-                amount = Decimal(row['Amount'])
-                
-                transactions.append({
-                    'date': date,
-                    'amount': amount,
-                    'description': row.get('Description', row.get('Text', '')),
-                    'balance': Decimal(row['Balance']) if row.get('Balance') else None
-                })
-            except Exception as e:
-                print(f"Error parsing row: {e}")
-                continue
-        
-        return transactions
+        return parse_columnar(csv_content, UBS, self._parse_ubs_row)
     
     def parse_raiffeisen(self, csv_content: str) -> List[Dict]:
         """Parse Raiffeisen CSV Format"""
-        transactions = []
-        reader = csv.DictReader(io.StringIO(csv_content), delimiter=';')
-        
-        for row in reader:
-            try:
-                date = datetime.strptime(row['Buchung'], '%d.%m.%Y').date()
-                
-                # Raiffeisen hat separate Soll/Haben Spalten
-                amount = Decimal(row.get('Haben', '0').replace("'", ""))
-                if not amount:
-                    amount = -Decimal(row.get('Soll', '0').replace("'", ""))
-                
-                transactions.append({
-                    'date': date,
-                    'amount': amount,
-                    'description': row['Avisierungstext'],
-                    'balance': None
-                })
-            except Exception as e:
-                continue
-        
-        return transactions
+        return parse_columnar(csv_content, RAIFFEISEN, self._parse_raiffeisen_row)
     
     def parse_zkb(self, csv_content: str) -> List[Dict]:
         """Parse ZKB (Zürcher Kantonalbank) CSV Format"""
-        transactions = []
-        reader = csv.DictReader(io.StringIO(csv_content), delimiter=';')
+        return parse_columnar(csv_content, ZKB, self._parse_zkb_row)
+    
+    def parser_for(self, bank: str) -> Optional[Callable[[str], List[Dict]]]:
+        """CSV parser of a detected bank format (None if not implemented)"""
+        parser_map = {
+            'postfinance': self.parse_postfinance,
+            'ubs': self.parse_ubs,
+            'raiffeisen': self.parse_raiffeisen,
+            'zkb': self.parse_zkb,
+        }
+        return parser_map.get(bank)
+    
+    def parse_statement(self, content: bytes) -> Dict:
+        """
+        Parse a whole uploaded statement without importing it (reconciliation)
+        
+        camt XML and the known bank CSV formats use their parsers; any other
+        CSV is parsed with columns guessed from the header (parse_generic).
+        
+        Args:
+            content: File content (CSV in UTF-8 or Windows-1252, or camt XML)
         
-        for row in reader:
+        Returns:
+            Dict mit 'success', 'bank' und 'transactions' ({'date', 'amount',
+            'description', 'balance'} und bei camt 'reference',
+            'booking_reference') oder 'error'
+        """
+        if is_camt(content[:1024]):
+            reader = CamtReader(io.BytesIO(content))
             try:
-                date = datetime.strptime(row['Wertstellung'], '%d.%m.%Y').date()
-                
-                # ZKB: Belastung (negative) oder Gutschrift (positive)
-                amount = Decimal(row.get('Gutschrift', '0').replace("'", ""))
-                if not amount:
-                    amount = -Decimal(row.get('Belastung', '0').replace("'", ""))
-                
-                transactions.append({
-                    'date': date,
-                    'amount': amount,
-                    'description': row['Beschreibung'],
-                    'balance': None
-                })
-            except Exception as e:
-                continue
+                transactions = list(reader.entries())
+            except ET.ParseError as e:
+                return {'success': False, 'error': f'Invalid camt XML: {e}'}
+            return {'success': True, 'bank': reader.message_type or 'camt', 'transactions': transactions}
+        
+        csv_content = decode_statement(content)
+        head_content = '\n'.join(csv_content.split('\n', 10)[:10])
+        bank = self.detect_bank_format(head_content)
+        parser = self.parser_for(bank) if bank else None
+        if parser:
+            return {'success': True, 'bank': bank, 'transactions': parser(csv_content)}
+        
+        try:
+            transactions = parse_generic(csv_content)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        return {'success': True, 'bank': 'generic', 'transactions': transactions}
+    
+    # Row parsers: reference semantics for the columnar parser, which uses
+    # them for every row it can't convert itself. Return None to skip a row.
+    
+    def _parse_postfinance_row(self, row: Dict) -> Optional[Dict]:
+        try:
+            # PostFinance Format:
+            # Buchungsdatum;Valuta;Avisierungstext;Gutschrift;Lastschrift;Saldo
+            date = datetime.strptime(row['Buchungsdatum'], '%d.%m.%Y').date()
+            
+            # Determine amount (Gutschrift or Lastschrift)
+            amount = Decimal(row.get('Gutschrift', '0').replace("'", ""))
+            if not amount:
+                amount = -Decimal(row.get('Lastschrift', '0').replace("'", ""))
+            
+            return {
+                'date': date,
+                'amount': amount,
+                'description': row['Avisierungstext'],
+                'balance': Decimal(row['Saldo'].replace("'", "")) if row.get('Saldo') else None
+            }
+        except Exception as e:
+            print(f"Error parsing row: {e}")
+            return None
+    
+    def _parse_ubs_row(self, row: Dict) -> Optional[Dict]:
+        try:
+            # UBS Format varies, common fields:
+            date = datetime.strptime(row['Date'], '%Y-%m-%d').date()
+            amount = Decimal(row['Amount'])
+            
+            return {
+                'date': date,
+                'amount': amount,
+                'description': row.get('Description', row.get('Text', '')),
+                'balance': Decimal(row['Balance']) if row.get('Balance') else None
+            }
+        except Exception as e:
+            print(f"Error parsing row: {e}")
+            return None
+    
+    def _parse_raiffeisen_row(self, row: Dict) -> Optional[Dict]:
+        try:
+            date = datetime.strptime(row['Buchung'], '%d.%m.%Y').date()
+            
+            # Raiffeisen hat separate Soll/Haben Spalten
+            amount = Decimal(row.get('Haben', '0').replace("'", ""))
+            if not amount:
+                amount = -Decimal(row.get('Soll', '0').replace("'", ""))
+            
+            return {
+                'date': date,
+                'amount': amount,
+                'description': row['Avisierungstext'],
+                'balance': None
+            }
+        except Exception as e:
+            return None
+    
+    def _parse_zkb_row(self, row: Dict) -> Optional[Dict]:
+        try:
+            date = datetime.strptime(row['Wertstellung'], '%d.%m.%Y').date()
+            
+            # ZKB: Belastung (negative) oder Gutschrift (positive)
+            amount = Decimal(row.get('Gutschrift', '0').replace("'", ""))
+            if not amount:
+                amount = -Decimal(row.get('Belastung', '0').replace("'", ""))
+            
+            return {
+                'date': date,
+                'amount': amount,
+                'description': row['Beschreibung'],
+                'balance': None
+            }
+        except Exception as e:
+            return None
+    
+    def _existing_keys(
+        self,
+        account_id: int,
+        parsed_transactions: List[Dict],
+        import_started: datetime
+    ) -> Tuple[Set[Tuple], Counter, Dict[Tuple, List[str]]]:
+        """
+        Keys (date, amount, description) of the account's transactions in
+        the chunk's date range
+        
+        Returns:
+            (keys that existed before this import,
+             how often each key was already inserted by this import,
+             descriptions that existed before this import per (date, amount))
+        """
+        dates = [tx['date'] for tx in parsed_transactions]
+        rows = self.db.query(
+            Transaction.date, Transaction.amount, Transaction.description, Transaction.created_at
+        ).filter(
+            Transaction.account_id == account_id,
+            Transaction.date >= min(dates),
+            Transaction.date <= max(dates)
+        ).all()
+        
+        existing = set()
+        inserted = Counter()
+        by_day_amount: Dict[Tuple, List[str]] = {}
+        for tx_date, amount, description, created_at in rows:
+            if created_at == import_started:
+                inserted[(tx_date, amount, description)] += 1
+            else:
+                existing.add((tx_date, amount, description))
+                by_day_amount.setdefault((tx_date, amount), []).append(description)
+        return existing, inserted, by_day_amount
+    
+    def _claim_similar(self, candidates: Optional[List[str]], description: str) -> bool:
+        """
+        Fuzzy duplicate check: take the first existing description scoring
+        at least IMPORT_FUZZY_DUPLICATE_THRESHOLD, so each existing
+        transaction absorbs at most one imported row
+        """
+        if not candidates:
+            return False
+        for i, candidate in enumerate(candidates):
+            if self.similarity.score(description, candidate) >= settings.IMPORT_FUZZY_DUPLICATE_THRESHOLD:
+                del candidates[i]
+                return True
+        return False
+    
+    def _insert_new_transactions(
+        self,
+        account: Account,
+        parsed_transactions: List[Dict],
+        import_started: datetime
+    ) -> Tuple[int, int]:
+        """
+        Insert parsed rows that don't exist yet (not committed)
+        
+        A row is a duplicate if the account already had a transaction with
+        the same date, amount and description before this import (one
+        prefetch per chunk), or, for rows carrying a bank booking
+        'booking_reference' (camt AcctSvcrRef), if that reference was
+        imported before. With
+        IMPORT_FUZZY_DUPLICATE_THRESHOLD set, a row is also a duplicate of
+        an earlier transaction with the same date and amount whose
+        description is similar enough (e.g. entered by hand as "Coop"
+        before the statement's "EINKAUF COOP BASEL KARTE ..."). The
+        remaining rows are inserted with ON CONFLICT DO NOTHING on their
+        import fingerprint, so a concurrent import of the same statement
+        can't insert them twice; those conflicts count as duplicates as
+        well.
+        
+        Rows are written as multi-row INSERTs of IMPORT_BATCH_SIZE rows
+        through Core, so no ORM objects are created and memory stays
+        bounded by one batch.
+        
+        Args:
+            account: Target account
+            parsed_transactions: Parsed rows of one chunk
+            import_started: Timestamp of this import, stored as created_at;
+                tells this import's rows apart from earlier ones
+        
+        Returns:
+            (created, duplicates)
+        """
+        if not parsed_transactions:
+            return 0, 0
+        
+        # Rows with a bank booking reference (camt) are deduplicated by it
+        unreferenced = [tx for tx in parsed_transactions if not tx.get('booking_reference')]
+        existing, occurrences, similar = set(), Counter(), {}
+        if unreferenced:
+            existing, occurrences, similar = self._existing_keys(account.id, unreferenced, import_started)
+        fuzzy = settings.IMPORT_FUZZY_DUPLICATE_THRESHOLD > 0
+        reference_fingerprints = {
+            make_reference_fingerprint(account.id, tx['booking_reference'])
+            for tx in parsed_transactions if tx.get('booking_reference')
+        }
+        known_references = set()
+        if reference_fingerprints:
+            known_references = {
+                fingerprint for (fingerprint,) in self.db.query(Transaction.import_fingerprint).filter(
+                    Transaction.import_fingerprint.in_(reference_fingerprints)
+                )
+            }
+        
+        batch_size = max(settings.IMPORT_BATCH_SIZE, 1)
+        stmt = pg_insert(Transaction).on_conflict_do_nothing(
+            index_elements=[Transaction.import_fingerprint]
+        ).returning(Transaction.id).execution_options(insertmanyvalues_page_size=batch_size)
+        
+        batch = []
+        created = 0
+        duplicates = 0
+        
+        def flush_batch():
+            nonlocal created, duplicates
+            inserted = len(self.db.execute(stmt, batch).all())
+            created += inserted
+            duplicates += len(batch) - inserted
+            batch.clear()
         
-        return transactions
+        for tx_data in parsed_transactions:
+            key = (tx_data['date'], tx_data['amount'], tx_data['description'])
+            if tx_data.get('booking_reference'):
+                fingerprint = make_reference_fingerprint(account.id, tx_data['booking_reference'])
+                if fingerprint in known_references:
+                    duplicates += 1
+                    continue
+                known_references.add(fingerprint)
+            else:
+                if key in existing or (
+                    fuzzy and self._claim_similar(similar.get(key[:2]), tx_data['description'])
+                ):
+                    duplicates += 1
+                    continue
+                fingerprint = make_import_fingerprint(account.id, *key, occurrences[key])
+                occurrences[key] += 1
+            
+            batch.append({
+                'user_id': account.user_id,
+                'account_id': account.id,
+                'date': tx_data['date'],
+                'amount': tx_data['amount'],
+                'description': tx_data['description'],
+                'status': 'pending',
+                'source': 'csv_import',
+                'requires_confirmation': True,  # CSV Imports müssen bestätigt werden!
+                'import_fingerprint': fingerprint,
+                'created_at': import_started,
+                'updated_at': import_started,
+            })
+            if len(batch) >= batch_size:
+                flush_batch()
+        
+        if batch:
+            flush_batch()
+        
+        return created, duplicates
     
     def import_csv(
         self,
@@ -210,8 +422,70 @@ class BankImportService:
         Returns:
             Dict mit import results
         """
+        return self.import_stream([csv_content], account_id=account_id, auto_match=auto_match)
+    
+    def import_file(
+        self,
+        fileobj: BinaryIO,
+        account_id: Optional[int] = None,
+        auto_match: bool = True,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Importiere eine CSV (binary, UTF-8) oder camt XML Datei ohne sie ganz zu laden
+        
+        Args:
+            fileobj: Binary file object (e.g. UploadFile.file)
+            account_id: Optional - spezifischer Account
+            auto_match: Wenn True, versuche automatisch Account zu finden
+            progress: Called after each chunk with counters incl. bytes_read
+        
+        Returns:
+            Dict mit import results
+        """
+        def report(counters: Dict):
+            if progress:
+                progress({**counters, 'bytes_read': fileobj.tell()})
+        
+        head = fileobj.read(1024)
+        fileobj.seek(0)
+        if is_camt(head):
+            return self.import_camt(fileobj, account_id=account_id, auto_match=auto_match, progress=report)
+        
+        return self.import_stream(
+            iter_decoded(fileobj), account_id=account_id, auto_match=auto_match, progress=report
+        )
+    
+    def import_stream(
+        self,
+        text_chunks: Iterable[str],
+        account_id: Optional[int] = None,
+        auto_match: bool = True,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Importiere CSV aus Text-Chunks
+        
+        Bank format and account identifier are sniffed from the first
+        lines; the rest is parsed and inserted in chunks of
+        IMPORT_BATCH_SIZE records, so memory doesn't grow with the file.
+        All rows are committed together at the end.
+        
+        Args:
+            text_chunks: CSV content as consecutive text pieces
+            account_id: Optional - spezifischer Account
+            auto_match: Wenn True, versuche automatisch Account zu finden
+            progress: Called after each chunk with the running counters
+        
+        Returns:
+            Dict mit import results
+        """
+        lines = iter_lines(text_chunks)
+        head = list(islice(lines, 10))
+        head_content = ''.join(head)
+        
         # Detect bank format
-        bank = self.detect_bank_format(csv_content)
+        bank = self.detect_bank_format(head_content)
         if not bank:
             return {
                 'success': False,
@@ -221,10 +495,11 @@ class BankImportService:
         
         # Auto-match account wenn nicht gegeben
         account = None
+        bank_identifier = None
         if account_id:
             account = self.db.query(Account).filter(Account.id == account_id).first()
         elif auto_match:
-            bank_identifier = self.extract_account_identifier(csv_content, bank)
+            bank_identifier = self.extract_account_identifier(head_content, bank)
             if bank_identifier:
                 account = self.find_matching_account(bank_identifier)
         
@@ -232,61 +507,100 @@ class BankImportService:
             return {
                 'success': False,
                 'error': 'No matching account found',
-                'bank_identifier': self.extract_account_identifier(csv_content, bank),
+                'bank_identifier': bank_identifier or self.extract_account_identifier(head_content, bank),
                 'hint': 'Set bank_identifier on account or provide account_id'
             }
         
         # Parse transactions based on bank
-        parser_map = {
-            'postfinance': self.parse_postfinance,
-            'ubs': self.parse_ubs,
-            'raiffeisen': self.parse_raiffeisen,
-            'zkb': self.parse_zkb,
-        }
-        
-        parser = parser_map.get(bank)
+        parser = self.parser_for(bank)
         if not parser:
             return {
                 'success': False,
                 'error': f'Parser for {bank} not implemented yet'
             }
         
-        parsed_transactions = parser(csv_content)
+        records = chain(head[1:], lines)
+        chunks = (
+            parser(chunk)
+            for chunk in iter_record_chunks(
+                records, head[0], max(settings.IMPORT_BATCH_SIZE, 1), settings.IMPORT_MAX_RECORD_BYTES
+            )
+        )
+        return self._import_chunks(account, bank, chunks, progress)
+    
+    def import_camt(
+        self,
+        fileobj: BinaryIO,
+        account_id: Optional[int] = None,
+        auto_match: bool = True,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Importiere ISO 20022 camt.053/052/054 XML (streaming)
         
-        # Create transactions with duplicate detection
-        created = 0
-        duplicates = 0
+        The account is matched by the statement IBAN; entries are
+        deduplicated by the bank's booking reference where there is one.
         
-        for tx_data in parsed_transactions:
-            # Check for duplicate (same date, amount, description)
-            existing = self.db.query(Transaction).filter(
-                Transaction.account_id == account.id,
-                Transaction.date == tx_data['date'],
-                Transaction.amount == tx_data['amount'],
-                Transaction.description == tx_data['description']
-            ).first()
-            
-            if existing:
-                duplicates += 1
-                continue
-            
-            # Create transaction
-            transaction = Transaction(
-                account_id=account.id,
-                date=tx_data['date'],
-                amount=tx_data['amount'],
-                description=tx_data['description'],
-                status='pending',
-                source='csv_import',
-                requires_confirmation=True  # CSV Imports müssen bestätigt werden!
-            )
-            
-            self.db.add(transaction)
-            created += 1
+        Args:
+            fileobj: Binary file object of the XML export
+            account_id: Optional - spezifischer Account
+            auto_match: Wenn True, Account über die IBAN finden
+            progress: Called after each chunk with the running counters
         
-        self.db.commit()
+        Returns:
+            Dict mit import results
+        """
+        reader = CamtReader(fileobj)
+        entries = reader.entries()
+        try:
+            first = next(entries, None)
+        except ET.ParseError as e:
+            return {'success': False, 'error': f'Invalid camt XML: {e}'}
+        
+        account = None
+        if account_id:
+            account = self.db.query(Account).filter(Account.id == account_id).first()
+        elif auto_match and reader.iban:
+            account = self.find_matching_account(reader.iban)
+        
+        if not account:
+            return {
+                'success': False,
+                'error': 'No matching account found',
+                'bank_identifier': reader.iban,
+                'hint': 'Set bank_identifier on account or provide account_id'
+            }
+        
+        batch_size = max(settings.IMPORT_BATCH_SIZE, 1)
+        entries = chain([first] if first else [], entries)
+        chunks = iter(lambda: list(islice(entries, batch_size)), [])
+        try:
+            return self._import_chunks(account, reader.message_type or 'camt', chunks, progress)
+        except ET.ParseError as e:
+            self.db.rollback()
+            return {'success': False, 'error': f'Invalid camt XML: {e}'}
+    
+    def _import_chunks(
+        self,
+        account: Account,
+        bank: str,
+        chunks: Iterable[List[Dict]],
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Insert parsed chunks with duplicate detection and commit once"""
+        counters = {'rows_parsed': 0, 'transactions_created': 0, 'duplicates_skipped': 0}
+        import_started = datetime.utcnow()
+        for parsed_transactions in chunks:
+            # Create transactions with duplicate detection
+            created, duplicates = self._insert_new_transactions(account, parsed_transactions, import_started)
+            
+            counters['rows_parsed'] += len(parsed_transactions)
+            counters['transactions_created'] += created
+            counters['duplicates_skipped'] += duplicates
+            if progress:
+                progress(dict(counters))
         
-        # Update account last_import_date
+        # Update account last_import_date (same transaction as the rows)
         account.last_import_date = datetime.utcnow()
         self.db.commit()
         
@@ -295,12 +609,244 @@ class BankImportService:
             'bank': bank,
             'account_id': account.id,
             'account_name': account.name,
-            'transactions_created': created,
-            'duplicates_skipped': duplicates,
-            'total_parsed': len(parsed_transactions)
+            'transactions_created': counters['transactions_created'],
+            'duplicates_skipped': counters['duplicates_skipped'],
+            'total_parsed': counters['rows_parsed']
+        }
+    
+    def import_batch(
+        self,
+        files: List[Tuple[str, bytes]],
+        account_id: Optional[int] = None,
+        auto_match: bool = True
+    ) -> Dict:
+        """
+        Importiere mehrere CSV Dateien (z.B. alle Monatsauszüge eines Jahres)
+        
+        Bank format and account are detected per file. The files are parsed
+        in parallel in a process pool; the inserts then run serially per
+        account in upload order, each file with its own import timestamp,
+        so a statement uploaded twice (or overlapping another) is caught by
+        the usual duplicate detection. Each imported file is committed on
+        its own.
+        
+        Args:
+            files: (filename, content) pairs, ZIP archives already expanded
+                (see expand_uploads)
+            account_id: Optional - Account für alle Dateien
+            auto_match: Wenn True, Account pro Datei automatisch finden
+        
+        Returns:
+            Dict mit Resultat pro Datei, pro Account und Totals
+        """
+        reports = []
+        pending = []  # (report, account, bank, content)
+        accounts_by_identifier: Dict[str, Optional[Account]] = {}
+        fixed_account = None
+        if account_id:
+            fixed_account = self.db.query(Account).filter(Account.id == account_id).first()
+        
+        for filename, data in files:
+            report = {'filename': filename, 'success': False}
+            reports.append(report)
+            
+            content = decode_statement(data)  # UTF-8, else Windows-1252 like single imports
+            head_content = '\n'.join(content.split('\n', 10)[:10])
+            bank = self.detect_bank_format(head_content)
+            if not bank:
+                report['error'] = 'Unknown bank format'
+                continue
+            report['bank'] = bank
+            if not self.parser_for(bank):
+                report['error'] = f'Parser for {bank} not implemented yet'
+                continue
+            
+            account = fixed_account
+            if account_id is None and auto_match:
+                bank_identifier = self.extract_account_identifier(head_content, bank)
+                if bank_identifier not in accounts_by_identifier:
+                    accounts_by_identifier[bank_identifier] = self.find_matching_account(bank_identifier)
+                account = accounts_by_identifier[bank_identifier]
+                report['bank_identifier'] = bank_identifier
+            if not account:
+                report['error'] = 'No matching account found'
+                continue
+            
+            pending.append((report, account, bank, content))
+        
+        # Parse all files in parallel (CPU bound, one process per file)
+        parsed_files = _parse_statements([(bank, content) for _, _, bank, content in pending])
+        
+        # Insert serially, grouped by account in upload order
+        by_account: Dict[int, List] = {}
+        for (report, account, _, _), parsed in zip(pending, parsed_files):
+            by_account.setdefault(account.id, []).append((report, account, parsed))
+        
+        accounts = []
+        last_started = None
+        for entries in by_account.values():
+            account = entries[0][1]
+            account_totals = {
+                'account_id': account.id,
+                'account_name': account.name,
+                'files': 0,
+                'transactions_created': 0,
+                'duplicates_skipped': 0,
+                'total_parsed': 0
+            }
+            accounts.append(account_totals)
+            
+            for report, _, parsed in entries:
+                if isinstance(parsed, Exception):
+                    report['error'] = f'Parsing failed: {parsed}'
+                    continue
+                
+                import_started = datetime.utcnow()
+                if last_started and import_started <= last_started:
+                    import_started = last_started + timedelta(microseconds=1)
+                last_started = import_started
+                
+                try:
+                    created, duplicates = self._insert_new_transactions(account, parsed, import_started)
+                    account.last_import_date = datetime.utcnow()
+                    self.db.commit()
+                except Exception as e:
+                    self.db.rollback()
+                    report['error'] = f'Import failed: {e}'
+                    continue
+                
+                report.update({
+                    'success': True,
+                    'account_id': account.id,
+                    'account_name': account.name,
+                    'transactions_created': created,
+                    'duplicates_skipped': duplicates,
+                    'total_parsed': len(parsed)
+                })
+                account_totals['files'] += 1
+                account_totals['transactions_created'] += created
+                account_totals['duplicates_skipped'] += duplicates
+                account_totals['total_parsed'] += len(parsed)
+        
+        imported = [report for report in reports if report['success']]
+        return {
+            'success': bool(imported) and len(imported) == len(reports),
+            'files_total': len(reports),
+            'files_imported': len(imported),
+            'files_failed': len(reports) - len(imported),
+            'transactions_created': sum(r['transactions_created'] for r in imported),
+            'duplicates_skipped': sum(r['duplicates_skipped'] for r in imported),
+            'total_parsed': sum(r['total_parsed'] for r in imported),
+            'accounts': accounts,
+            'files': reports
         }
 
 
+def expand_uploads(uploads: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    Replace ZIP archives by the CSV files they contain
+    
+    Members are read in archive order; folders, non-CSV files and macOS
+    metadata are skipped.
+    """
+    files = []
+    for filename, data in uploads:
+        if not zipfile.is_zipfile(io.BytesIO(data)):
+            files.append((filename, data))
+            continue
+        
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for member in archive.infolist():
+                name = member.filename
+                if member.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith('.csv'):
+                    continue
+                files.append((f"{filename}/{name}", archive.read(member)))
+    return files
+
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _parse_statement(bank: str, csv_content: str) -> List[Dict]:
+    """Parse one statement (runs in a pool process)"""
+    return BankImportService(None).parser_for(bank)(csv_content)
+
+
+def _parse_statements(statements: List[Tuple[str, str]]) -> List:
+    """
+    Parse (bank, content) pairs, in parallel if there is more than one
+    
+    Returns:
+        Parsed rows per statement, or the exception that statement raised
+    """
+    global _parse_pool
+    
+    if len(statements) <= 1 or settings.BATCH_IMPORT_PROCESSES == 1:
+        results = []
+        for bank, content in statements:
+            try:
+                results.append(_parse_statement(bank, content))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    if _parse_pool is None:
+        # Not fork: the server process is multi-threaded (threadpool, import
+        # workers, DB pools), a forked child could inherit held locks and
+        # open DB sockets. forkserver children start from a clean process.
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.BATCH_IMPORT_PROCESSES or None,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    
+    futures = [_parse_pool.submit(_parse_statement, bank, content) for bank, content in statements]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def shutdown_parse_pool():
+    """Stop the batch import parser processes"""
+    global _parse_pool
+    
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def make_import_fingerprint(
+    account_id: int,
+    tx_date: date,
+    amount: Decimal,
+    description: Optional[str],
+    occurrence: int
+) -> str:
+    """
+    SHA-256 fingerprint of an imported row
+    
+    occurrence numbers identical rows within one import, so legitimately
+    repeated bookings (two equal coffees on one day) stay distinct.
+    """
+    key = '|'.join([
+        str(account_id),
+        tx_date.isoformat(),
+        str(amount.normalize()),
+        '\x00' if description is None else description,
+        str(occurrence),
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def make_reference_fingerprint(account_id: int, reference: str) -> str:
+    """SHA-256 fingerprint of a row identified by the bank's booking reference"""
+    key = '|'.join(['ref', str(account_id), reference])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
 # Helper function für Account Setup
 def setup_bank_account(
     db: Session,
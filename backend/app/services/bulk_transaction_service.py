@@ -0,0 +1,145 @@
+"""
+Bulk Transaction Service
+
+Applies many transaction creates, updates and deletes in one database
+transaction with batched statements instead of one round trip per row.
+"""
+
+from datetime import datetime
+from typing import List, Dict, Any, Set
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session
+
+from app.core.principal_cache import Principal
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.services.receipt_storage import ReceiptStorage
+
+
+class BulkTransactionService:
+    """Service for bulk create/update/delete of transactions"""
+
+    def __init__(self, db: Session, current_user: Principal):
+        self.db = db
+        self.current_user = current_user
+
+    def _can_access(self, owner_id: int) -> bool:
+        return self.current_user.is_superuser or owner_id == self.current_user.id
+
+    def _accessible_account_ids(self, account_ids: Set[int]) -> Set[int]:
+        """Check account access once per distinct account_id"""
+        if not account_ids:
+            return set()
+
+        rows = self.db.query(Account.id, Account.user_id).filter(
+            Account.id.in_(account_ids)
+        ).all()
+        return {account_id for account_id, user_id in rows if self._can_access(user_id)}
+
+    def _accessible_transactions(self, transaction_ids: Set[int]) -> Dict[int, Any]:
+        """Load (id, receipt_path) for the transactions the user may modify"""
+        if not transaction_ids:
+            return {}
+
+        rows = self.db.query(
+            Transaction.id, Transaction.user_id, Transaction.receipt_path
+        ).filter(Transaction.id.in_(transaction_ids)).all()
+        return {row.id: row for row in rows if self._can_access(row.user_id)}
+
+    def apply(
+        self,
+        create: List[Dict[str, Any]],
+        update_items: List[Dict[str, Any]],
+        delete_ids: List[int]
+    ) -> Dict[str, Any]:
+        """
+        Apply all changes and commit once
+
+        Args:
+            create: Transaction fields for new rows (TransactionCreate)
+            update_items: Partial updates, each with an 'id' key (TransactionUpdate)
+            delete_ids: IDs of transactions to delete
+
+        Returns:
+            Dict with counts and per-item results in request order
+        """
+        results: List[Dict[str, Any]] = []
+        now = datetime.utcnow()
+
+        # Creates
+        allowed_accounts = self._accessible_account_ids({item['account_id'] for item in create})
+        create_rows = []
+        create_results = []
+        for index, item in enumerate(create):
+            result = {'op': 'create', 'index': index, 'id': None, 'status': 'created', 'error': None}
+            if item['account_id'] not in allowed_accounts:
+                result.update(status='failed', error='Account not found or access denied')
+            else:
+                create_rows.append({**item, 'user_id': self.current_user.id, 'created_at': now, 'updated_at': now})
+                create_results.append(result)
+            results.append(result)
+
+        if create_rows:
+            new_ids = self.db.execute(
+                insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+                create_rows
+            ).scalars().all()
+            for result, new_id in zip(create_results, new_ids):
+                result['id'] = new_id
+
+        # Updates and deletes share one access prefetch
+        accessible = self._accessible_transactions(
+            {item['id'] for item in update_items} | set(delete_ids)
+        )
+
+        update_rows = []
+        for index, item in enumerate(update_items):
+            result = {'op': 'update', 'index': index, 'id': item['id'], 'status': 'updated', 'error': None}
+            if item['id'] not in accessible:
+                result.update(status='failed', error='Transaction not found or access denied')
+            else:
+                update_rows.append({**item, 'updated_at': now})
+            results.append(result)
+
+        if update_rows:
+            # ORM bulk UPDATE by primary key (executemany, grouped by key set)
+            self.db.execute(update(Transaction), update_rows)
+
+        receipt_paths = []
+        delete_rows = []
+        seen_delete_ids = set()
+        for index, transaction_id in enumerate(delete_ids):
+            result = {'op': 'delete', 'index': index, 'id': transaction_id, 'status': 'deleted', 'error': None}
+            row = accessible.get(transaction_id)
+            if row is None:
+                result.update(status='failed', error='Transaction not found or access denied')
+            elif transaction_id in seen_delete_ids:
+                result.update(status='failed', error='Transaction listed more than once')
+            else:
+                seen_delete_ids.add(transaction_id)
+                delete_rows.append(transaction_id)
+                if row.receipt_path:
+                    receipt_paths.append(row.receipt_path)
+            results.append(result)
+
+        if delete_rows:
+            self.db.execute(
+                delete(Transaction).where(Transaction.id.in_(delete_rows)),
+                execution_options={'synchronize_session': False}
+            )
+
+        self.db.commit()
+
+        # Remove receipt files only once the deletes are committed,
+        # and only if no remaining transaction shares them
+        storage = ReceiptStorage()
+        for path in set(receipt_paths):
+            storage.release(self.db, path)
+
+        return {
+            'created': len(create_rows),
+            'updated': len(update_rows),
+            'deleted': len(delete_rows),
+            'failed': sum(1 for r in results if r['status'] == 'failed'),
+            'results': results
+        }
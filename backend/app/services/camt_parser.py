@@ -0,0 +1,195 @@
+"""
+Streaming ISO 20022 camt Parser
+
+Reads camt.053 (statement), camt.052 (report) and camt.054 (notification)
+XML exports incrementally with ElementTree.iterparse. Each <Ntry> is
+converted when its end tag is read and then removed from the tree, so a
+100 MB statement parses in constant memory. Works with the namespaces of
+all schema versions (.001.02 up to .001.08).
+"""
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional
+import xml.etree.ElementTree as ET
+
+# Elements that hold the account and its entries
+CONTAINERS = {'Stmt', 'Rpt', 'Ntfctn'}
+MESSAGE_TYPES = {
+    'BkToCstmrStmt': 'camt.053',
+    'BkToCstmrAcctRpt': 'camt.052',
+    'BkToCstmrDbtCdtNtfctn': 'camt.054',
+}
+MAX_DESCRIPTION = 500  # Transaction.description length
+
+
+def is_camt(head: bytes) -> bool:
+    """True if the first bytes of an upload look like a camt XML document"""
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+    return text.startswith(b'<') and b'camt.05' in head
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+class CamtReader:
+    """
+    Incremental reader for one camt file
+
+    `iban` (and `message_type`) are known once the first entry has been
+    yielded, because <Acct> precedes the entries of its statement.
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        self.fileobj = fileobj
+        self.iban: Optional[str] = None
+        self.message_type: Optional[str] = None
+        self._ns = ''
+        self._paths: Dict[str, str] = {}
+
+    def _path(self, path: str) -> str:
+        """'BookgDt/Dt' -> '{ns}BookgDt/{ns}Dt'"""
+        qualified = self._paths.get(path)
+        if qualified is None:
+            qualified = self._paths[path] = '/'.join(self._ns + part for part in path.split('/'))
+        return qualified
+
+    def _text(self, elem: ET.Element, path: str) -> Optional[str]:
+        found = elem.find(self._path(path))
+        if found is None or found.text is None:
+            return None
+        return found.text.strip() or None
+
+    def entries(self) -> Iterator[Dict]:
+        """
+        Yield the booked entries in document order
+
+        Returns dicts with date, amount (signed), description, balance
+        (always None), reference (bank reference for display, None if the
+        bank gives none), booking_reference (AcctSvcrRef only, the key for
+        duplicate detection), value_date, currency and account_iban.
+        """
+        depth = 0
+        containers: List[ET.Element] = []
+        statement_iban = None
+        ntry_tag = acct_tag = None
+        container_tags = set()
+
+        for event, elem in ET.iterparse(self.fileobj, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    # Namespace of this schema version, e.g. {urn:...camt.053.001.04}
+                    self._ns = elem.tag[:-len(_local(elem.tag))]
+                    ntry_tag, acct_tag = self._ns + 'Ntry', self._ns + 'Acct'
+                    container_tags = {self._ns + name for name in CONTAINERS}
+                elif depth == 2:
+                    self.message_type = self.message_type or MESSAGE_TYPES.get(_local(elem.tag))
+                elif depth == 3 and elem.tag in container_tags:
+                    containers.append(elem)
+                    statement_iban = None
+                continue
+
+            if depth == 4 and containers:
+                if elem.tag == ntry_tag:
+                    entry = self._parse_entry(elem, statement_iban)
+                    containers[-1].remove(elem)  # Drop the parsed subtree
+                    if entry is not None:
+                        yield entry
+                elif elem.tag == acct_tag:
+                    # IBAN, or the bank's own account number
+                    iban = self._text(elem, 'Id/IBAN') or self._text(elem, 'Id/Othr/Id')
+                    statement_iban = iban.replace(' ', '') if iban else None
+                    self.iban = self.iban or statement_iban
+            elif depth == 3 and elem.tag in container_tags:
+                elem.clear()
+                containers.pop()
+
+            depth -= 1
+
+    def _parse_entry(self, ntry: ET.Element, account_iban: Optional[str]) -> Optional[Dict]:
+        """Convert one <Ntry>; None for pending/informational or malformed entries"""
+        status = self._text(ntry, 'Sts/Cd') or self._text(ntry, 'Sts')
+        if status and status != 'BOOK':
+            return None
+
+        amount_elem = ntry.find(self._path('Amt'))
+        booking_date = self._date(ntry, 'BookgDt')
+        value_date = self._date(ntry, 'ValDt')
+        try:
+            amount = Decimal(amount_elem.text.strip())
+        except (AttributeError, InvalidOperation):
+            return None
+        if booking_date is None and value_date is None:
+            return None
+
+        if self._text(ntry, 'CdtDbtInd') == 'DBIT':
+            amount = -amount
+
+        return {
+            'date': booking_date or value_date,
+            'amount': amount,
+            'description': self._description(ntry),
+            'balance': None,
+            'reference': self._reference(ntry),
+            'booking_reference': self._booking_reference(ntry),
+            'value_date': value_date,
+            'currency': amount_elem.get('Ccy'),
+            'account_iban': account_iban,
+        }
+
+    def _date(self, ntry: ET.Element, name: str) -> Optional[date]:
+        value = self._text(ntry, f'{name}/Dt')
+        if value is None:
+            value = self._text(ntry, f'{name}/DtTm')
+        if value is None:
+            return None
+        try:
+            return date.fromisoformat(value[:10])  # ISODate, or the date part of ISODateTime
+        except ValueError:
+            return None
+
+    def _reference(self, ntry: ET.Element) -> Optional[str]:
+        """Reference shown for the entry: entry level first, then first transaction"""
+        for path in ('AcctSvcrRef', 'NtryRef', 'NtryDtls/TxDtls/Refs/AcctSvcrRef', 'NtryDtls/TxDtls/Refs/EndToEndId'):
+            value = self._text(ntry, path)
+            if value and value != 'NOTPROVIDED':
+                return value
+        return None
+
+    def _booking_reference(self, ntry: ET.Element) -> Optional[str]:
+        """
+        The bank's unique booking reference (AcctSvcrRef), if any
+
+        NtryRef is only unique within one statement and standing orders
+        reuse their EndToEndId every month, so neither identifies a booking.
+        """
+        for path in ('AcctSvcrRef', 'NtryDtls/TxDtls/Refs/AcctSvcrRef'):
+            value = self._text(ntry, path)
+            if value and value != 'NOTPROVIDED':
+                return value
+        return None
+
+    def _description(self, ntry: ET.Element) -> Optional[str]:
+        """Counterparty and remittance text of the first transaction, else the entry text"""
+        tx = ntry.find(self._path('NtryDtls/TxDtls'))
+        parts = []
+        if tx is not None:
+            # Debit: we paid the creditor; credit: the debtor paid us
+            party = 'Cdtr' if self._text(ntry, 'CdtDbtInd') == 'DBIT' else 'Dbtr'
+            name = self._text(tx, f'RltdPties/{party}/Nm') or self._text(tx, f'RltdPties/{party}/Pty/Nm')
+            if name:
+                parts.append(name)
+            remittance = [
+                (line.text or '').strip()
+                for line in tx.iterfind(self._path('RmtInf/Ustrd'))
+            ]
+            remittance = ' '.join(line for line in remittance if line)
+            if remittance:
+                parts.append(remittance)
+
+        description = ' / '.join(parts) or self._text(ntry, 'AddtlNtryInf')
+        if description is None and tx is not None:
+            description = self._text(tx, 'AddtlTxInf')
+        return description[:MAX_DESCRIPTION] if description else None
@@ -1,5 +1,5 @@
-import httpx
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.federation.crypto import sign_data, verify_signature
 
 
@@ -15,28 +15,28 @@ async def send_federated_invoice(invoice):
     
     username, target_domain = to_user_parts
     
+    client = get_http_client()
+
     # Get target instance info
-    async with httpx.AsyncClient() as client:
-        instance_info = await client.get(f"https://{target_domain}/.well-known/money-instance")
-        instance_info.raise_for_status()
-        instance_data = instance_info.json()
+    instance_info = await client.get(f"https://{target_domain}/.well-known/money-instance")
+    instance_info.raise_for_status()
+    instance_data = instance_info.json()
     
     # Sign the invoice
     invoice_json = invoice.model_dump_json()
     signature = sign_data(invoice_json)
     
     # Send to target instance
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{instance_data['api_endpoint']}/federation/invoice/receive",
-            json=invoice.model_dump(),
-            headers={
-                "X-Signature": signature,
-                "X-Instance": settings.INSTANCE_DOMAIN
-            }
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await client.post(
+        f"{instance_data['api_endpoint']}/federation/invoice/receive",
+        json=invoice.model_dump(),
+        headers={
+            "X-Signature": signature,
+            "X-Instance": settings.INSTANCE_DOMAIN
+        }
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def verify_and_store_invoice(invoice, signature: str) -> bool:
@@ -52,13 +52,12 @@ async def verify_and_store_invoice(invoice, signature: str) -> bool:
     _, sender_domain = from_parts
     
     # Get sender's public key
-    async with httpx.AsyncClient() as client:
-        try:
-            instance_info = await client.get(f"https://{sender_domain}/.well-known/money-instance")
-            instance_info.raise_for_status()
-            sender_data = instance_info.json()
-        except:
-            return False
+    try:
+        instance_info = await get_http_client().get(f"https://{sender_domain}/.well-known/money-instance")
+        instance_info.raise_for_status()
+        sender_data = instance_info.json()
+    except:
+        return False
     
     # Verify signature
     invoice_json = invoice.model_dump_json()
@@ -67,8 +66,7 @@ async def verify_and_store_invoice(invoice, signature: str) -> bool:
 
 async def fetch_instance_public_key(domain: str) -> str:
     """Fetch public key from another instance"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"https://{domain}/.well-known/money-instance")
-        response.raise_for_status()
-        data = response.json()
-        return data["public_key"]
+    response = await get_http_client().get(f"https://{domain}/.well-known/money-instance")
+    response.raise_for_status()
+    data = response.json()
+    return data["public_key"]
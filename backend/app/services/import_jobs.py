@@ -0,0 +1,244 @@
+"""
+Import Jobs
+
+Runs bank imports in the background: the upload is spooled to disk, an
+ImportJob row records it and a worker pool in this process runs
+BankImportService.import_file, writing progress back after each chunk.
+Jobs that were queued or running when the process stopped are picked up
+again on startup (an interrupted import committed nothing, so it simply
+starts over), up to IMPORT_JOB_MAX_ATTEMPTS attempts.
+"""
+
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.bank_import_service import BankImportService
+
+
+class ImportJobQueue:
+    """In-process worker pool for ImportJob rows"""
+
+    def __init__(self, max_workers: Optional[int] = None, spool_path: Optional[str] = None):
+        self.max_workers = max(max_workers or settings.IMPORT_WORKERS, 1)
+        self.spool_path = Path(spool_path or settings.IMPORT_JOBS_PATH)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="import-job"
+            )
+        return self._executor
+
+    def enqueue(
+        self,
+        fileobj: BinaryIO,
+        filename: Optional[str] = None,
+        account_id: Optional[int] = None,
+        auto_match: bool = True
+    ) -> ImportJob:
+        """
+        Spool an upload to disk, record the job and hand it to a worker
+        (blocking, run off the event loop)
+
+        Args:
+            fileobj: Binary file object of the upload
+            filename: Original filename (informational)
+            account_id: Optional - spezifischer Account
+            auto_match: Wenn True, automatisches Account-Matching
+
+        Returns:
+            The queued ImportJob
+        """
+        job_id = str(uuid.uuid4())
+        self.spool_path.mkdir(parents=True, exist_ok=True)
+        file_path = self.spool_path / f"{job_id}.csv"
+
+        with open(file_path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, 1024 * 1024)
+
+        db = SessionLocal()
+        try:
+            job = ImportJob(
+                id=job_id,
+                status="queued",
+                filename=filename,
+                file_path=str(file_path),
+                total_bytes=os.path.getsize(file_path),
+                account_id=account_id,
+                auto_match=auto_match
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+        except BaseException:
+            db.close()
+            os.remove(file_path)
+            raise
+        db.close()
+
+        self.executor.submit(self.run, job_id)
+        return job
+
+    def resume_pending(self) -> int:
+        """
+        Re-queue jobs interrupted by a restart and submit all queued jobs
+
+        Jobs that already used IMPORT_JOB_MAX_ATTEMPTS attempts (attempts
+        counts every start) are marked failed instead, so an import that
+        crashes the process is not retried on every startup.
+
+        Returns:
+            Number of jobs submitted
+        """
+        max_attempts = max(settings.IMPORT_JOB_MAX_ATTEMPTS, 1)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            given_up = db.execute(
+                update(ImportJob)
+                .where(ImportJob.status.in_(("queued", "running")), ImportJob.attempts >= max_attempts)
+                .values(
+                    status="failed",
+                    error=f"Interrupted {max_attempts} times, not resumed again",
+                    finished_at=now,
+                    updated_at=now
+                )
+                .returning(ImportJob.id, ImportJob.file_path)
+            ).all()
+            db.execute(
+                update(ImportJob)
+                .where(ImportJob.status == "running")
+                .values(status="queued", updated_at=now)
+            )
+            queued = db.query(ImportJob.id, ImportJob.file_path).filter(
+                ImportJob.status == "queued"
+            ).order_by(ImportJob.created_at).all()
+
+            # Upload gone (e.g. IMPORT_JOBS_PATH not on a volume and the
+            # container was recreated): nothing left to resume
+            missing = [job_id for job_id, file_path in queued if not (file_path and os.path.exists(file_path))]
+            if missing:
+                db.execute(
+                    update(ImportJob)
+                    .where(ImportJob.id.in_(missing))
+                    .values(
+                        status="failed",
+                        error="Uploaded file no longer exists (IMPORT_JOBS_PATH not persistent?), please upload it again",
+                        finished_at=now,
+                        updated_at=now
+                    )
+                )
+            db.commit()
+            job_ids = [job_id for job_id, _ in queued if job_id not in missing]
+        finally:
+            db.close()
+
+        for job_id, file_path in given_up:
+            print(f"[Import Job {job_id}] Failed: interrupted {max_attempts} times")
+            self._remove_spool(file_path)
+        for job_id in missing:
+            print(f"[Import Job {job_id}] Failed: uploaded file missing, not resumed")
+
+        for job_id in job_ids:
+            self.executor.submit(self.run, job_id)
+        return len(job_ids)
+
+    def shutdown(self):
+        """Stop accepting work; running jobs are resumed on the next start"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def run(self, job_id: str):
+        """Run one job (worker thread)"""
+        status_db = SessionLocal()
+        try:
+            # Claim the job: only one worker moves it from queued to running
+            claimed = status_db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.status == "queued")
+                .values(
+                    status="running",
+                    started_at=datetime.utcnow(),
+                    attempts=ImportJob.attempts + 1,
+                    bytes_read=0,
+                    rows_parsed=0,
+                    transactions_created=0,
+                    duplicates_skipped=0
+                )
+            ).rowcount
+            status_db.commit()
+            if not claimed:
+                return
+
+            job = status_db.get(ImportJob, job_id)
+            self._execute(status_db, job)
+        finally:
+            status_db.close()
+
+    def _execute(self, status_db, job: ImportJob):
+        def set_status(**values):
+            status_db.execute(
+                update(ImportJob).where(ImportJob.id == job.id).values(updated_at=datetime.utcnow(), **values)
+            )
+            status_db.commit()
+
+        def progress(counters: Dict):
+            # Separate session: the import itself commits only at the end
+            set_status(
+                bytes_read=counters['bytes_read'],
+                rows_parsed=counters['rows_parsed'],
+                transactions_created=counters['transactions_created'],
+                duplicates_skipped=counters['duplicates_skipped']
+            )
+
+        import_db = SessionLocal()
+        try:
+            with open(job.file_path, "rb") as f:
+                result = BankImportService(import_db).import_file(
+                    f,
+                    account_id=job.account_id,
+                    auto_match=job.auto_match,
+                    progress=progress
+                )
+        except Exception as e:
+            import_db.rollback()
+            print(f"[Import Job {job.id}] Failed: {str(e)}")
+            set_status(status="failed", error=str(e), finished_at=datetime.utcnow())
+            self._remove_spool(job.file_path)
+            return
+        finally:
+            import_db.close()
+
+        if result['success']:
+            set_status(
+                status="completed",
+                result=result,
+                bytes_read=job.total_bytes,
+                rows_parsed=result['total_parsed'],
+                transactions_created=result['transactions_created'],
+                duplicates_skipped=result['duplicates_skipped'],
+                finished_at=datetime.utcnow()
+            )
+        else:
+            set_status(status="failed", result=result, error=result.get('error'), finished_at=datetime.utcnow())
+        self._remove_spool(job.file_path)
+
+    @staticmethod
+    def _remove_spool(path: Optional[str]):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+import_job_queue = ImportJobQueue()
@@ -0,0 +1,289 @@
+"""
+Receipt Storage
+
+Content-addressed storage for receipt files. Files are written in chunks,
+named by their SHA-256 digest and stored once, no matter how many
+transactions (web upload, Telegram, federation) reference them.
+
+Placing a file and releasing it take the same per-file advisory lock in
+the database transaction that commits the reference (or checks for one),
+so a release never removes a file that an upload has just deduplicated
+against.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB per read/write
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Leading bytes -> extension. The extension is part of the content
+# address, so it comes from the content, never from the upload's name.
+_SIGNATURES = (
+    (b"%PDF", ".pdf"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"II*\x00", ".tif"),
+    (b"MM\x00*", ".tif"),
+)
+
+
+class RangeNotSatisfiable(Exception):
+    """Range header that selects no byte of the file (416)"""
+
+
+class ReceiptStorage:
+    """Service for storing, releasing and serving receipt files"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.RECEIPTS_PATH)
+
+    def path_for(self, digest: str, extension: str) -> Path:
+        """Storage path for a digest: objects/ab/cd/<digest><ext>"""
+        return self.root / "objects" / digest[:2] / digest[2:4] / f"{digest}{extension}"
+
+    @staticmethod
+    def extension_for(head: bytes) -> str:
+        """Extension of the detected content type, '' if unknown"""
+        for signature, extension in _SIGNATURES:
+            if head.startswith(signature):
+                return extension
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return ".webp"
+        if head[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+            return ".heic"
+        return ""
+
+    @staticmethod
+    def lock_statement(path):
+        """
+        Transaction-level advisory lock on one stored file (by file name)
+
+        Execute it in the transaction that commits a reference to the file
+        or checks that none is left; works with sync and async sessions.
+        """
+        return select(func.pg_advisory_xact_lock(func.hashtext(f"receipt:{Path(path).name}")))
+
+    def spool(self, fileobj: BinaryIO) -> Tuple[str, Path]:
+        """
+        Hash a file object into a temp file (blocking, run off the event loop)
+
+        The target path depends on the content only (digest and detected
+        type), so the same bytes uploaded as scan.JPG and scan.jpg, or
+        under any other name, are stored once.
+
+        Args:
+            fileobj: Readable binary file object
+
+        Returns:
+            (temp file path, target path in the store); finish with place()
+        """
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        digest = hashlib.sha256()
+        head = b""
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := fileobj.read(CHUNK_SIZE):
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, self.path_for(digest.hexdigest(), self.extension_for(head))
+
+    def place(self, tmp_path: str, target: Path) -> Path:
+        """
+        Move a spooled file into the store (call with lock_statement held)
+
+        Returns:
+            target (the existing copy if the content is already stored)
+        """
+        try:
+            if target.exists():
+                # Same content already stored: keep the existing copy
+                os.remove(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+            return target
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def store_fileobj(self, fileobj: BinaryIO, db: Optional[Session] = None) -> Path:
+        """
+        Stream a file object into the store (blocking, run off the event loop)
+
+        Args:
+            fileobj: Readable binary file object
+            db: Session that will commit the reference; the file's lock is
+                taken in its transaction and held until that commit
+
+        Returns:
+            Path of the stored file (existing path if the content is known)
+        """
+        tmp_path, target = self.spool(fileobj)
+        if db is not None:
+            try:
+                db.execute(self.lock_statement(target))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return self.place(tmp_path, target)
+
+    def store_file(self, path: str, db: Optional[Session] = None) -> Path:
+        """Move a downloaded file into the store (source file is removed)"""
+        with open(path, "rb") as f:
+            target = self.store_fileobj(f, db)
+        os.remove(path)
+        return target
+
+    def store_bytes(self, data: bytes, db: Optional[Session] = None) -> Path:
+        """Store an in-memory attachment"""
+        from io import BytesIO
+        return self.store_fileobj(BytesIO(data), db)
+
+    def release(self, db: Session, path: Optional[str]):
+        """
+        Delete a receipt file once no transaction references it anymore
+
+        Call after the change that dropped the reference is committed.
+        Commits the session (ends the lock transaction).
+        """
+        if not path or not os.path.exists(path):
+            return
+
+        # Same lock as store: an upload that deduplicated against this file
+        # has either committed its reference already or waits for us
+        db.execute(self.lock_statement(path))
+        still_used = db.query(Transaction.id).filter(
+            Transaction.receipt_path == path
+        ).first()
+        if still_used is None and os.path.exists(path):
+            os.remove(path)
+        db.commit()
+
+    def etag_for(self, path: str) -> str:
+        """Strong ETag: the content digest, or size/mtime for legacy files"""
+        name = Path(path).stem
+        if _HASH_NAME.match(name):
+            return f'"{name}"'
+        stat = os.stat(path)
+        return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+    def response(self, path: str, request: Request) -> Response:
+        """
+        Serve a receipt with ETag revalidation and single byte-range support
+
+        Args:
+            path: Stored receipt path
+            request: Incoming request (If-None-Match, Range, If-Range)
+
+        Returns:
+            200 full file, 206 partial content, 304 not modified or 416
+        """
+        import mimetypes
+
+        size = os.path.getsize(path)
+        etag = self.etag_for(path)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (if_range is None or if_range == etag):
+            try:
+                byte_range = self._parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{size}"
+                return Response(status_code=416, headers=headers)
+
+        if byte_range is None:
+            start, end, status_code = 0, size - 1, 200
+        else:
+            (start, end), status_code = byte_range, 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            self._iter_file(path, start, end),
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers
+        )
+
+    @staticmethod
+    def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+        """
+        Parse a single 'bytes=' range
+
+        Returns:
+            (start, end), or None to serve the full file with 200
+            (multi-range requests, malformed headers)
+
+        Raises:
+            RangeNotSatisfiable: The range selects no byte of the file
+        """
+        if "," in header:
+            return None
+
+        match = _RANGE.match(header.strip())
+        if not match or match.groups() == ("", ""):
+            return None
+
+        first, last = match.groups()
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        if last and int(last) < start:
+            return None  # Invalid range-spec: ignored
+        if start >= size:
+            raise RangeNotSatisfiable()
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+
+    @staticmethod
+    def _iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+        remaining = end - start + 1
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
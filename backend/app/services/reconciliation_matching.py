@@ -0,0 +1,206 @@
+"""
+Reconciliation Candidate Index
+
+Finds the app transactions worth scoring against a bank row instead of
+scoring every pair. ReconciliationService._calculate_match_confidence
+gives 0 unless the amounts are within 0.01, and beyond DATE_WINDOW_DAYS
+a pair can only reach the 70 point threshold (50 amount + 20 description)
+with a description similarity of 1.0, i.e. equal similarity keys (see
+app.services.similarity). So the index only returns:
+
+- transactions within 0.01 and DATE_WINDOW_DAYS (amount bucket in cents,
+  sorted by date, bisected), and
+- transactions within 0.01 outside the window whose description key
+  equals the bank row's.
+
+Every candidate is still scored by the unchanged scorer, so matches are
+identical to comparing all pairs.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DATE_WINDOW_DAYS = 5  # Beyond this the scorer gives no date points
+AMOUNT_TOLERANCE = Decimal('0.01')
+
+
+def _cents_range(amount: Decimal) -> range:
+    """Cent values within the amount tolerance of amount"""
+    low = ((amount - AMOUNT_TOLERANCE) * 100).to_integral_value(rounding=ROUND_FLOOR)
+    high = ((amount + AMOUNT_TOLERANCE) * 100).to_integral_value(rounding=ROUND_CEILING)
+    return range(int(low), int(high) + 1)
+
+
+def _cents(amount) -> int:
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_FLOOR))
+
+
+class CandidateIndex:
+    """App transactions indexed by amount (cents) and date"""
+
+    def __init__(self, app_transactions: Sequence, description_key: Optional[Callable[[str], Hashable]] = None):
+        """
+        Args:
+            app_transactions: Transactions (id, date, amount, description);
+                positions in this sequence are what the lookups return
+            description_key: Similarity.key of the scorer's backend
+                (default: lower-cased description, as difflib)
+        """
+        self._key = description_key or str.lower
+        buckets: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        self._by_description: Dict[Tuple[int, Hashable], List[int]] = defaultdict(list)
+        self._ordinals: List[int] = []
+
+        for position, tx in enumerate(app_transactions):
+            cents = _cents(tx.amount)
+            ordinal = tx.date.toordinal()
+            self._ordinals.append(ordinal)
+            buckets[cents].append((ordinal, position))
+            key = self._key(tx.description) if tx.description else None
+            if key:
+                self._by_description[(cents, key)].append(position)
+
+        # Per amount: dates ascending (for bisect) and the matching positions
+        self._dates: Dict[int, List[int]] = {}
+        self._positions: Dict[int, List[int]] = {}
+        for cents, entries in buckets.items():
+            entries.sort()
+            self._dates[cents] = [ordinal for ordinal, _ in entries]
+            self._positions[cents] = [position for _, position in entries]
+
+    def near(self, bank_date: date, bank_amount: Decimal) -> Iterator[int]:
+        """Positions with a matching amount within DATE_WINDOW_DAYS"""
+        ordinal = bank_date.toordinal()
+        for cents in _cents_range(bank_amount):
+            dates = self._dates.get(cents)
+            if not dates:
+                continue
+            start = bisect_left(dates, ordinal - DATE_WINDOW_DAYS)
+            end = bisect_right(dates, ordinal + DATE_WINDOW_DAYS)
+            yield from self._positions[cents][start:end]
+
+    def far(self, bank_date: date, bank_amount: Decimal, bank_description: str) -> Iterator[int]:
+        """Positions with a matching amount and equal description key outside the window"""
+        key = self._key(bank_description) if bank_description else None
+        if not key:
+            return
+        ordinal = bank_date.toordinal()
+        for cents in _cents_range(bank_amount):
+            for position in self._by_description.get((cents, key), ()):
+                if abs(self._ordinals[position] - ordinal) > DATE_WINDOW_DAYS:
+                    yield position
+
+
+# Globally optimal assignment
+
+MATCH_THRESHOLD = 70  # Minimum confidence for a suggested match
+ASSIGNMENT_MAX_CELLS = 1_000_000  # Larger components keep the greedy result
+
+
+def connected_components(edges: Sequence[Tuple[int, int, int]]) -> List[List[Tuple[int, int, int]]]:
+    """
+    Split (bank_row, app_position, weight) edges into connected components
+    of the bipartite graph (union-find), in order of first appearance
+    """
+    parent: Dict[Tuple[str, int], Tuple[str, int]] = {}
+
+    def find(node):
+        root = node
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for row, position, _ in edges:
+        bank_root, app_root = find(('b', row)), find(('a', position))
+        if bank_root != app_root:
+            parent[app_root] = bank_root
+
+    components: Dict[Tuple[str, int], List] = {}
+    for edge in edges:
+        components.setdefault(find(('b', edge[0])), []).append(edge)
+    return list(components.values())
+
+
+def max_weight_matching(edges: Sequence[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+    """
+    Maximum total weight matching of one component (weights > 0)
+
+    Missing edges cost nothing, so the rectangular assignment problem over
+    the dense component matrix (Hungarian method, shortest augmenting
+    paths with potentials, rows vectorised with numpy) gives the optimal
+    matching; pairs assigned without an edge are left unmatched.
+
+    Returns:
+        (bank_row, app_position) pairs
+    """
+    rows = sorted({row for row, _, _ in edges})
+    cols = sorted({position for _, position, _ in edges})
+    row_index = {row: i for i, row in enumerate(rows)}
+    col_index = {position: j for j, position in enumerate(cols)}
+
+    cost = np.zeros((len(rows), len(cols)))
+    for row, position, weight in edges:
+        cost[row_index[row], col_index[position]] = -weight
+
+    transposed = len(rows) > len(cols)
+    if transposed:
+        cost = cost.T
+
+    pairs = []
+    for i, j in _min_cost_assignment(cost):
+        if cost[i, j] < 0:
+            if transposed:
+                i, j = j, i
+            pairs.append((rows[i], cols[j]))
+    return pairs
+
+
+def _min_cost_assignment(cost: np.ndarray) -> List[Tuple[int, int]]:
+    """Assign every row of an n x m cost matrix (n <= m) to a distinct column"""
+    n, m = cost.shape
+    a = np.zeros((n + 1, m + 1))
+    a[1:, 1:] = cost
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)  # p[j]: row assigned to column j (1-based, 0 = free)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            reduced = a[i0] - u[i0] - v
+            better = free & (reduced < minv)
+            minv[better] = reduced[better]
+            way[better] = j0
+
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return [(int(p[j]) - 1, j - 1) for j in range(1, m + 1) if p[j]]
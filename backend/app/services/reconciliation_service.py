@@ -4,20 +4,42 @@ Bank Reconciliation Service
 Service for comparing bank statements with application transactions.
 """
 
+from sqlalchemy import insert, update, delete, select, func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from decimal import Decimal
-import difflib
+from collections import Counter
+from itertools import chain
 
+from app.core.config import settings
 from app.models.reconciliation import BankReconciliation, ReconciliationMatch
 from app.models.transaction import Transaction
 from app.models.account import Account
+from app.services.balance_service import BalanceService
+from app.services.balance_checkpoints import (
+    REPORT_MAX_WINDOWS, bank_checkpoints, compare_checkpoints, in_windows, window_index
+)
+from app.services.reconciliation_matching import (
+    CandidateIndex, MATCH_THRESHOLD, ASSIGNMENT_MAX_CELLS, connected_components, max_weight_matching
+)
+from app.services.similarity import Similarity, get_similarity
+
+
+REPORT_MAX_CHANGES = 200  # Changed rows listed in the assignment report
 
 
 class ReconciliationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, similarity: Optional[Similarity] = None):
+        """
+        Args:
+            db: Database session
+            similarity: Description similarity backend (default: SIMILARITY_METHOD)
+        """
         self.db = db
+        self.similarity = similarity or get_similarity()
+        self.assignment_report: Optional[Dict[str, Any]] = None
+        self.refresh_report: Optional[Dict[str, Any]] = None
 
     def create_reconciliation(
         self,
@@ -25,7 +47,9 @@ class ReconciliationService:
         period_start: datetime,
         period_end: datetime,
         bank_transactions: List[Dict[str, Any]],
-        bank_balance: Optional[Decimal] = None
+        bank_balance: Optional[Decimal] = None,
+        assignment: str = "greedy",
+        balance_windows: bool = True
     ) -> BankReconciliation:
         """
         Create a new bank reconciliation session
@@ -35,11 +59,19 @@ class ReconciliationService:
             period_start: Start of reconciliation period
             period_end: End of reconciliation period
             bank_transactions: List of bank transactions from CSV
+                (with 'balance' where the statement has a running balance)
             bank_balance: Final balance from bank statement
+            assignment: Matching mode, "greedy" or "optimal"
+            balance_windows: Compare the statement's running balances with
+                the app's and only match inside the windows where they
+                diverge; rows and transactions in the other windows are
+                stored as "balanced"
 
         Returns:
             BankReconciliation object
         """
+        run_started = datetime.utcnow()
+
         # Get app transactions for the same period
         app_transactions = self.db.query(Transaction).filter(
             Transaction.account_id == account_id,
@@ -47,9 +79,9 @@ class ReconciliationService:
             Transaction.date <= period_end
         ).all()
 
-        # Calculate app balance
+        # Calculate app balance (opening balance + ledger)
         account = self.db.query(Account).filter(Account.id == account_id).first()
-        app_balance = account.balance if account else Decimal('0')
+        app_balance = BalanceService(self.db).get_balance(account) if account else Decimal('0')
 
         # Create reconciliation
         reconciliation = BankReconciliation(
@@ -60,121 +92,635 @@ class ReconciliationService:
             app_balance=app_balance,
             difference=bank_balance - app_balance if bank_balance else None,
             status="pending",
-            total_bank_transactions=len(bank_transactions)
+            total_bank_transactions=len(bank_transactions),
+            assignment_mode=assignment,
+            last_matched_at=run_started
         )
         self.db.add(reconciliation)
         self.db.flush()
 
+        # Running balance checkpoints: where bank and app flows agree
+        # between two checkpoints there is nothing to match
+        balanced_rows = []
+        comparison = self._compare_running_balances(account_id, bank_transactions) if balance_windows else None
+        if comparison:
+            windows = comparison['balanced']
+            balanced_bank = [tx for tx in bank_transactions if in_windows(tx['date'], windows)]
+            balanced_app = [tx for tx in app_transactions if in_windows(tx.date, windows)]
+            bank_transactions = [tx for tx in bank_transactions if not in_windows(tx['date'], windows)]
+            app_transactions = [tx for tx in app_transactions if not in_windows(tx.date, windows)]
+            balanced_rows = self._balanced_rows(reconciliation.id, balanced_bank, balanced_app)
+            reconciliation.balance_report = {
+                'checkpoints': comparison['checkpoints'],
+                'first_checkpoint': comparison['first'].isoformat(),
+                'last_checkpoint': comparison['last'].isoformat(),
+                'opening_difference': comparison['opening_difference'],
+                'closing_difference': comparison['closing_difference'],
+                'balanced_windows': [[start.isoformat(), end.isoformat()] for start, end in windows],
+                'divergent_window_count': len(comparison['divergent']),
+                'divergent_windows': comparison['divergent'][:REPORT_MAX_WINDOWS],
+                'balanced_bank_rows': len(balanced_bank),
+                'balanced_app_transactions': len(balanced_app),
+                'matched_bank_rows': len(bank_transactions),
+            }
+
         # Match transactions
         matches = self._match_transactions(
             reconciliation_id=reconciliation.id,
             bank_transactions=bank_transactions,
-            app_transactions=app_transactions
+            app_transactions=app_transactions,
+            assignment=assignment
         )
-
-        # Add matches to database
-        for match in matches:
-            self.db.add(match)
+        reconciliation.assignment_report = self.assignment_report
+        matches += balanced_rows
+
+        # Add matches to database: batched multi-row INSERTs, no ORM objects
+        if matches:
+            self.db.execute(
+                insert(ReconciliationMatch).execution_options(
+                    insertmanyvalues_page_size=max(settings.IMPORT_BATCH_SIZE, 1)
+                ),
+                matches
+            )
 
         # Update statistics
-        reconciliation.matched_count = sum(1 for m in matches if m.match_status == "matched")
-        reconciliation.unmatched_bank_count = sum(1 for m in matches if m.match_status == "unmatched_bank")
-        reconciliation.unmatched_app_count = sum(1 for m in matches if m.match_status == "unmatched_app")
+        reconciliation.matched_count = sum(1 for m in matches if m['match_status'] == "matched")
+        reconciliation.unmatched_bank_count = sum(1 for m in matches if m['match_status'] == "unmatched_bank")
+        reconciliation.unmatched_app_count = sum(1 for m in matches if m['match_status'] == "unmatched_app")
 
         self.db.commit()
         self.db.refresh(reconciliation)
 
         return reconciliation
 
-    def _match_transactions(
-        self,
+    def _compare_running_balances(self, account_id: int, bank_transactions: List[Dict[str, Any]]) -> Optional[Dict]:
+        """
+        Compare the statement's end-of-day balances with the account's
+        running balance (two aggregate queries)
+
+        Returns:
+            compare_checkpoints() result plus 'checkpoints' (count), or None
+            if the statement has fewer than two checkpoints
+        """
+        checkpoints = bank_checkpoints(bank_transactions)
+        if len(checkpoints) < 2:
+            return None
+
+        days = list(checkpoints)
+        app_base = self.db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
+            Transaction.account_id == account_id,
+            Transaction.date <= days[0]
+        ).scalar()
+        app_daily = dict(self.db.query(Transaction.date, func.sum(Transaction.amount)).filter(
+            Transaction.account_id == account_id,
+            Transaction.date > days[0],
+            Transaction.date <= days[-1]
+        ).group_by(Transaction.date).all())
+
+        comparison = compare_checkpoints(checkpoints, Decimal(app_base), app_daily)
+        comparison['checkpoints'] = len(checkpoints)
+        return comparison
+
+    @staticmethod
+    def _balanced_rows(
         reconciliation_id: int,
         bank_transactions: List[Dict[str, Any]],
         app_transactions: List[Transaction]
-    ) -> List[ReconciliationMatch]:
+    ) -> List[Dict[str, Any]]:
+        """Match rows for bank rows and app transactions in balanced windows"""
+        rows = [
+            {
+                'reconciliation_id': reconciliation_id,
+                'transaction_id': None,
+                'bank_date': bank_tx['date'],
+                'bank_amount': Decimal(str(bank_tx['amount'])),
+                'bank_description': bank_tx.get('description', ''),
+                'bank_reference': bank_tx.get('reference', ''),
+                'match_status': "balanced",
+                'match_confidence': 0,
+                'match_type': None,
+            }
+            for bank_tx in bank_transactions
+        ]
+        rows += [
+            {
+                'reconciliation_id': reconciliation_id,
+                'transaction_id': app_tx.id,
+                'bank_date': app_tx.date,
+                'bank_amount': Decimal(str(app_tx.amount)),
+                'bank_description': "",
+                'bank_reference': None,
+                'match_status': "balanced",
+                'match_confidence': 0,
+                'match_type': None,
+            }
+            for app_tx in app_transactions
+        ]
+        return rows
+
+    def refresh_reconciliation(
+        self,
+        reconciliation_id: int,
+        bank_transactions: Optional[List[Dict[str, Any]]] = None,
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None,
+        bank_balance: Optional[Decimal] = None
+    ) -> BankReconciliation:
         """
-        Match bank transactions with app transactions
+        Extend/refresh a reconciliation instead of rebuilding it
+
+        Matches the user already resolved (action set) and bank rows in
+        balanced windows are kept as they are. Rescored are only the open
+        bank rows: statement rows not in
+        the reconciliation yet, unresolved unmatched bank rows, and
+        unresolved matches whose transaction was created or updated
+        (Transaction.updated_at) since the last run or left the period.
+        They are matched against the app transactions not taken by a
+        kept match. Counters are updated by the difference.
+
+        A balanced window stays balanced while its flows are unchanged:
+        edits that keep a transaction's date and amount (category,
+        description) don't touch it. Otherwise (amount/date changed,
+        transaction deleted, moved in or added, new statement row) the
+        window is reopened: its bank rows are rescored and its
+        transactions go back into the pool.
+
+        Args:
+            reconciliation_id: ID of the reconciliation
+            bank_transactions: Statement rows; rows already in the
+                reconciliation (same date, amount, description, reference)
+                are skipped, so the whole statement can be uploaded again.
+                New rows are always matched (no balance windows)
+            period_start: Earlier period start (only widens the period)
+            period_end: Later period end (only widens the period)
+            bank_balance: New final balance from the bank statement
 
         Returns:
-            List of ReconciliationMatch objects
+            BankReconciliation object; self.refresh_report has the numbers
         """
-        matches = []
-        used_app_transactions = set()
+        reconciliation = self.db.query(BankReconciliation).filter(
+            BankReconciliation.id == reconciliation_id
+        ).first()
 
-        # Try to match each bank transaction
-        for bank_tx in bank_transactions:
-            bank_date = bank_tx['date']
-            bank_amount = Decimal(str(bank_tx['amount']))
-            bank_description = bank_tx.get('description', '')
+        if not reconciliation:
+            raise ValueError(f"Reconciliation {reconciliation_id} not found")
+        if reconciliation.status == "completed":
+            raise ValueError("Completed reconciliations can't be refreshed")
+
+        run_started = datetime.utcnow()
+        last_run = reconciliation.last_matched_at or reconciliation.created_at
+        if period_start and period_start < reconciliation.period_start:
+            reconciliation.period_start = period_start
+        if period_end and period_end > reconciliation.period_end:
+            reconciliation.period_end = period_end
+
+        rows = self.db.query(
+            ReconciliationMatch.id, ReconciliationMatch.transaction_id, ReconciliationMatch.bank_date,
+            ReconciliationMatch.bank_amount, ReconciliationMatch.bank_description,
+            ReconciliationMatch.bank_reference, ReconciliationMatch.match_status, ReconciliationMatch.action
+        ).filter(ReconciliationMatch.reconciliation_id == reconciliation_id).all()
+
+        # Statement rows not in the reconciliation yet (per occurrence)
+        known = Counter(self._bank_key(row.bank_date, row.bank_amount, row.bank_description, row.bank_reference)
+                        for row in rows if row.match_status != "unmatched_app")
+        new_bank = []
+        for bank_tx in bank_transactions or []:
+            key = self._bank_key(bank_tx['date'], bank_tx['amount'], bank_tx.get('description'), bank_tx.get('reference'))
+            if known[key]:
+                known[key] -= 1
+            else:
+                new_bank.append(bank_tx)
+
+        # Transactions in the period: changed since the last run or not in
+        # the reconciliation yet, and which referenced ones are still there
+        in_period = [
+            Transaction.account_id == reconciliation.account_id,
+            Transaction.date >= reconciliation.period_start,
+            Transaction.date <= reconciliation.period_end
+        ]
+        referenced = select(ReconciliationMatch.transaction_id).where(
+            ReconciliationMatch.reconciliation_id == reconciliation_id,
+            ReconciliationMatch.transaction_id.isnot(None)
+        )
+        changed = self.db.query(Transaction).filter(
+            *in_period,
+            (Transaction.updated_at > last_run) | Transaction.id.not_in(referenced)
+        ).all()
+        still_in_period = {
+            tx_id for (tx_id,) in self.db.query(Transaction.id).filter(*in_period, Transaction.id.in_(referenced))
+        }
+        changed_ids = {tx.id for tx in changed}
+
+        # Balanced windows whose flows changed since the last run
+        report = reconciliation.balance_report or {}
+        windows = [
+            (datetime.fromisoformat(start).date(), datetime.fromisoformat(end).date())
+            for start, end in report.get('balanced_windows', [])
+        ]
+        changed_by_id = {tx.id: tx for tx in changed}
+        balanced_tx_ids = set()
+        reopened = set()
+        for row in rows:
+            if row.action is not None or row.match_status != "balanced" or row.transaction_id is None:
+                continue
+            balanced_tx_ids.add(row.transaction_id)
+            tx = changed_by_id.get(row.transaction_id)
+            if row.transaction_id not in still_in_period or (
+                tx is not None and (tx.date != self._as_date(row.bank_date) or tx.amount != row.bank_amount)
+            ):
+                reopened.add(window_index(self._as_date(row.bank_date), windows))
+        for tx in changed:
+            if tx.id not in balanced_tx_ids:
+                reopened.add(window_index(tx.date, windows))
+        for bank_tx in new_bank:
+            reopened.add(window_index(self._as_date(bank_tx['date']), windows))
+        reopened.discard(None)
+
+        resolved_tx_ids = {row.transaction_id for row in rows if row.action is not None and row.transaction_id}
+        open_bank_rows = []  # Unresolved bank rows to rescore
+        kept_tx_ids = set(resolved_tx_ids)  # Taken by kept matches
+        unmatched_app_rows = {}  # transaction_id -> unresolved unmatched_app row
+        stale_balanced_ids = []  # Balanced app rows of reopened windows (or whose transaction is gone)
+        reopened_tx_ids = []  # Unchanged transactions of reopened windows
+        for row in rows:
+            if row.action is not None:
+                continue
+            if row.match_status == "balanced":
+                window = window_index(self._as_date(row.bank_date), windows)
+                if window is not None and window not in reopened:
+                    if row.transaction_id is not None:
+                        kept_tx_ids.add(row.transaction_id)
+                elif row.transaction_id is None:
+                    open_bank_rows.append(row)
+                else:
+                    stale_balanced_ids.append(row.id)
+                    if row.transaction_id in still_in_period and row.transaction_id not in changed_ids:
+                        reopened_tx_ids.append(row.transaction_id)
+            elif row.match_status == "unmatched_app":
+                unmatched_app_rows[row.transaction_id] = row
+            elif row.match_status == "matched" and (
+                row.transaction_id not in changed_ids
+                and row.transaction_id in still_in_period
+                and row.transaction_id not in resolved_tx_ids
+            ):
+                kept_tx_ids.add(row.transaction_id)
+            else:
+                open_bank_rows.append(row)
+
+        # Free transactions: changed ones, those still unmatched and
+        # those of reopened windows
+        unchanged_unmatched = [
+            tx_id for tx_id in unmatched_app_rows
+            if tx_id not in changed_ids and tx_id in still_in_period and tx_id not in kept_tx_ids
+        ]
+        app_pool = [tx for tx in changed if tx.id not in kept_tx_ids]
+        if unchanged_unmatched or reopened_tx_ids:
+            app_pool += self.db.query(Transaction).filter(
+                Transaction.id.in_(unchanged_unmatched + reopened_tx_ids)
+            ).all()
+        app_pool.sort(key=lambda tx: (tx.date, tx.id))
+
+        if reopened:
+            reconciliation.balance_report = {
+                **report,
+                'balanced_windows': [
+                    [start.isoformat(), end.isoformat()]
+                    for index, (start, end) in enumerate(windows) if index not in reopened
+                ],
+                'reopened_window_count': report.get('reopened_window_count', 0) + len(reopened),
+            }
 
-            # Find best match
-            best_match = None
-            best_confidence = 0
+        bank_pool = [
+            {
+                'date': self._as_date(row.bank_date),
+                'amount': row.bank_amount,
+                'description': row.bank_description or '',
+                'reference': row.bank_reference or ''
+            }
+            for row in open_bank_rows
+        ] + new_bank
+        matches = self._match_transactions(
+            reconciliation_id=reconciliation.id,
+            bank_transactions=bank_pool,
+            app_transactions=app_pool,
+            assignment=reconciliation.assignment_mode or "greedy"
+        )
 
-            for app_tx in app_transactions:
-                if app_tx.id in used_app_transactions:
-                    continue
+        delta = Counter()
+        updates = []
+        inserts = []
+        for row, match in zip(open_bank_rows, matches):
+            delta[row.match_status] -= 1
+            delta[match['match_status']] += 1
+            updates.append({
+                'id': row.id,
+                'transaction_id': match['transaction_id'],
+                'match_status': match['match_status'],
+                'match_confidence': match['match_confidence'],
+                'match_type': match['match_type']
+            })
+        for match in matches[len(open_bank_rows):len(bank_pool)]:
+            delta[match['match_status']] += 1
+            inserts.append(match)
+        for match in matches[len(bank_pool):]:
+            existing = unmatched_app_rows.pop(match['transaction_id'], None)
+            if existing is not None:
+                # Still unmatched: keep the row, refresh the transaction's date/amount
+                updates.append({'id': existing.id, 'bank_date': match['bank_date'], 'bank_amount': match['bank_amount']})
+            else:
+                delta["unmatched_app"] += 1
+                inserts.append(match)
+        # Remaining unresolved unmatched_app rows: matched now, resolved elsewhere or gone
+        stale_ids = [row.id for row in unmatched_app_rows.values()]
+        delta["unmatched_app"] -= len(stale_ids)
+        stale_ids += stale_balanced_ids
+
+        if updates:
+            self.db.execute(update(ReconciliationMatch), updates)
+        if inserts:
+            self.db.execute(
+                insert(ReconciliationMatch).execution_options(
+                    insertmanyvalues_page_size=max(settings.IMPORT_BATCH_SIZE, 1)
+                ),
+                inserts
+            )
+        if stale_ids:
+            self.db.execute(
+                delete(ReconciliationMatch).where(ReconciliationMatch.id.in_(stale_ids)),
+                execution_options={'synchronize_session': False}
+            )
 
-                match_result = self._calculate_match_confidence(
-                    bank_date=bank_date,
-                    bank_amount=bank_amount,
-                    bank_description=bank_description,
-                    app_tx=app_tx
-                )
+        reconciliation.total_bank_transactions = (reconciliation.total_bank_transactions or 0) + len(new_bank)
+        reconciliation.matched_count = (reconciliation.matched_count or 0) + delta["matched"]
+        reconciliation.unmatched_bank_count = (reconciliation.unmatched_bank_count or 0) + delta["unmatched_bank"]
+        reconciliation.unmatched_app_count = (reconciliation.unmatched_app_count or 0) + delta["unmatched_app"]
+        if self.assignment_report is not None:
+            reconciliation.assignment_report = self.assignment_report
+        if bank_balance is not None:
+            account = self.db.query(Account).filter(Account.id == reconciliation.account_id).first()
+            reconciliation.bank_balance = bank_balance
+            reconciliation.app_balance = BalanceService(self.db).get_balance(account) if account else Decimal('0')
+            reconciliation.difference = bank_balance - reconciliation.app_balance
+        reconciliation.last_matched_at = run_started
+
+        self.refresh_report = {
+            'new_bank_rows': len(new_bank),
+            'skipped_bank_rows': len(bank_transactions or []) - len(new_bank),
+            'changed_transactions': len(changed_ids),
+            'reopened_windows': len(reopened),
+            'rescored_bank_rows': len(bank_pool),
+            'candidate_transactions': len(app_pool),
+            'newly_matched': sum(1 for match in matches[:len(bank_pool)] if match['match_status'] == "matched"),
+        }
+
+        self.db.commit()
+        self.db.refresh(reconciliation)
 
-                if match_result['confidence'] > best_confidence:
-                    best_confidence = match_result['confidence']
-                    best_match = (app_tx, match_result['type'])
+        return reconciliation
 
-            # Create match record
-            if best_match and best_confidence >= 70:  # 70% threshold for automatic suggestion
-                app_tx, match_type = best_match
-                used_app_transactions.add(app_tx.id)
+    @staticmethod
+    def _as_date(value):
+        """bank_date is stored as DateTime; statement rows carry dates"""
+        return value.date() if isinstance(value, datetime) else value
 
-                match = ReconciliationMatch(
-                    reconciliation_id=reconciliation_id,
+    @staticmethod
+    def _bank_key(bank_date, amount, description, reference) -> Tuple:
+        """Identity of a statement row, for skipping rows already reconciled"""
+        if isinstance(bank_date, datetime):
+            bank_date = bank_date.date()
+        return bank_date, Decimal(str(amount)), description or '', reference or ''
+
+    def _match_transactions(
+        self,
+        reconciliation_id: int,
+        bank_transactions: List[Dict[str, Any]],
+        app_transactions: List[Transaction],
+        assignment: str = "greedy"
+    ) -> List[Dict[str, Any]]:
+        """
+        Match bank transactions with app transactions
+
+        Args:
+            assignment: "greedy" (each bank row takes its best unused app
+                transaction, in statement order) or "optimal" (maximum
+                total confidence, see _optimal_assignment)
+
+        Returns:
+            ReconciliationMatch rows (column dicts, bank rows in statement
+            order, then unmatched app transactions); in optimal mode
+            self.assignment_report describes the differences to greedy
+        """
+        index = CandidateIndex(app_transactions, self.similarity.key)
+        bank_rows = [
+            (bank_tx['date'], Decimal(str(bank_tx['amount'])), bank_tx.get('description', ''))
+            for bank_tx in bank_transactions
+        ]
+
+        chosen = self._greedy_assignment(bank_rows, app_transactions, index)
+        self.assignment_report = None
+        if assignment == "optimal":
+            greedy = chosen
+            chosen, self.assignment_report = self._optimal_assignment(bank_rows, app_transactions, index, greedy)
+
+        matches = []
+        used_app_transactions = set()
+        for bank_tx, (bank_date, bank_amount, bank_description), best in zip(bank_transactions, bank_rows, chosen):
+            match = {
+                'reconciliation_id': reconciliation_id,
+                'transaction_id': None,
+                'bank_date': bank_date,
+                'bank_amount': bank_amount,
+                'bank_description': bank_description,
+                'bank_reference': bank_tx.get('reference', ''),
+                'match_status': "unmatched_bank",  # Unmatched bank transaction
+                'match_confidence': 0,
+                'match_type': None,
+            }
+            if best is not None:
+                position, best_confidence, match_type = best
+                app_tx = app_transactions[position]
+                used_app_transactions.add(app_tx.id)
+                match.update(
                     transaction_id=app_tx.id,
-                    bank_date=bank_date,
-                    bank_amount=bank_amount,
-                    bank_description=bank_description,
-                    bank_reference=bank_tx.get('reference', ''),
                     match_status="matched",
                     match_confidence=best_confidence,
                     match_type=match_type
                 )
-            else:
-                # Unmatched bank transaction
-                match = ReconciliationMatch(
-                    reconciliation_id=reconciliation_id,
-                    transaction_id=None,
-                    bank_date=bank_date,
-                    bank_amount=bank_amount,
-                    bank_description=bank_description,
-                    bank_reference=bank_tx.get('reference', ''),
-                    match_status="unmatched_bank",
-                    match_confidence=0,
-                    match_type=None
-                )
 
             matches.append(match)
 
         # Add unmatched app transactions
         for app_tx in app_transactions:
             if app_tx.id not in used_app_transactions:
-                match = ReconciliationMatch(
-                    reconciliation_id=reconciliation_id,
-                    transaction_id=app_tx.id,
-                    bank_date=app_tx.date,
-                    bank_amount=Decimal(str(app_tx.amount)),
-                    bank_description="",
-                    match_status="unmatched_app",
-                    match_confidence=0,
-                    match_type=None
-                )
-                matches.append(match)
+                matches.append({
+                    'reconciliation_id': reconciliation_id,
+                    'transaction_id': app_tx.id,
+                    'bank_date': app_tx.date,
+                    'bank_amount': Decimal(str(app_tx.amount)),
+                    'bank_description': "",
+                    'bank_reference': None,
+                    'match_status': "unmatched_app",
+                    'match_confidence': 0,
+                    'match_type': None,
+                })
 
         return matches
 
+    def _greedy_assignment(
+        self,
+        bank_rows: List[Tuple],
+        app_transactions: List[Transaction],
+        index: CandidateIndex
+    ) -> List[Optional[Tuple[int, int, str]]]:
+        """
+        Best unused app transaction per bank row, in statement order
+
+        Returns:
+            Per bank row (app position, confidence, match type) or None
+        """
+        chosen = []
+        used_app_transactions = set()
+
+        # Try to match each bank transaction
+        for bank_date, bank_amount, bank_description in bank_rows:
+            # Find best match among the indexed candidates; ties go to the
+            # earlier app transaction, as when scanning all of them in order
+            best_match = None
+            best_confidence = 0
+            best_position = None
+
+            def consider(positions):
+                nonlocal best_match, best_confidence, best_position
+                for position in positions:
+                    app_tx = app_transactions[position]
+                    if app_tx.id in used_app_transactions:
+                        continue
+
+                    match_result = self._calculate_match_confidence(
+                        bank_date=bank_date,
+                        bank_amount=bank_amount,
+                        bank_description=bank_description,
+                        app_tx=app_tx
+                    )
+
+                    confidence = match_result['confidence']
+                    if confidence > best_confidence or (
+                        confidence == best_confidence and confidence and position < best_position
+                    ):
+                        best_confidence = confidence
+                        best_match = (position, match_result['type'])
+                        best_position = position
+
+            consider(index.near(bank_date, bank_amount))
+            if best_confidence <= MATCH_THRESHOLD:
+                # Outside the date window only a similarity of 1.0 reaches 70
+                consider(index.far(bank_date, bank_amount, bank_description))
+
+            if best_match and best_confidence >= MATCH_THRESHOLD:  # 70% threshold for automatic suggestion
+                position, match_type = best_match
+                used_app_transactions.add(app_transactions[position].id)
+                chosen.append((position, best_confidence, match_type))
+            else:
+                chosen.append(None)
+
+        return chosen
+
+    def _optimal_assignment(
+        self,
+        bank_rows: List[Tuple],
+        app_transactions: List[Transaction],
+        index: CandidateIndex,
+        greedy: List[Optional[Tuple[int, int, str]]]
+    ) -> Tuple[List[Optional[Tuple[int, int, str]]], Dict[str, Any]]:
+        """
+        Assignment with maximum total confidence
+
+        Builds the sparse bipartite graph of all pairs scoring at least the
+        threshold, splits it into connected components and solves each one
+        exactly. Among assignments with equal total confidence the one
+        closest to the greedy result wins, so only real improvements show
+        up as changes. Components above ASSIGNMENT_MAX_CELLS keep the
+        greedy result.
+
+        Returns:
+            (per bank row (app position, confidence, match type) or None,
+             report comparing the result with greedy)
+        """
+        scores = {}
+        for row, (bank_date, bank_amount, bank_description) in enumerate(bank_rows):
+            positions = chain(
+                index.near(bank_date, bank_amount),
+                index.far(bank_date, bank_amount, bank_description)
+            )
+            for position in positions:
+                match_result = self._calculate_match_confidence(
+                    bank_date=bank_date,
+                    bank_amount=bank_amount,
+                    bank_description=bank_description,
+                    app_tx=app_transactions[position]
+                )
+                if match_result['confidence'] >= MATCH_THRESHOLD:
+                    scores[(row, position)] = (match_result['confidence'], match_result['type'])
+
+        greedy_pairs = {(row, best[0]) for row, best in enumerate(greedy) if best is not None}
+        chosen = list(greedy)
+        components = connected_components([(row, position, 0) for row, position in scores])
+        fallback_components = 0
+        largest_component = 0
+
+        for component in components:
+            rows = {row for row, _, _ in component}
+            positions = {position for _, position, _ in component}
+            largest_component = max(largest_component, len(rows) + len(positions))
+            if len(rows) * len(positions) > ASSIGNMENT_MAX_CELLS:
+                fallback_components += 1
+                continue
+
+            # Confidence first, agreement with greedy as tie-breaker
+            scale = min(len(rows), len(positions)) + 1
+            weighted = [
+                (row, position, scores[(row, position)][0] * scale + ((row, position) in greedy_pairs))
+                for row, position, _ in component
+            ]
+            for row in rows:
+                chosen[row] = None
+            for row, position in max_weight_matching(weighted):
+                confidence, match_type = scores[(row, position)]
+                chosen[row] = (position, confidence, match_type)
+
+        def summary(assignment):
+            picked = [best for best in assignment if best is not None]
+            return {'matched': len(picked), 'total_confidence': sum(best[1] for best in picked)}
+
+        changes = []
+        for row, (before, after) in enumerate(zip(greedy, chosen)):
+            if before == after:
+                continue
+            bank_date, bank_amount, bank_description = bank_rows[row]
+            changes.append({
+                'bank_row': row,
+                'bank_date': bank_date.isoformat(),
+                'bank_amount': float(bank_amount),
+                'bank_description': bank_description,
+                'greedy_transaction_id': app_transactions[before[0]].id if before else None,
+                'greedy_confidence': before[1] if before else 0,
+                'optimal_transaction_id': app_transactions[after[0]].id if after else None,
+                'optimal_confidence': after[1] if after else 0,
+            })
+
+        report = {
+            'mode': 'optimal',
+            'candidate_pairs': len(scores),
+            'components': len(components),
+            'largest_component': largest_component,
+            'greedy_fallback_components': fallback_components,
+            'greedy': summary(greedy),
+            'optimal': summary(chosen),
+            'changed_rows': len(changes),
+            'changes': changes[:REPORT_MAX_CHANGES],
+        }
+        return chosen, report
+
     def _calculate_match_confidence(
         self,
         bank_date: datetime,
@@ -212,12 +758,9 @@ class ReconciliationService:
             confidence += 5  # Within 5 days
 
         # Check description similarity
+        similarity = 0.0
         if bank_description and app_description:
-            similarity = difflib.SequenceMatcher(
-                None,
-                bank_description.lower(),
-                app_description.lower()
-            ).ratio()
+            similarity = self.similarity.score(bank_description, app_description)
 
             confidence += int(similarity * 20)  # Up to 20 points for description
 
@@ -327,8 +870,33 @@ class ReconciliationService:
 
         return reconciliation
 
-    def get_reconciliation_with_matches(self, reconciliation_id: int) -> Dict[str, Any]:
-        """Get reconciliation with all matches"""
+    def get_reconciliation_with_matches(
+        self,
+        reconciliation_id: int,
+        status: Optional[str] = None,
+        min_confidence: Optional[int] = None,
+        max_confidence: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Get reconciliation with one page of its matches
+
+        The linked transactions come from the same query (LEFT JOIN), not
+        one lazy load per match.
+
+        Args:
+            reconciliation_id: ID of the reconciliation
+            status: Only matches with this match_status
+            min_confidence: Only matches with at least this confidence
+            max_confidence: Only matches with at most this confidence
+            skip: Matches to skip (ordered by id)
+            limit: Page size
+
+        Returns:
+            Reconciliation fields, 'matches' (this page) and 'matches_total'
+            (all matches passing the filters)
+        """
         reconciliation = self.db.query(BankReconciliation).filter(
             BankReconciliation.id == reconciliation_id
         ).first()
@@ -336,9 +904,31 @@ class ReconciliationService:
         if not reconciliation:
             raise ValueError(f"Reconciliation {reconciliation_id} not found")
 
+        query = self.db.query(ReconciliationMatch).filter(
+            ReconciliationMatch.reconciliation_id == reconciliation_id
+        )
+        if status:
+            query = query.filter(ReconciliationMatch.match_status == status)
+        if min_confidence is not None:
+            query = query.filter(ReconciliationMatch.match_confidence >= min_confidence)
+        if max_confidence is not None:
+            query = query.filter(ReconciliationMatch.match_confidence <= max_confidence)
+        matches_total = query.count()
+
+        rows = query.outerjoin(
+            Transaction, ReconciliationMatch.transaction_id == Transaction.id
+        ).with_entities(
+            ReconciliationMatch,
+            Transaction.id.label('tx_id'),
+            Transaction.date.label('tx_date'),
+            Transaction.amount.label('tx_amount'),
+            Transaction.description.label('tx_description'),
+            Transaction.category.label('tx_category')
+        ).order_by(ReconciliationMatch.id).offset(skip).limit(limit).all()
+
         # Get matches with transaction details
         matches_data = []
-        for match in reconciliation.matches:
+        for match, tx_id, tx_date, tx_amount, tx_description, tx_category in rows:
             match_dict = {
                 'id': match.id,
                 'bank_date': match.bank_date.isoformat(),
@@ -353,13 +943,13 @@ class ReconciliationService:
                 'transaction': None
             }
 
-            if match.transaction:
+            if tx_id is not None:
                 match_dict['transaction'] = {
-                    'id': match.transaction.id,
-                    'date': match.transaction.date.isoformat(),
-                    'amount': float(match.transaction.amount),
-                    'description': match.transaction.description,
-                    'category': match.transaction.category
+                    'id': tx_id,
+                    'date': tx_date.isoformat(),
+                    'amount': float(tx_amount),
+                    'description': tx_description,
+                    'category': tx_category
                 }
 
             matches_data.append(match_dict)
@@ -377,7 +967,13 @@ class ReconciliationService:
             'matched_count': reconciliation.matched_count,
             'unmatched_bank_count': reconciliation.unmatched_bank_count,
             'unmatched_app_count': reconciliation.unmatched_app_count,
+            'assignment_mode': reconciliation.assignment_mode,
+            'assignment_report': reconciliation.assignment_report,
+            'balance_report': reconciliation.balance_report,
             'created_at': reconciliation.created_at.isoformat(),
             'completed_at': reconciliation.completed_at.isoformat() if reconciliation.completed_at else None,
-            'matches': matches_data
+            'matches': matches_data,
+            'matches_total': matches_total,
+            'skip': skip,
+            'limit': limit
         }
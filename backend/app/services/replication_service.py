@@ -1,47 +1,86 @@
 import asyncio
 import json
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-import httpx
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import and_, select, delete, tuple_, text, literal_column, Date, DateTime, Numeric
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal
+from app.core.http_client import get_http_client
 from app.models.replication import MirrorInstance, SyncLog, ConflictResolution
+from app.models.change_log import ChangeLog, ChangeLogPrune
 from app.models.transaction import Transaction
 from app.models.account import Account
 from app.federation.crypto import sign_data, verify_signature, get_public_key_pem
 
+ENTITY_MODELS = {"transaction": Transaction, "account": Account}
+
+# Oldest transaction still running. Log entries of older transactions are
+# final: none can show up behind a cursor once it has passed them.
+SNAPSHOT_HORIZON = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Change log cursor "txid:seq" -> (txid, seq); empty = start of the log"""
+    if not cursor:
+        return 0, 0
+    txid, seq = cursor.split(":")
+    return int(txid), int(seq)
+
+
+def format_cursor(txid: int, seq: int) -> str:
+    return f"{txid}:{seq}"
+
+
+class ChangeLogGapError(Exception):
+    """The change log was pruned past a cursor: the reader needs a full resync"""
+
 
 class ReplicationService:
     """Service for bidirectional replication between mirror instances"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, session_factory: async_sessionmaker = AsyncSessionLocal):
         self.db = db
+        self.session_factory = session_factory
 
     async def sync_all_mirrors(self) -> Dict[str, Any]:
         """
         Sync with all enabled mirror instances
 
+        Up to REPLICATION_MAX_CONCURRENT_SYNCS mirrors run at once, each in
+        its own DB session, so a slow mirror no longer delays the others
+        and the mirrors' transactions stay isolated.
+
         Returns:
             Dict with sync statistics
         """
-        mirrors = self.db.query(MirrorInstance).filter(
-            MirrorInstance.sync_enabled == True
-        ).all()
+        result = await self.db.execute(
+            select(MirrorInstance.id)
+            .where(MirrorInstance.sync_enabled == True)
+            .order_by(MirrorInstance.priority, MirrorInstance.id)
+        )
+        mirror_ids = result.scalars().all()
 
-        if not mirrors:
+        if not mirror_ids:
             return {"message": "No mirror instances configured", "synced_count": 0}
 
-        results = []
-        for mirror in mirrors:
-            try:
-                result = await self.sync_with_mirror(mirror)
-                results.append(result)
-            except Exception as e:
-                self.log_sync_error(mirror, str(e))
-                results.append({"mirror": mirror.instance_id, "status": "error", "error": str(e)})
+        semaphore = asyncio.Semaphore(max(settings.REPLICATION_MAX_CONCURRENT_SYNCS, 1))
+
+        async def sync_one(mirror_id: int) -> Dict[str, Any]:
+            async with semaphore, self.session_factory() as db:
+                service = ReplicationService(db, self.session_factory)
+                mirror = await db.get(MirrorInstance, mirror_id)
+                try:
+                    return await service.sync_with_mirror(mirror)
+                except Exception as e:
+                    await service.log_sync_error(mirror, str(e))
+                    return {"mirror": mirror.instance_id, "status": "error", "error": str(e)}
+
+        results = await asyncio.gather(*(sync_one(mirror_id) for mirror_id in mirror_ids))
+
+        await self.prune_change_log()
 
         return {
             "synced_count": len([r for r in results if r.get("status") == "success"]),
@@ -75,84 +114,181 @@ class ReplicationService:
 
             # Update last sync time
             mirror.last_sync = datetime.utcnow()
-            self.db.commit()
+            await self.db.commit()
 
             return {"mirror": mirror.instance_id, "status": "success", **stats}
 
         except Exception as e:
             return {"mirror": mirror.instance_id, "status": "error", "error": str(e)}
 
+    async def collect_changes(
+        self,
+        cursor: Optional[str],
+        exclude_origin: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Read the next batch of change log entries after a cursor
+
+        Entries are ordered by (txid, seq) and read only up to the oldest
+        running transaction, so a transaction committing later can never
+        land behind the returned cursor. The payload carries the current
+        state of each changed entity; entities that no longer exist are
+        listed as deleted.
+
+        Args:
+            cursor: Position after the last entry read ("txid:seq", None = start)
+            exclude_origin: Skip changes replicated from this instance (no echo)
+            limit: Max log entries per batch (default REPLICATION_BATCH_SIZE)
+
+        Returns:
+            Dict with transactions, accounts, deleted, cursor and has_more
+
+        Raises:
+            ChangeLogGapError: Entries after the cursor were already pruned
+        """
+        limit = limit or settings.REPLICATION_BATCH_SIZE
+
+        if cursor:
+            watermark = (await self.db.execute(
+                select(ChangeLogPrune.txid, ChangeLogPrune.seq)
+                .order_by(ChangeLogPrune.txid.desc(), ChangeLogPrune.seq.desc())
+                .limit(1)
+            )).first()
+            if watermark is not None and parse_cursor(cursor) < tuple(watermark):
+                raise ChangeLogGapError(
+                    f"Change log pruned up to {format_cursor(*watermark)}, past cursor {cursor}: "
+                    f"full resync required"
+                )
+
+        result = await self.db.execute(
+            select(ChangeLog.txid, ChangeLog.seq, ChangeLog.entity_type, ChangeLog.entity_id, ChangeLog.origin)
+            .where(tuple_(ChangeLog.txid, ChangeLog.seq) > tuple_(*parse_cursor(cursor)))
+            .where(ChangeLog.txid < SNAPSHOT_HORIZON)
+            .order_by(ChangeLog.txid, ChangeLog.seq)
+            .limit(limit + 1)
+        )
+        entries = result.all()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Several entries per entity collapse into one: its current state
+        changed = {entity_type: set() for entity_type in ENTITY_MODELS}
+        for entry in entries:
+            if exclude_origin is None or entry.origin != exclude_origin:
+                changed[entry.entity_type].add(entry.entity_id)
+
+        current = {}
+        for entity_type, model in ENTITY_MODELS.items():
+            current[entity_type] = []
+            if changed[entity_type]:
+                result = await self.db.execute(
+                    select(model).where(model.id.in_(changed[entity_type])).order_by(model.id)
+                )
+                current[entity_type] = result.scalars().all()
+
+        # Transactions before accounts: a deleted account takes its transactions along
+        deleted = [
+            {"entity_type": entity_type, "id": entity_id}
+            for entity_type in ("transaction", "account")
+            for entity_id in sorted(changed[entity_type] - {entity.id for entity in current[entity_type]})
+        ]
+
+        return {
+            "transactions": [self._serialize_transaction(tx) for tx in current["transaction"]],
+            "accounts": [self._serialize_account(acc) for acc in current["account"]],
+            "deleted": deleted,
+            "cursor": format_cursor(entries[-1].txid, entries[-1].seq) if entries else cursor,
+            "has_more": has_more,
+        }
+
     async def push_changes(self, mirror: MirrorInstance) -> Dict[str, Any]:
         """
         Push local changes to mirror instance
 
+        Sends the change log after the mirror's push cursor in batches and
+        stores the cursor after each accepted batch, so a restart resumes
+        exactly where the last push stopped.
+
         Args:
             mirror: Mirror instance configuration
 
         Returns:
             Dict with push statistics
         """
-        # Get changes since last sync
-        since = mirror.last_sync or datetime.utcnow() - timedelta(days=7)
-
-        # Get changed transactions
-        transactions = self.db.query(Transaction).filter(
-            Transaction.updated_at > since
-        ).all()
-
-        # Get changed accounts
-        accounts = self.db.query(Account).filter(
-            Account.updated_at > since
-        ).all()
-
-        # Prepare payload
-        payload = {
-            "transactions": [self._serialize_transaction(tx) for tx in transactions],
-            "accounts": [self._serialize_account(acc) for acc in accounts],
-            "timestamp": datetime.utcnow().isoformat(),
-            "source_instance": settings.INSTANCE_DOMAIN,
-        }
+        client = get_http_client()
+        synced = 0
 
-        # Sign payload
-        signature = sign_data(json.dumps(payload, default=str))
-
-        # Send to mirror
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{mirror.instance_url}/api/v1/replication/receive",
-                json=payload,
-                headers={
-                    "X-Signature": signature,
-                    "X-Instance": settings.INSTANCE_DOMAIN,
+        while True:
+            changes = await self.collect_changes(mirror.push_cursor, exclude_origin=mirror.instance_id)
+            count = len(changes["transactions"]) + len(changes["accounts"]) + len(changes["deleted"])
+
+            if count:
+                # Prepare payload
+                payload = {
+                    "transactions": changes["transactions"],
+                    "accounts": changes["accounts"],
+                    "deleted": changes["deleted"],
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "source_instance": settings.INSTANCE_DOMAIN,
                 }
-            )
-            response.raise_for_status()
-
-        # Log successful sync
-        for tx in transactions:
-            self._log_sync(mirror, "push", "transaction", tx.id, "create", "success")
-        for acc in accounts:
-            self._log_sync(mirror, "push", "account", acc.id, "create", "success")
 
-        return {"synced": len(transactions) + len(accounts)}
+                # Sign payload
+                signature = sign_data(json.dumps(payload, default=str))
+
+                # Send to mirror
+                response = await client.post(
+                    f"{mirror.instance_url}/api/v1/replication/receive",
+                    json=payload,
+                    headers={
+                        "X-Signature": signature,
+                        "X-Instance": settings.INSTANCE_DOMAIN,
+                    }
+                )
+                response.raise_for_status()
+
+                # Log successful sync
+                for tx in changes["transactions"]:
+                    await self._log_sync(mirror, "push", "transaction", tx["id"], "update", "success")
+                for acc in changes["accounts"]:
+                    await self._log_sync(mirror, "push", "account", acc["id"], "update", "success")
+                for item in changes["deleted"]:
+                    await self._log_sync(mirror, "push", item["entity_type"], item["id"], "delete", "success")
+                synced += count
+
+            # Cursor and sync logs commit together
+            mirror.push_cursor = changes["cursor"]
+            await self.db.commit()
+
+            if not changes["has_more"]:
+                break
+
+        return {"synced": synced}
 
     async def pull_changes(self, mirror: MirrorInstance) -> Dict[str, Any]:
         """
         Pull changes from mirror instance
 
+        Requests the mirror's change log after our pull cursor; each batch
+        is applied and the new cursor stored in one commit. Mirrors without
+        a change log ignore the cursor and answer the updated_at scan.
+
         Args:
             mirror: Mirror instance configuration
 
         Returns:
             Dict with pull statistics
         """
+        client = get_http_client()
         since = mirror.last_sync or datetime.utcnow() - timedelta(days=7)
+        stats = {"synced": 0, "conflicts": 0}
 
-        # Request changes from mirror
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        while True:
+            # Request changes from mirror
             response = await client.get(
                 f"{mirror.instance_url}/api/v1/replication/changes",
-                params={"since": since.isoformat()},
+                params={"cursor": mirror.pull_cursor or "", "since": since.isoformat()},
+                headers={"X-Instance": settings.INSTANCE_DOMAIN},
             )
             response.raise_for_status()
 
@@ -163,15 +299,26 @@ class ReplicationService:
             if not verify_signature(json.dumps(data, default=str), signature, mirror.public_key):
                 raise ValueError("Invalid signature from mirror")
 
-        # Apply changes
-        result = await self.apply_changes(data, mirror)
+            # Apply changes (commits the new cursor with them)
+            if "cursor" in data:
+                mirror.pull_cursor = data["cursor"]
+            result = await self.apply_changes(data, mirror)
+            stats["synced"] += result["synced"]
+            stats["conflicts"] += result["conflicts"]
+
+            if not data.get("has_more"):
+                break
 
-        return result
+        return stats
 
     async def apply_changes(self, data: Dict[str, Any], mirror: MirrorInstance) -> Dict[str, Any]:
         """
         Apply changes from mirror instance
 
+        Runs in one database transaction with a savepoint per entity. The
+        change log entries written meanwhile are tagged with the mirror,
+        so the changes are not sent back to it.
+
         Args:
             data: Changes from mirror
             mirror: Mirror instance configuration
@@ -182,72 +329,109 @@ class ReplicationService:
         synced = 0
         conflicts = 0
 
-        # Apply transaction changes
-        for tx_data in data.get("transactions", []):
-            try:
-                existing = self.db.query(Transaction).filter(
-                    Transaction.id == tx_data["id"]
-                ).first()
-
-                if existing:
-                    # Check for conflict
-                    remote_updated = datetime.fromisoformat(tx_data["updated_at"])
-                    if existing.updated_at > remote_updated:
-                        # Our version is newer - handle conflict
-                        if await self.handle_conflict(existing, tx_data, mirror, "transaction"):
-                            conflicts += 1
-                            continue
-
-                    # Update existing
-                    for key, value in tx_data.items():
-                        if key not in ["id", "created_at"] and hasattr(existing, key):
-                            setattr(existing, key, value)
-                else:
-                    # Create new
-                    new_tx = Transaction(**tx_data)
-                    self.db.add(new_tx)
-
-                self._log_sync(mirror, "pull", "transaction", tx_data["id"], "update", "success")
-                synced += 1
+        # Transaction-local: read by the change log triggers
+        await self.db.execute(
+            text("SELECT set_config('app.change_origin', :origin, true)"),
+            {"origin": mirror.instance_id}
+        )
 
-            except Exception as e:
-                self._log_sync(mirror, "pull", "transaction", tx_data.get("id", 0), "update", "failed", str(e))
+        # Accounts first: new transactions may reference new accounts
+        for entity_type, key in (("account", "accounts"), ("transaction", "transactions")):
+            model = ENTITY_MODELS[entity_type]
+
+            for entity_data in data.get(key, []):
+                try:
+                    async with self.db.begin_nested():
+                        values = self._deserialize(model, entity_data)
+                        existing = await self.db.get(model, values["id"])
+
+                        if existing:
+                            # Check for conflict
+                            if existing.updated_at > values["updated_at"]:
+                                # Our version is newer - handle conflict
+                                if await self.handle_conflict(existing, entity_data, mirror, entity_type):
+                                    conflicts += 1
+                                    continue
+
+                            # Update existing
+                            for field, value in values.items():
+                                if field not in ["id", "created_at"]:
+                                    setattr(existing, field, value)
+                        else:
+                            # Create new
+                            self.db.add(model(**values))
+
+                    await self._log_sync(mirror, "pull", entity_type, entity_data["id"], "update", "success")
+                    synced += 1
+
+                except Exception as e:
+                    await self._log_sync(mirror, "pull", entity_type, entity_data.get("id", 0), "update", "failed", str(e))
+
+        # Apply deletes
+        for item in data.get("deleted", []):
+            model = ENTITY_MODELS.get(item.get("entity_type"))
+            if model is None:
+                continue
 
-        # Apply account changes
-        for acc_data in data.get("accounts", []):
             try:
-                existing = self.db.query(Account).filter(
-                    Account.id == acc_data["id"]
-                ).first()
-
-                if existing:
-                    # Check for conflict
-                    remote_updated = datetime.fromisoformat(acc_data["updated_at"])
-                    if existing.updated_at > remote_updated:
-                        # Our version is newer - handle conflict
-                        if await self.handle_conflict(existing, acc_data, mirror, "account"):
-                            conflicts += 1
-                            continue
-
-                    # Update existing
-                    for key, value in acc_data.items():
-                        if key not in ["id", "created_at"] and hasattr(existing, key):
-                            setattr(existing, key, value)
-                else:
-                    # Create new
-                    new_acc = Account(**acc_data)
-                    self.db.add(new_acc)
-
-                self._log_sync(mirror, "pull", "account", acc_data["id"], "update", "success")
+                async with self.db.begin_nested():
+                    existing = await self.db.get(model, item["id"])
+                    if existing:
+                        await self.db.delete(existing)
+
+                await self._log_sync(mirror, "pull", item["entity_type"], item["id"], "delete", "success")
                 synced += 1
 
             except Exception as e:
-                self._log_sync(mirror, "pull", "account", acc_data.get("id", 0), "update", "failed", str(e))
+                await self._log_sync(mirror, "pull", item["entity_type"], item.get("id", 0), "delete", "failed", str(e))
 
-        self.db.commit()
+        await self.db.commit()
 
         return {"synced": synced, "conflicts": conflicts}
 
+    async def prune_change_log(self) -> int:
+        """
+        Delete change log entries older than REPLICATION_CHANGE_LOG_RETENTION_DAYS
+        that every enabled pushing mirror has already read
+
+        Entries behind an enabled mirror's push cursor are kept however old
+        they are. Each run records its last deleted entry; a cursor behind
+        it (a mirror disabled meanwhile) fails with ChangeLogGapError
+        instead of silently skipping the pruned changes.
+
+        Returns:
+            Number of deleted entries
+        """
+        if settings.REPLICATION_CHANGE_LOG_RETENTION_DAYS <= 0:
+            return 0
+
+        result = await self.db.execute(
+            select(MirrorInstance.push_cursor)
+            .where(MirrorInstance.sync_enabled == True)
+            .where(MirrorInstance.sync_direction.in_(["push", "bidirectional"]))
+        )
+        cursors = [parse_cursor(cursor) for cursor in result.scalars().all()]
+        if not cursors or min(cursors) == (0, 0):
+            return 0  # No pushing mirror, or one that hasn't read anything yet
+
+        cutoff = datetime.utcnow() - timedelta(days=settings.REPLICATION_CHANGE_LOG_RETENTION_DAYS)
+        prunable = and_(
+            ChangeLog.changed_at < cutoff,
+            tuple_(ChangeLog.txid, ChangeLog.seq) <= tuple_(*min(cursors))
+        )
+        last = (await self.db.execute(
+            select(ChangeLog.txid, ChangeLog.seq).where(prunable)
+            .order_by(ChangeLog.txid.desc(), ChangeLog.seq.desc())
+            .limit(1)
+        )).first()
+        if last is None:
+            return 0
+
+        result = await self.db.execute(delete(ChangeLog).where(prunable))
+        self.db.add(ChangeLogPrune(txid=last.txid, seq=last.seq, deleted_count=result.rowcount))
+        await self.db.commit()
+        return result.rowcount
+
     async def handle_conflict(
         self,
         local: Any,
@@ -268,9 +452,10 @@ class ReplicationService:
             True if conflict was stored (manual resolution needed), False if auto-resolved
         """
         # Get conflict resolution strategy
-        resolution = self.db.query(ConflictResolution).filter(
-            ConflictResolution.entity_type == entity_type
-        ).first()
+        result = await self.db.execute(
+            select(ConflictResolution).where(ConflictResolution.entity_type == entity_type)
+        )
+        resolution = result.scalars().first()
 
         if not resolution:
             # Use default strategy from settings
@@ -288,14 +473,14 @@ class ReplicationService:
                 return False  # Keep local version (we are primary)
             else:
                 # Mirror is primary, use remote version
-                for key, value in remote.items():
-                    if key not in ["id", "created_at"] and hasattr(local, key):
+                for key, value in self._deserialize(type(local), remote).items():
+                    if key not in ["id", "created_at"]:
                         setattr(local, key, value)
                 return False
 
         elif strategy == "manual":
             # Store conflict for manual resolution
-            self._log_sync(
+            await self._log_sync(
                 mirror,
                 "pull",
                 entity_type,
@@ -316,6 +501,7 @@ class ReplicationService:
         """Serialize transaction to dict"""
         return {
             "id": tx.id,
+            "user_id": tx.user_id,
             "account_id": tx.account_id,
             "date": tx.date.isoformat(),
             "amount": str(tx.amount),
@@ -333,6 +519,7 @@ class ReplicationService:
         """Serialize account to dict"""
         return {
             "id": acc.id,
+            "user_id": acc.user_id,
             "name": acc.name,
             "type": acc.type,
             "iban": acc.iban,
@@ -343,6 +530,24 @@ class ReplicationService:
             "updated_at": acc.updated_at.isoformat(),
         }
 
+    def _deserialize(self, model: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Serialized entity -> column values (ISO dates and decimal strings converted back)"""
+        columns = model.__table__.columns
+        values = {}
+        for key, value in data.items():
+            column = columns.get(key)
+            if column is None:
+                continue
+            if isinstance(value, str):
+                if isinstance(column.type, DateTime):
+                    value = datetime.fromisoformat(value)
+                elif isinstance(column.type, Date):
+                    value = date.fromisoformat(value)
+                elif isinstance(column.type, Numeric):
+                    value = Decimal(value)
+            values[key] = value
+        return values
+
     def _serialize_entity(self, entity: Any, entity_type: str) -> Dict[str, Any]:
         """Serialize any entity based on type"""
         if entity_type == "transaction":
@@ -351,7 +556,7 @@ class ReplicationService:
             return self._serialize_account(entity)
         return {}
 
-    def _log_sync(
+    async def _log_sync(
         self,
         mirror: MirrorInstance,
         sync_type: str,
@@ -362,7 +567,7 @@ class ReplicationService:
         error_message: Optional[str] = None,
         conflict_data: Optional[Dict] = None
     ):
-        """Log sync operation"""
+        """Log sync operation (committed with the caller's transaction)"""
         log = SyncLog(
             mirror_instance_id=mirror.id,
             sync_type=sync_type,
@@ -374,8 +579,8 @@ class ReplicationService:
             conflict_data=conflict_data
         )
         self.db.add(log)
-        self.db.commit()
 
-    def log_sync_error(self, mirror: MirrorInstance, error: str):
+    async def log_sync_error(self, mirror: MirrorInstance, error: str):
         """Log general sync error"""
-        self._log_sync(mirror, "sync", "general", 0, "sync", "failed", error)
+        await self._log_sync(mirror, "sync", "general", 0, "sync", "failed", error)
+        await self.db.commit()
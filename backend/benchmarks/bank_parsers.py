@@ -0,0 +1,118 @@
+"""
+Benchmark: columnar vs row-wise bank CSV parsing
+
+Generates a synthetic statement per bank, parses it with the row-wise
+reference path and the columnar parser, checks both give the same
+transactions and prints the timings. Also compares parse_generic (CSV
+of an unknown bank, e.g. a reconciliation upload) with the previous
+reconciliation fallback (python sniffing engine + iterrows).
+
+Usage (from backend/):
+    python -m benchmarks.bank_parsers [rows]
+"""
+
+import io
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app.services.bank_csv_parser import POSTFINANCE, UBS, RAIFFEISEN, ZKB, parse_generic, parse_rows
+from app.services.bank_import_service import BankImportService
+
+
+def _swiss(value: float) -> str:
+    """Format like the banks do: 1'234.50"""
+    return f"{value:,.2f}".replace(",", "'")
+
+
+def generate(bank: str, rows: int) -> str:
+    rng = random.Random(42)
+    start = date(2015, 1, 1)
+    lines = {
+        'postfinance': ['Buchungsdatum;Avisierungstext;Gutschrift;Lastschrift;Valuta;Saldo'],
+        'ubs': ['Date,Description,Amount,Balance'],
+        'raiffeisen': ['Buchung;Avisierungstext;Haben;Soll'],
+        'zkb': ['Wertstellung;Beschreibung;Gutschrift;Belastung'],
+        'generic': ['Datum;Buchungstext;Betrag;Saldo'],
+    }[bank]
+
+    balance = 10000.0
+    for i in range(rows):
+        day = start + timedelta(days=i * 3650 // rows)
+        amount = round(rng.uniform(-2500, 2500), 2)
+        balance += amount
+        text = rng.choice(['Coop Basel', 'Migros Zürich', 'SBB Ticket', 'Lohn', 'Miete'])
+        credit, debit = (_swiss(amount), '0') if amount >= 0 else ('0', _swiss(-amount))
+
+        if bank == 'postfinance':
+            lines.append(f"{day:%d.%m.%Y};{text};{credit};{debit};{day:%d.%m.%Y};{_swiss(balance)}")
+        elif bank == 'generic':
+            lines.append(f"{day:%d.%m.%Y};{text};{amount:.2f};{balance:.2f}")
+        elif bank == 'ubs':
+            lines.append(f"{day:%Y-%m-%d},{text},{amount:.2f},{balance:.2f}")
+        else:
+            lines.append(f"{day:%d.%m.%Y};{text};{credit};{debit}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def parse_generic_iterrows(csv_content: str):
+    """The previous reconciliation fallback: sniffing engine, one pd.to_datetime per row"""
+    df = pd.read_csv(io.StringIO(csv_content), sep=None, engine='python')
+    transactions = []
+    for _, row in df.iterrows():
+        try:
+            transactions.append({
+                'date': pd.to_datetime(row['Datum'], dayfirst=True),
+                'amount': float(row['Betrag']) if pd.notna(row['Betrag']) else 0.0,
+                'description': str(row['Buchungstext']),
+            })
+        except Exception:
+            continue
+    return transactions
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    service = BankImportService(None)
+    banks = [
+        ('postfinance', POSTFINANCE, service._parse_postfinance_row, service.parse_postfinance),
+        ('ubs', UBS, service._parse_ubs_row, service.parse_ubs),
+        ('raiffeisen', RAIFFEISEN, service._parse_raiffeisen_row, service.parse_raiffeisen),
+        ('zkb', ZKB, service._parse_zkb_row, service.parse_zkb),
+    ]
+
+    print(f"{'bank':<12} {'rows':>9} {'row-wise':>10} {'columnar':>10} {'speedup':>8}")
+    for bank, fmt, parse_row, parse_columnar in banks:
+        content = generate(bank, rows)
+
+        started = time.perf_counter()
+        expected = parse_rows(content, fmt.delimiter, parse_row)
+        row_wise = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = parse_columnar(content)
+        columnar = time.perf_counter() - started
+
+        assert actual == expected, f"{bank}: columnar result differs from row-wise"
+        print(f"{bank:<12} {len(actual):>9} {row_wise:>9.2f}s {columnar:>9.2f}s {row_wise / columnar:>7.1f}x")
+
+    # Unknown bank: the old fallback is slow, so it gets at most 100k rows
+    generic_rows = min(rows, 100_000)
+    content = generate('generic', generic_rows)
+    started = time.perf_counter()
+    expected = parse_generic_iterrows(content)
+    iterrows = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = parse_generic(content)
+    generic = time.perf_counter() - started
+    assert [(tx['date'].date(), tx['amount']) for tx in expected] == [(tx['date'], float(tx['amount'])) for tx in actual]
+    print(f"{'generic':<12} {len(actual):>9} {iterrows:>9.2f}s {generic:>9.2f}s {iterrows / generic:>7.1f}x"
+          f"  (iterrows fallback vs parse_generic)")
+
+
+if __name__ == '__main__':
+    main()
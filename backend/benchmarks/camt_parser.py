@@ -0,0 +1,81 @@
+"""
+Benchmark: streaming camt.053 parser memory
+
+Writes a synthetic camt.053 statement to a temporary file, parses it with
+CamtReader and prints throughput and how much the process' peak RSS grew
+while parsing, which should stay flat no matter how large the file is.
+
+Usage (from backend/):
+    python -m benchmarks.camt_parser [entries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import resource
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+from app.services.camt_parser import CamtReader
+
+NAMESPACE = 'urn:iso:std:iso:20022:tech:xsd:camt.053.001.04'
+
+
+def _entry(rng: random.Random, index: int, day: date) -> str:
+    amount = round(rng.uniform(1, 2500), 2)
+    debit = rng.random() < 0.7
+    party = 'Cdtr' if debit else 'Dbtr'
+    name = escape(rng.choice(['Coop Basel', 'Migros Zürich', 'SBB CFF FFS', 'Arbeitgeber AG', 'Vermieter & Co']))
+    return (
+        f'<Ntry><Amt Ccy="CHF">{amount:.2f}</Amt><CdtDbtInd>{"DBIT" if debit else "CRDT"}</CdtDbtInd>'
+        f'<Sts>BOOK</Sts><BookgDt><Dt>{day.isoformat()}</Dt></BookgDt><ValDt><Dt>{day.isoformat()}</Dt></ValDt>'
+        f'<AcctSvcrRef>{day:%Y%m%d}{index:012d}</AcctSvcrRef><BkTxCd/>'
+        f'<NtryDtls><TxDtls><Refs><EndToEndId>NOTPROVIDED</EndToEndId></Refs>'
+        f'<AmtDtls><TxAmt><Amt Ccy="CHF">{amount:.2f}</Amt></TxAmt></AmtDtls>'
+        f'<RltdPties><{party}><Nm>{name}</Nm></{party}></RltdPties>'
+        f'<RmtInf><Ustrd>Rechnung {index}</Ustrd></RmtInf></TxDtls></NtryDtls>'
+        f'<AddtlNtryInf>{name}</AddtlNtryInf></Ntry>\n'
+    )
+
+
+def generate(path: str, entries: int, iban: str = 'CH9300762011623852957') -> None:
+    """Write a camt.053 statement with the given number of booked entries"""
+    rng = random.Random(42)
+    start = date(2015, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n<Document xmlns="{NAMESPACE}"><BkToCstmrStmt>'
+            '<GrpHdr><MsgId>BENCH</MsgId><CreDtTm>2025-01-01T00:00:00</CreDtTm></GrpHdr>'
+            f'<Stmt><Id>1</Id><Acct><Id><IBAN>{iban}</IBAN></Id><Ccy>CHF</Ccy></Acct>\n'
+        )
+        for i in range(entries):
+            f.write(_entry(rng, i, start + timedelta(days=i * 3650 // max(entries, 1))))
+        f.write('</Stmt></BkToCstmrStmt></Document>\n')
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    fd, path = tempfile.mkstemp(suffix='.xml')
+    os.close(fd)
+    try:
+        generate(path, entries)
+        size_mb = os.path.getsize(path) / 1e6
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            parsed = sum(1 for _ in CamtReader(f).entries())
+        elapsed = time.perf_counter() - started
+        rss_growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+        assert parsed == entries, f"parsed {parsed} of {entries} entries"
+        print(f"{size_mb:.1f} MB, {parsed} entries in {elapsed:.2f}s "
+              f"({parsed / elapsed:,.0f}/s), peak RSS +{rss_growth_mb:.1f} MB")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
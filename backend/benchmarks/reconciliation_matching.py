@@ -0,0 +1,156 @@
+"""
+Benchmark: indexed vs all-pairs reconciliation matching
+
+Builds a synthetic account (recurring payments, shops with repeated
+prices, bank rows shifted by a few days or with noisy descriptions),
+matches it with ReconciliationService._match_transactions and with the
+previous all-pairs loop, checks both give the same matches on a size the
+all-pairs loop can handle, and times the indexed matcher at full size.
+Also runs the optimal assignment mode and prints how it differs from
+greedy.
+
+Usage (from backend/):
+    python -m benchmarks.reconciliation_matching [rows] [verify_rows]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from app.models.transaction import Transaction
+from app.services.reconciliation_service import ReconciliationService
+
+MERCHANTS = [
+    'Coop Basel', 'Migros Zürich', 'SBB CFF FFS', 'Swisscom', 'Digitec Galaxus',
+    'Apotheke Bahnhof', 'Denner', 'Tankstelle Shell', 'Restaurant Krone', 'Zalando',
+]
+RECURRING = [('Miete Wohnung', Decimal('-1850.00')), ('Lohn', Decimal('6200.00')),
+             ('Krankenkasse', Decimal('-412.35')), ('Netflix', Decimal('-17.90'))]
+
+
+def generate(rows: int, seed: int = 42) -> Tuple[List[Dict], List[Transaction]]:
+    """
+    Bank rows and app transactions for one account over the same period;
+    bank rows carry the id of the app transaction they were made from
+    ('source_id', None for bank-only rows)
+    """
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    days = max(rows // 20, 30)
+    prices = [Decimal(rng.randint(100, 30000)) / 100 for _ in range(max(rows // 25, 50))]
+
+    app_transactions = []
+    bank_transactions = []
+    for i in range(rows):
+        day = start + timedelta(days=rng.randrange(days))
+        if rng.random() < 0.05:
+            description, amount = rng.choice(RECURRING)
+            day = day.replace(day=1)
+        else:
+            description, amount = f"{rng.choice(MERCHANTS)} {rng.randint(1, 40)}", -rng.choice(prices)
+
+        tx = Transaction(id=i + 1, date=day, amount=amount, description=description)
+        app_transactions.append(tx)
+
+        roll = rng.random()
+        if roll < 0.05:
+            continue  # Only in the app
+        bank_day = day + timedelta(days=rng.choice([0, 0, 0, 1, 2, 3, 6, 12]))
+        if roll < 0.45:
+            bank_description = description.upper()
+        elif roll < 0.75:
+            bank_description = f"EINKAUF {description} KARTE 1234"
+        else:
+            bank_description = f"TWINT {description.upper()} {bank_day:%d.%m.%Y} REF {rng.randint(10 ** 8, 10 ** 9)}"
+        if roll > 0.97:
+            bank_description = ''
+        bank_transactions.append({
+            'date': bank_day, 'amount': amount, 'description': bank_description, 'source_id': tx.id
+        })
+
+    # Bank-only rows
+    for _ in range(rows // 20):
+        bank_transactions.append({
+            'date': start + timedelta(days=rng.randrange(days)),
+            'amount': -rng.choice(prices),
+            'description': f"{rng.choice(MERCHANTS)} {rng.randint(1, 40)}",
+            'source_id': None
+        })
+    rng.shuffle(bank_transactions)
+    app_transactions.sort(key=lambda tx: (tx.date, tx.id))
+    return bank_transactions, app_transactions
+
+
+def match_all_pairs(service: ReconciliationService, bank_transactions, app_transactions) -> List[Tuple]:
+    """The previous O(n*m) loop: score every unused app transaction"""
+    results = []
+    used = set()
+    for bank_tx in bank_transactions:
+        bank_amount = Decimal(str(bank_tx['amount']))
+        best_match, best_confidence = None, 0
+        for app_tx in app_transactions:
+            if app_tx.id in used:
+                continue
+            result = service._calculate_match_confidence(
+                bank_date=bank_tx['date'], bank_amount=bank_amount,
+                bank_description=bank_tx.get('description', ''), app_tx=app_tx
+            )
+            if result['confidence'] > best_confidence:
+                best_confidence = result['confidence']
+                best_match = (app_tx, result['type'])
+        if best_match and best_confidence >= 70:
+            used.add(best_match[0].id)
+            results.append((best_match[0].id, 'matched', best_confidence, best_match[1]))
+        else:
+            results.append((None, 'unmatched_bank', 0, None))
+    results.extend((tx.id, 'unmatched_app', 0, None) for tx in app_transactions if tx.id not in used)
+    return results
+
+
+def match_indexed(service: ReconciliationService, bank_transactions, app_transactions) -> List[Tuple]:
+    matches = service._match_transactions(0, bank_transactions, app_transactions)
+    return [(m['transaction_id'], m['match_status'], m['match_confidence'], m['match_type']) for m in matches]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    verify_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 3_000
+    service = ReconciliationService(None)
+
+    bank, app = generate(verify_rows)
+    verify_pairs = len(bank) * len(app)
+    started = time.perf_counter()
+    expected = match_all_pairs(service, bank, app)
+    all_pairs = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = match_indexed(service, bank, app)
+    indexed = time.perf_counter() - started
+    assert actual == expected, "indexed matches differ from all-pairs matches"
+    matched = sum(1 for m in actual if m[1] == 'matched')
+    print(f"verify {len(bank)}x{len(app)}: all-pairs {all_pairs:.2f}s, indexed {indexed:.3f}s, "
+          f"identical ({matched} matched)")
+
+    bank, app = generate(rows)
+    started = time.perf_counter()
+    actual = match_indexed(service, bank, app)
+    indexed = time.perf_counter() - started
+    matched = sum(1 for m in actual if m[1] == 'matched')
+    # All-pairs cost grows with the number of pairs
+    estimate = all_pairs * len(bank) * len(app) / verify_pairs
+    print(f"full {len(bank)}x{len(app)}: indexed {indexed:.2f}s ({matched} matched), "
+          f"all-pairs estimated {estimate / 60:.0f} min")
+
+    started = time.perf_counter()
+    service._match_transactions(0, bank, app, assignment="optimal")
+    optimal = time.perf_counter() - started
+    report = service.assignment_report
+    assert report['optimal']['total_confidence'] >= report['greedy']['total_confidence']
+    print(f"optimal {optimal:.2f}s: {report['components']} components (largest {report['largest_component']}), "
+          f"greedy {report['greedy']}, optimal {report['optimal']}, {report['changed_rows']} rows changed")
+
+
+if __name__ == '__main__':
+    main()
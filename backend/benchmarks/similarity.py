@@ -0,0 +1,114 @@
+"""
+Benchmark: description similarity backends vs difflib
+
+Uses the synthetic account of benchmarks.reconciliation_matching, where
+every bank row knows the app transaction it was made from, and compares
+the backends of app.services.similarity on:
+
+- pairs: score time per pair and how well the score separates a bank
+  row's own transaction from another one with the same amount (AUC, and
+  accuracy at the best threshold)
+- reconciliation: greedy matching with each backend, counting bank rows
+  matched to their own transaction, to a wrong one, or left unmatched
+
+Usage (from backend/):
+    python -m benchmarks.similarity [rows]
+"""
+
+import random
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.reconciliation_matching import generate
+from app.services.reconciliation_service import ReconciliationService
+from app.services.similarity import METHODS, get_similarity
+
+
+def labeled_pairs(bank, app, seed: int = 7):
+    """(bank description, app description, same transaction?) pairs"""
+    rng = random.Random(seed)
+    by_id = {tx.id: tx for tx in app}
+    by_amount = defaultdict(list)
+    for tx in app:
+        by_amount[tx.amount].append(tx)
+
+    pairs = []
+    for bank_tx in bank:
+        source = by_id.get(bank_tx['source_id'])
+        if source is None or not bank_tx['description']:
+            continue
+        pairs.append((bank_tx['description'], source.description, True))
+        # Hardest negative: another transaction with the same amount
+        others = [tx for tx in by_amount[source.amount] if tx.description != source.description]
+        other = rng.choice(others) if others else rng.choice(app)
+        if other.description != source.description:
+            pairs.append((bank_tx['description'], other.description, False))
+    return pairs
+
+
+def separation(scores):
+    """AUC and best-threshold accuracy of (score, label) pairs"""
+    positives = sorted(score for score, label in scores if label)
+    negatives = sorted(score for score, label in scores if not label)
+
+    # AUC: probability a positive outscores a negative (ties count half)
+    wins, j, k = 0.0, 0, 0
+    for score in positives:
+        while j < len(negatives) and negatives[j] < score:
+            j += 1
+        k = j
+        while k < len(negatives) and negatives[k] == score:
+            k += 1
+        wins += j + (k - j) / 2
+    auc = wins / (len(positives) * len(negatives))
+
+    best = 0.0
+    for threshold in sorted({score for score, _ in scores}):
+        correct = sum(1 for score, label in scores if (score >= threshold) == label)
+        best = max(best, correct / len(scores))
+    return auc, best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    bank, app = generate(rows)
+    pairs = labeled_pairs(bank, app)
+    print(f"{len(pairs)} labeled pairs, {len(bank)} bank rows x {len(app)} app transactions")
+
+    print(f"{'method':<10} {'cold us/pair':>12} {'warm us/pair':>12} {'AUC':>6} {'accuracy':>9}")
+    for method in METHODS:
+        similarity = get_similarity(method)
+        started = time.perf_counter()
+        scores = [(similarity.score(a, b), label) for a, b, label in pairs]
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        for a, b, _ in pairs:
+            similarity.score(a, b)
+        warm = time.perf_counter() - started
+        auc, accuracy = separation(scores)
+        print(f"{method:<10} {cold / len(pairs) * 1e6:>12.2f} {warm / len(pairs) * 1e6:>12.2f} "
+              f"{auc:>6.3f} {accuracy:>8.1%}")
+
+    print(f"\n{'method':<10} {'time':>7} {'correct':>8} {'wrong':>6} {'missed':>7} {'false+':>7}")
+    for method in METHODS:
+        service = ReconciliationService(None, similarity=get_similarity(method))
+        started = time.perf_counter()
+        matches = service._match_transactions(0, bank, app)
+        elapsed = time.perf_counter() - started
+
+        correct = wrong = missed = false_positive = 0
+        for bank_tx, match in zip(bank, matches):
+            if match['match_status'] != 'matched':
+                missed += bank_tx['source_id'] is not None
+            elif bank_tx['source_id'] is None:
+                false_positive += 1
+            elif match['transaction_id'] == bank_tx['source_id']:
+                correct += 1
+            else:
+                wrong += 1
+        print(f"{method:<10} {elapsed:>6.2f}s {correct:>8} {wrong:>6} {missed:>7} {false_positive:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,3 @@
-import os
 import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -6,6 +5,7 @@ from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQu
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.transaction import Transaction
+from app.services.receipt_storage import ReceiptStorage
 from pathlib import Path
 from datetime import date
 
@@ -58,13 +58,17 @@ async def handle_document(update: Update, context):
     
     file_path = temp_dir / f"{file.file_id}.pdf"
     await file.download_to_drive(file_path)
-    
-    # Try OCR extraction (basic implementation)
-    extracted_data = extract_receipt_data(str(file_path))
-    
-    # Create pending transaction
+
     db = SessionLocal()
     try:
+        # Move into the content-addressed store (deduplicates re-sent
+        # receipts); the file stays locked until the transaction is committed
+        file_path = await asyncio.to_thread(ReceiptStorage().store_file, str(file_path), db)
+        
+        # Try OCR extraction (basic implementation)
+        extracted_data = extract_receipt_data(str(file_path))
+        
+        # Create pending transaction
         transaction = Transaction(
             account_id=1,  # Default account, user can change
             date=extracted_data.get("date", date.today()),
@@ -124,11 +128,15 @@ async def handle_photo(update: Update, context):
     
     file_path = temp_dir / f"{file.file_id}.jpg"
     await file.download_to_drive(file_path)
-    
-    extracted_data = extract_receipt_data(str(file_path))
-    
+
     db = SessionLocal()
     try:
+        # Move into the content-addressed store (deduplicates re-sent
+        # receipts); the file stays locked until the transaction is committed
+        file_path = await asyncio.to_thread(ReceiptStorage().store_file, str(file_path), db)
+        
+        extracted_data = extract_receipt_data(str(file_path))
+        
         transaction = Transaction(
             account_id=1,
             date=extracted_data.get("date", date.today()),
@@ -190,11 +198,11 @@ async def button_callback(update: Update, context):
             )
         
         elif action == "delete":
-            # Delete file if exists
-            if transaction.receipt_path and os.path.exists(transaction.receipt_path):
-                os.remove(transaction.receipt_path)
+            receipt_path = transaction.receipt_path
             db.delete(transaction)
             db.commit()
+            # Delete file unless another transaction shares it
+            ReceiptStorage().release(db, receipt_path)
             await query.edit_message_text("🗑 Transaktion gelöscht.")
         
         elif action == "edit":